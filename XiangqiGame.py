@@ -1,1346 +1,2166 @@
-# Project: CS 162 Portfolio Project
-# Author: Christopher Eckerson
-# Date: 3/12/2020
-# Description: This script is a Xiangqi Game, with supporting classes and functions.
-#              It includes the main class, XiangqiGame, that manages and initializes the game,
-#              starting with red player.  There is a super class of GamePiece, and additional
-#              sub-classes game piece classes, represent their unique rules for moving.
-#              The XiangqiGame class manages the board progress using a dictionary, where the
-#              keys represent the location of pieces and the values are the particular GamePiece
-#              class at that location.
-#              Locations within the program are stored as tuples of index notation, representing
-#              the horizontal and vertical (col, row) positions, starting from the red sides
-#              left corner if the board were arranged (as seen from above the board) with the
-#              red player as the top and black as the bottom.  Users by default are assumed to use
-#              algebraic notation, but have the option with board methods to also use index notation.
-
-#              The main function provides an interactive way to play the game or to test functionality
-#              of the program.  This script introduces two exceptions class for handling algebraic
-#              notation errors and a class for player name input errors.  The main function 'PLAY' option
-#              is supported by some of the display methods found in the XiangqiGame class.
-import copy
-
-class XiangqiGame:
-    """Represents Game of Xiangqi with players, board pieces, and a game state"""
-
-    def __init__(self):
-        """Initialize Xiangqi game parameters, set up the game piece"""
-        self._game_log = []
-        self.counter = 1
-        self._game_state = "UNFINISHED"
-        self._active_player = "RED"
-        self._other_player = "BLACK"
-        self._board_dictionary = {}
-        self.board_piece_setup()
-        self._generals = {"RED": self._board_dictionary[(4, 0)],
-                          "BLACK": self._board_dictionary[(4, 9)]}
-        self.update_log()
-
-    def update_log(self):
-        """Append current state to game play log"""
-        current = {
-            'turn': self.counter,
-            'state': self._game_state,
-            'player': self._active_player,
-            'opponent': self._other_player,
-            'board': copy.deepcopy(self._board_dictionary),
-            'generals': copy.deepcopy(self._generals),
-            'turn': self.counter}
-        self._game_log.append(current)
-        self.counter += 1
-
-    def sync_to_last_log(self):
-        """Update game to last game play in log (Effectively an 'Undo last move')"""
-        #print(self._game_log)
-        try:
-            # don't allow popping of past initial game state
-            if len(self._game_log) == 1:
-                raise IndexError
-            # remove current state
-            self._game_log.pop()
-            # get prev state
-            loggedState = self._game_log.pop()
-            self._game_state = loggedState['state']
-            self._active_player = loggedState['player']
-            self._other_player = loggedState['opponent']
-            self._board_dictionary = loggedState['board']
-            self._generals = loggedState['generals']
-            self.counter = loggedState['turn'] + 1
-            self._game_log.append(loggedState)
-        except IndexError:
-            print("Index Error: No past game play found")
-
-
-    def board_piece_setup(self):
-        """Sets up board dictionary, where keys are starting locations and GamePieces are values"""
-        # Place/initialize player's Cannon GamePieces at starting locations, by index notation (col, row)
-        self._board_dictionary[(4, 9)] = General("BLACK", (4, 9))
-        self._board_dictionary[(1, 2)] = Cannon("RED", (1, 2))
-        self._board_dictionary[(1, 7)] = Cannon("BLACK", (1, 7))
-        self._board_dictionary[(7, 2)] = Cannon("RED", (7, 2))
-        self._board_dictionary[(7, 7)] = Cannon("BLACK", (7, 7))
-        # Create list of GamePiece classes that are found in the back row of each player
-        back_row = [Chariot, Horse, Elephant, Advisor, General, Advisor, Elephant, Horse, Chariot]
-        # loop through each column on board
-        for column in range(9):
-            # index = column was added for readability, helps distinguish the different uses of the same value
-            index = column
-            # For each column, place/initialize the GamePiece class found in the back row for each player
-            self._board_dictionary[(column, 0)] = back_row[index]("RED", (column, 0))
-            self._board_dictionary[(column, 9)] = back_row[index]("BLACK", (column, 9))
-            # for even column values, place/initialize the Solder GamePiece
-            if column % 2 == 0:
-                # Place/initialize player's Soldier GamePieces at starting locations, by index notation (col, row)
-                self._board_dictionary[(column, 3)] = Soldier("RED", (column, 3))
-                self._board_dictionary[(column, 6)] = Soldier("BLACK", (column, 6))
-
-    def is_in_check(self, player):
-        """takes as parameters 'red' or 'black' and returns True is that player is in check and False otherwise"""
-        try:
-            # make user input not case-sensitive
-            player = player.upper()
-            # check that user entered a player name found in Xiangqi Game
-            if player == self._active_player or player == self._other_player:
-                # get the general owned by the player
-                player_general = self._generals[player]
-                # get the location of that general
-                generals_location = player_general.get_location()
-                # look through all locations in current board dictionary
-                for location in self._board_dictionary:
-                    # get piece at current board location
-                    piece = self._board_dictionary[location]
-                    # check that piece is not owned by that player
-                    if piece.get_player() != player:
-                        # piece owned by other player, get the allowed moves for piece
-                        piece_moves = piece.allowed_move(self)
-                        # look through each move and remove any that would land on a piece of the same team
-                        for move in piece_moves:
-                            # check if location of move contains a piece
-                            if move in self._board_dictionary:
-                                # get other piece at that move location
-                                other_piece = self._board_dictionary[move]
-                                # check if that piece is the same player
-                                if other_piece.get_player() == piece.get_player():
-                                    # remove move from allowed moves
-                                    piece_moves.remove(move)
-                                else:
-                                    # piece is other player, move allowed
-                                    continue
-                            else:
-                                # move contains no piece, move allowed
-                                continue
-                        # after removing moves onto same player pieces, check if general location is in allowed moves
-                        if generals_location in piece_moves:
-                            # piece can capture general with available moves, return True
-                            return True
-                        else:
-                            # piece can not capture general with available moves, go to next piece
-                            continue
-                    else:
-                        # Piece is owned by the player, go to next piece
-                        continue
-                # no location puts player in check
-                return False
-            # incorrect player name entered
-            else:
-                raise InvalidPlayerError
-        except InvalidPlayerError:
-            print("Invalid Player Parameter: player parameter must be 'red' or 'black', not case-sensitive")
-
-    def is_in_check_mate(self, player):
-        """
-        Takes in 'red' or 'black' and returns True if player has no more moves and is in checkmate, otherwise False
-        """
-        try:
-            # make user input not case-sensitive
-            player = player.upper()
-            # check that user entered a player name found in Xiangqi Game
-            if player == self._active_player or player == self._other_player:
-                # look through all locations in current board dictionary
-                for location in self._board_dictionary:
-                    # get piece at current board location
-                    piece = self._board_dictionary[location]
-                    # get the allowed moves for piece
-                    piece_moves = piece.allowed_move(self)
-                    # check that piece is the players piece
-                    if piece.get_player() == player:
-                        for move in piece_moves:
-                            # check if move in is a position occupied by another piece
-                            if move in self._board_dictionary:
-                                # location is occupied by another piece
-                                other_piece = self._board_dictionary[move]
-                                # check if other piece is not the same player
-                                if other_piece.get_player() != player:
-                                    # piece is other players, save return locations for both pieces
-                                    return_location = piece.get_location()
-                                    checked_location = other_piece.get_location()
-                                    # update pieces and board as if piece is at location
-                                    self._board_dictionary[move] = piece
-                                    piece.set_location(move)
-                                    other_piece.set_location(None)
-                                    del self._board_dictionary[return_location]
-                                    # check if new location may gets player out of check
-                                    if not self.is_in_check(piece.get_player()):
-                                        # move does not put player in check, not checkmate
-                                        # reset pieces and board
-                                        self._board_dictionary[return_location] = piece
-                                        piece.set_location(return_location)
-                                        self._board_dictionary[checked_location] = other_piece
-                                        other_piece.set_location(checked_location)
-                                        # There is a piece that can prevent check mate, return False
-                                        return False
-                                    else:
-                                        # player is still in check, return pieces to old location
-                                        self._board_dictionary[return_location] = piece
-                                        piece.set_location(return_location)
-                                        self._board_dictionary[move] = other_piece
-                                        other_piece.set_location(move)
-                                        # check another player piece
-                                        continue
-                                else:
-                                    # move not allowed, other piece is same team, check another player piece
-                                    continue
-                            else:
-                                # empty location, move piece to location and save return location
-                                return_location = piece.get_location()
-                                # update piece and board as if piece is at location
-                                self._board_dictionary[move] = piece
-                                piece.set_location(move)
-                                del self._board_dictionary[return_location]
-                                # check if new location puts player in check
-                                if not self.is_in_check(piece.get_player()):
-                                    # move does not put player in check, not checkmate
-                                    # reset pieces and board
-                                    self._board_dictionary[return_location] = piece
-                                    piece.set_location(return_location)
-                                    del self._board_dictionary[move]
-                                    # There is a piece that can prevent check mate, return False
-                                    return False
-                                else:
-                                    # move puts player in check, return piece to old location
-                                    # reset pieces and board
-                                    self._board_dictionary[return_location] = piece
-                                    piece.set_location(return_location)
-                                    del self._board_dictionary[move]
-                                    # check another player piece
-                                    continue
-                # no player pieces has a possible move to escape checkmate
-                return True
-
-        except InvalidPlayerError:
-            print("Invalid Player Parameter: player parameter must be 'red' or 'black', not case-sensitive")
-
-    def make_move(self, currentPosition, nextPosition):
-        """
-        Takes the algebraic notation representing locations where piece is from and moving to.
-        Checks if game is already over, validates algebraic notation, checks if move is possible,
-        and if the moves puts the other player in check. Prints messages to inform the user of the
-        action.
-        Returns either True if move is allowed, otherwise False.
-        """
-        # before move, check if player is in check mate
-        if self.is_in_check_mate(self._active_player):
-            # update game state to other player has won
-            self._game_state = self._other_player + "_WON"
-            print(self._game_state)
-            # move not allowed, return False
-            return False
-
-        # before move, check if other player is in check mate
-        if self.is_in_check_mate(self._active_player):
-            # update game state to other player has won
-            self._game_state = self._other_player + "_WON"
-            print(self._game_state)
-            # move not allowed, return False
-            return False
-
-        # if game is already over
-        if self._game_state != "UNFINISHED":
-            print(self._game_state)
-            return False
-
-        # check that locations are in algebraic notation and are on the board
-        if self.is_location_on_board(currentPosition) and self.is_location_on_board(nextPosition):
-            currentPosition = ConvertAlgebraicNotation(currentPosition)
-            nextPosition = ConvertAlgebraicNotation(nextPosition)
-        else:
-            return False
-        # If no piece is at the current position, print message, return False
-        if currentPosition not in self._board_dictionary:
-            print("current position contains no pieces")
-            return False
-
-        # There is a piece at the given current location
-        piece = self._board_dictionary[currentPosition]
-        # If the piece at current location is not the active player's piece, print message, return False
-        if piece.get_player() is not self._active_player:
-            print("Incorrect Piece: Location contains a", piece.get_player(), piece.get_pieceName())
-            return False
-        else:
-            print("Selected", piece.get_player(), piece.get_pieceName())
-
-        # get piece's allowed moves
-        piece_moves = piece.allowed_move(self)
-        if nextPosition in piece_moves:
-            # move allowed, check if location is already occupied
-            if nextPosition in self._board_dictionary:
-                # location is occupied by another piece
-                other_piece = self._board_dictionary[nextPosition]
-                # check if other piece is not the same player
-                if self._active_player != other_piece.get_player():
-                    # piece is other players, update pieces and board as if piece is at location
-                    self._board_dictionary[nextPosition] = piece
-                    piece.set_location(nextPosition)
-                    other_piece.set_location(None)
-                    del self._board_dictionary[currentPosition]
-                    # check if new location puts player in check
-                    if not self.is_in_check(self._active_player):
-                        # move does not put player in check, update other piece as being captured
-                        other_piece.captured()
-                        # get name of captured piece for printing
-                        captured_piece = other_piece.get_pieceName()
-                        # end move, check if move checkmates other player
-                        if self.is_in_check_mate(self._other_player):
-                            # update game state to other player has won
-                            self._game_state = self._active_player + "_WON"
-                            print(self._game_state)
-                            # update game play log
-                            self.update_log()
-                            # move allowed, ends game
-                            return True
-                        else:
-                            # exchange active player and other player
-                            new_active_player = self._other_player
-                            self._other_player = self._active_player
-                            self._active_player = new_active_player
-                            print(captured_piece, "was captured")
-                            # update game play log
-                            self.update_log()
-                            # move allowed, return True
-                            return True
-                    else:
-                        # move puts player in check, return pieces back on board
-                        self._board_dictionary[currentPosition] = piece
-                        piece.set_location(currentPosition)
-                        self._board_dictionary[nextPosition] = other_piece
-                        other_piece.set_location(nextPosition)
-                        # alert player their general is in check
-                        players_general = self._generals[self._active_player]
-                        print("Invalid Move:", players_general.get_pieceName(), "would be in check.")
-                        # move not allowed, return False
-                        return False
-                else:
-                    # move not allowed, other piece is same team
-                    print("Move not allowed: same team")
-                    return False
-            else:
-                # empty location, update pieces and board as if piece is at location
-                self._board_dictionary[nextPosition] = piece
-                piece.set_location(nextPosition)
-                del self._board_dictionary[currentPosition]
-                # check if new location puts player in check
-                if not self.is_in_check(piece.get_player()):
-                    # end move, check if move checkmates other player
-                    if self.is_in_check_mate(self._other_player):
-                        # update game state to other player has won
-                        self._game_state = self._active_player + "_WON"
-                        print(self._game_state)
-                        # update game play log
-                        self.update_log()
-                        # move allowed, game completed
-                        return True
-                    else:
-                        # exchange active player and other player
-                        new_active_player = self._other_player
-                        self._other_player = self._active_player
-                        self._active_player = new_active_player
-                        print(piece.get_pieceName(), "was moved")
-                        # update game play log
-                        self.update_log()
-                        # move allowed, return True
-                        return True
-                else:
-                    # move puts player in check, return piece to old location and delete new, and return False
-                    self._board_dictionary[currentPosition] = piece
-                    piece.set_location(currentPosition)
-                    del self._board_dictionary[nextPosition]
-                    # # check if player has any available moves or if they are in checkmate
-                    if self.is_in_check_mate(self._active_player):
-                        # update game state to other player has won
-                        self._game_state = self._other_player + "_WON"
-                        print(self._game_state)
-                        # move not allowed, return False
-                        return False
-                    else:
-                        # the player is only in check, the move is not allowed but there exists allowed moves
-                        players_general = self._generals[self._active_player]
-                        print("Invalid Move:", players_general.get_pieceName(), "is in check.")
-                        # move not allowed, return False
-                        return False
-        else:
-            # move is not allowed for piece, return False
-            print(piece.get_pieceName(), "is not allowed to move there")
-            return False
-
-    def piece_at_location(self, location, indexNotation=False):
-        """
-        Returns GamePiece if at location, taken by default in algebraic notation, else returns None.
-        IndexNotation: parameter as True allows user to input index notation tuple instead (col, row)
-        """
-        # If location given in algebraic notation
-        if not indexNotation:
-            # check if location is within board boundaries
-            if self.is_location_on_board(location):
-                # convert algebraic notation into index notation
-                location = ConvertAlgebraicNotation(location)
-                # check if location contains a board piece
-                if location in self._board_dictionary:
-                    # get piece at location and return the game piece object
-                    piece = self._board_dictionary[location]
-                    return piece
-                else:
-                    # location is not found in board dictionary, no piece found, return None
-                    return None
-            else:
-                # location is not within board boundaries
-                return None
-        # location is given in index notation
-        else:
-            # check if location is within board boundaries
-            if self.is_location_on_board(location, True):
-                # check if location contains a piece in board dictionary
-                if location in self._board_dictionary:
-                    # get piece at location, return game piece object
-                    piece = self._board_dictionary[location]
-                    return piece
-                else:
-                    # location is not found in board dictionary, no piece found, return None
-                    return None
-            else:
-                # location is not within board boundaries
-                return None
-
-    def is_location_on_board(self, location, indexNotation=False):
-        """
-        Returns True if location is within the boundary of the board [10 rows by 9 cols], otherwise False.
-        Location by default is assumed to be in algebraic Notation.
-        IndexNotation: parameter as True allows user to input index notation tuple instead (col, row)
-        """
-        # If location is given in index notation
-        if indexNotation:
-            # get the column and row values from the location
-            col, row = location
-            # check that the column and row values are within the board boundary
-            if 0 <= col <= 8 and 0 <= row <= 9:
-                # location is within the board, return True
-                return True
-            else:
-                # location is outside of the board, Return False
-                return False
-        else:
-            # Location is given in algebraic notation
-            try:
-                # Try to convert input from algebraic Notation into index notation (col, row)
-                location = ConvertAlgebraicNotation(location)
-                # get the column and row values from the location
-                col, row = location
-                # check that the column and row values are within the board boundary
-                if 0 <= col <= 8 and 0 <= row <= 9:
-                    # location is within the board, return True
-                    return True
-                else:
-                    # location is outside of the board, Return False
-                    return False
-                # if user input is not in correct algebraic notation, raises Exception, print message, return False
-            except AlgebraicNotationAlphabetError:
-                print("first value of algebraic notation must be an alphabetical value")
-                return False
-            except AlgebraicNotationDigitError:
-                print("second value of algebraic notation must be an integer value")
-                return False
-
-    def show_board(self):
-        """Displays Xiangqi current instant of the board arrangement onto the console"""
-        # print title of board and column values in algebraic notation
-        print("Xiangqi board")
-        print("     a    b    c    d    e    f    g    h    i")
-        # for each row, go through each element and give piece objects a label
-        for row in range(0, 10):
-            # Start each row with an empty row list
-            rowList = []
-            for col in range(0, 9):
-                # for each element in each row, set temp variable name to piece at location
-                position = (col, row)
-                if position in self._board_dictionary:
-                    # append the symbol associated with each piece class
-                    piece = self._board_dictionary[position]
-                    symbol = piece.get_pieceSymbol()
-                    rowList.append(symbol)
-                # For the locations that contain no piece, append a space to rowList
-                else:
-                    rowList.append(" ")
-            # print rowList to the console and move onto next row
-            if row < 9:
-                # to align board display for row 9 and below, add a space after row number
-                print(str(row + 1) + " ", rowList)
-            else:
-                print(str(row + 1), rowList)
-
-    def show_moves_on_board(self, targetLocation, indexNotation=False):
-        """
-        Displays current Xiangqi board arrangement and possible moves for piece at targetLocation,
-        defaulted to algebraic notation.
-        IndexNotation: parameter as True allows user to input index notation tuple instead (col, row)
-        """
-        # location is in algebraic notation
-        if not indexNotation:
-            # For locations not within the board boundaries, return without printing board
-            if not self.is_location_on_board(targetLocation):
-                return
-            else:
-                # convert algebraic notation to index notation
-                targetLocation = ConvertAlgebraicNotation(targetLocation)
-        # location is in index notation
-        else:
-            # For locations not within the board boundaries, return without printing board
-            if not self.is_location_on_board(targetLocation, True):
-                return
-
-        # check if target location contains a piece
-        if targetLocation not in self._board_dictionary:
-            # not piece found at location, print error message and return without printing board
-            print("no target at location")
-            return
-        # A piece was found at the location, display board and possible moves
-        # print title of board and column values in algebraic notation
-        print("Xiangqi board")
-        print("     a    b    c    d    e    f    g    h    i")
-        # get piece at target location and its allowed moves
-        targetGamePiece = self._board_dictionary[targetLocation]
-        targets_moves = targetGamePiece.allowed_move(self)
-        # initialize a list that will contain any pieces that could be captured
-        possible_captures = []
-        # for each row, go through each element and give piece objects a label
-        for row in range(0, 10):
-            # Start each row with an empty row list
-            rowList = []
-            for col in range(0, 9):
-                # for each element in each row, set temp variable name to piece at location
-                position = (col, row)
-                # if location contains a piece
-                if position in self._board_dictionary:
-                    # if the location is one of the target pieces allowed moves
-                    if position in targets_moves:
-                        # get the other piece at this allowed move
-                        other_piece = self._board_dictionary[position]
-                        # check if the piece is not the same team
-                        if targetGamePiece.get_player() != other_piece.get_player():
-                            # label a possible capture move with a 'X' symbol on board
-                            rowList.append("X")
-                            # add other piece to possible captures
-                            possible_captures.append(other_piece.get_pieceName())
-                        else:
-                            # the piece is the same team, get pieces normal symbol
-                            symbol = other_piece.get_pieceSymbol()
-                            # add symbol to rowList
-                            rowList.append(symbol)
-                    else:
-                        # position is not an allowed move, append the symbol associated with each piece class
-                        piece = self._board_dictionary[position]
-                        symbol = piece.get_pieceSymbol()
-                        rowList.append(symbol)
-                # For the locations that contain no piece, append a space to rowList
-                else:
-                    # if empty location is an allowed move for target, give it a '*' symbol
-                    if position in targets_moves:
-                        # add possible move symbol to rowList
-                        rowList.append("*")
-                    else:
-                        # location is empty and not an allowed move
-                        rowList.append(" ")
-            # print rowList to the console and move onto next row
-            if row < 9:
-                # to align board display for row 9 and below, add a space after row number
-                print(str(row + 1) + " ", rowList)
-            else:
-                print(str(row + 1), rowList)
-        # print to console the target piece color, name, and location
-        print(targetGamePiece.get_player(), targetGamePiece.get_pieceName(), targetGamePiece.get_location())
-        # print possible capture list to console.
-        print("Possible captures:", possible_captures)
-
-    def play_game(self, continual_play=False):
-        """
-        Displays one round played by player, displaying baord, taking in location for making a move,
-        and input options to see possible moves and exit method if continual play is set to True
-        continual_play: By default, only plays one round, but set to True activates while loop
-        """
-        while continual_play:
-            # print options instructions to console each round
-            print("Type HELP anytime to see pieces possible moves or exit")
-            # prints current player's turn
-            print(self.get_active_player(), "player's turn:")
-            # prints a prompt for the first from location in make a move method
-            curLocation = input("from: ")
-            # check if user instead input the string 'help'
-            if curLocation.upper() == 'HELP':
-                # for the help options, print exit instructions for play_game
-                print("Type EXIT to exit active game")
-                # else user is prompted to input the location they would like to display possible moves
-                piece_location = input("Else, enter location of piece to see moves:")
-                # check if user instead input the string 'exit'
-                if piece_location.upper() == 'EXIT':
-                    # set continual play to false, then bypass rest of code and jump out of while loop
-                    continual_play = False
-                    continue
-                else:
-                    # user input a target location to see possible moves, display moves
-                    self.show_moves_on_board(piece_location)
-                    # bypass rest of code, restart while loop
-                    continue
-            else:
-                # user has input the from location, prompt user to input to location
-                nexLocation = input("To: ")
-                # check if input here was the string 'help'
-                if nexLocation.upper() == 'HELP':
-                    # for the help options, print exit instructions for play_game
-                    print("Type EXIT to exit active game")
-                    # else user is prompted to input the location they would like to display possible moves
-                    piece_location = input("Else, enter location of piece to see moves:")
-                    # check if user instead input the string 'exit'
-                    if piece_location.upper() == 'EXIT':
-                        # set continual play to false, then bypass rest of code and jump out of while loop
-                        continual_play = False
-                        continue
-                    else:
-                        # user input a target location to see possible moves, display moves
-                        self.show_moves_on_board(piece_location)
-                        # bypass rest of code, restart while loop
-                        continue
-                else:
-                    # user input both from and to locations, execute make move method and show board
-                    self.make_move(curLocation, nexLocation)
-                    self.show_board()
-                    # print the current check status of the two players
-                    print("red checked:", self.is_in_check("red"))
-                    print("black checked:", self.is_in_check("black"))
-                    # print the current game state
-                    print(self.get_game_state())
-
-    def get_game_state(self):
-        """Returns the game state.  It should be either 'UNFINSHED', 'RED_WON', or 'BLACK_WON'"""
-        return self._game_state
-
-    def get_gamelog(self):
-        return self._game_log
-
-    def get_active_player(self):
-        """Returns the active player whose turn it is"""
-        return self._active_player
-
-    def get_other_player(self):
-        """Returns the other player of the game"""
-        return self._other_player
-
-    def get_players_general(self, player):
-        """Takes a player as 'red' or 'black' (not case-sensitive) and returns their General object"""
-        try:
-            # make user input not case-sensitive
-            player = player.upper()
-            # check that user entered a player name found in Xiangqi Game
-            if player == self._active_player or player == self._other_player:
-                # get that players general
-                return self._generals[player.upper()]
-
-        except InvalidPlayerError:
-            print("Invalid Player Parameter: player parameter must be 'red' or 'black', not case-sensitive")
-
-    def get_board_dictionary(self):
-        """Returns the XiangqiGame board dictionary"""
-        return self._board_dictionary
-
-
-class GamePiece:
-    """Represents a game piece in Xiangqi with name, player, symbol, location, and capture status"""
-
-    def __init__(self, player, pieceName, symbol, location):
-        """Initialize player and location to none until assigned"""
-        self._pieceName = pieceName
-        self._player = player
-        self._symbol = symbol
-        self._location = location
-        self._captured = False
-
-    def get_pieceSymbol(self):
-        """Returns the symbol given to the GamePiece"""
-        return self._symbol
-
-    def get_pieceName(self):
-        """Returns the name of the GamePiece"""
-        return self._pieceName
-
-    def get_location(self):
-        """Returns the location of the Gamepiece"""
-        return self._location
-
-    def set_location(self, location):
-        """Sets location of GamePiece"""
-        self._location = location
-
-    def captured(self):
-        """Game Piece has been captured, reset location to None and set captured status as True"""
-        self._location = None
-        self._captured = True
-
-    def is_captured(self):
-        """Return True if piece is captured, otherwise False."""
-        return self._captured
-
-    def get_player(self):
-        """Get player who owns the piece"""
-        return self._player
-
-    def set_player(self, player):
-        """Set the player who will own the piece"""
-        self._player = player
-
-
-class General(GamePiece):
-    """Represents General in Xiangqi, subclass of GamePiece"""
-
-    def __init__(self, player, location):
-        """Initialize General as GamePiece with player, name, symbol, and location"""
-        super().__init__(player, "general", "G", location)
-
-    def allowed_move(self, GameInstance):
-        """
-        Takes in a XiangqiGame Instance and returns the index notation of the General's available moves.
-        Includes move validation of board boundary and handles board piece collisions
-        Parameter: XiangqiGame class instance
-        Returns: List of location tuples (col, row) of General's allowed moves
-        """
-        # get the column and row values from General's location
-        col, row = self._location
-        # Initialize all the possible move increments the general can make
-        moves = [[0, 1], [1, 0], [0, -1], [-1, 0]]
-        # Create list of possible moves tuples by adding the current location and move increments together
-        possible_moves = [(move[0] + col, move[1] + row) for move in moves]
-        # Initialize a list that will store the allowed moves after validating on board
-        allowed_moves = []
-        # Check if General can perform 'flying general' move
-        if self.flying_general(GameInstance):
-            # General can perform "flying general', which player is using the general
-            if self.get_player() == "RED":
-                # get the other general owned by the other player
-                other_general = GameInstance.get_players_general("BLACK")
-            else:
-                # get the other general owned b the other player
-                other_general = GameInstance.get_players_general("RED")
-            # add the location of the other general to the list of allowed moves
-            allowed_moves.append(other_general.get_location())
-        # look through each move in possible moves
-        for move in possible_moves:
-            # check that move is in the palace
-            if self.in_palace(move):
-                # check if move contains another piece
-                if move in GameInstance.get_board_dictionary():
-                    # get piece from the move location
-                    other_piece = GameInstance.piece_at_location(move, True)
-                    # check if piece is not on the same team
-                    if other_piece.get_player() != self.get_player():
-                        # add the location to the allowed moves list
-                        allowed_moves.append(move)
-                    else:
-                        # move is same team, continue to next move
-                        continue
-                else:
-                    # move is empty, add move to allowed moves
-                    allowed_moves.append(move)
-            else:
-                # move is not an allowed possible move or move is outside of palace
-                continue
-        # after looking at all moves, return the list of allowed moves as (col, row) values
-        return allowed_moves
-
-    def in_palace(self, location):
-        """
-        Takes in a location in index notation.
-        Returns True if location is in the player's palace, otherwise False
-        Restriction: does not handle algebraic notation
-        """
-        # get the column and row values of the location
-        col, row = location
-        # check if column is within the palace
-        if 3 <= col <= 5:
-            # check if player is red and row is within the red palace
-            if self._player == "RED" and 0 <= row <= 2:
-                # piece is in their palace
-                return True
-            # check if player is black and row is within the black palace
-            elif self._player == "BLACK" and 7 <= row <= 9:
-                # piece is in their palace
-                return True
-            else:
-                # if not within the palace or not that player's palace
-                return False
-        else:
-            # piece is not in palace
-            return False
-
-    def flying_general(self, GameInstance):
-        """
-        Takes in a XiangqiGame object instance, returns True if general can capture other general, otherwise False.
-        """
-        # check if General is owned by red player
-        if self.get_player() == "RED":
-            # gets black player's general
-            other_general = GameInstance.get_players_general("BLACK")
-        # Assumes General is owned by black player
-        else:
-            # gets red player's general
-            other_general = GameInstance.get_players_general("RED")
-        # get the column and row value of both of the generals
-        checkCol, checkRow = other_general.get_location()
-        curCol, curRow = self.get_location()
-        # Checks which direction the check is being done by, in this case going from red side to black
-        if curRow < checkRow:
-            # initializes path variables for path from red general
-            direction = 1
-            start = curRow + direction
-            end = checkRow + direction
-        # check which direction the check is being done by, in this case going from black side to red
-        else:
-            # initializes path variables for path from black general
-            direction = -1
-            start = curRow + direction
-            end = checkRow + direction
-        # look along the path of the general to the other general
-        for path in range(start, end, direction):
-            # set a location along the path towards the other general as a tuple
-            location = (curCol, path)
-            # check if there is a piece between generals on the path
-            if location in GameInstance.get_board_dictionary():
-                # check if the location that contains a piece is the location of the other general
-                if location != other_general.get_location():
-                    # location is not the other general, path is blocked, return False
-                    return False
-                else:
-                    # location is the other general, path is clear, return True
-                    return True
-            else:
-                # location is empty, continue along path
-                continue
-
-
-class Advisor(GamePiece):
-    """Represents Advisor in Xiangqi, subclass of GamePiece"""
-
-    def __init__(self, player, location):
-        """Initialize Advisor as GamePiece with player, name, symbol, and location"""
-        super().__init__(player, "advisor", "A", location)
-
-    def allowed_move(self, GameInstance):
-        """
-        Takes in a XiangqiGame Instance and returns the index notation of the Advisor's available moves.
-        Includes move validation of board boundary and handles board piece collisions
-        Parameter: XiangqiGame class instance
-        Returns: List of location tuples (col, row) of Advisor's allowed moves
-        """
-        # get the column and row values from advisor's location
-        col, row = self._location
-        # Initialize all the possible move increments the advisor can make
-        moves = [[1, 1], [-1, 1], [-1, -1], [1, -1]]
-        # Create list of possible moves tuples by adding the current location and move increments together
-        possible_moves = [(move[0] + col, move[1] + row) for move in moves]
-        # Initialize a list that will store the allowed moves after validating on board
-        allowed_moves = []
-        # look through each move in possible moves
-        for move in possible_moves:
-            # check that move is in the palace
-            if self.in_palace(move):
-                # check if move contains another piece
-                if move in GameInstance.get_board_dictionary():
-                    # get the piece at the move location
-                    other_piece = GameInstance.piece_at_location(move, True)
-                    # check if piece is not on the same team
-                    if other_piece.get_player() != self.get_player():
-                        # add the location to the allowed moves list
-                        allowed_moves.append(move)
-                    else:
-                        # move is same team, continue to next move
-                        continue
-                else:
-                    # move is empty, add move to allowed moves
-                    allowed_moves.append(move)
-            else:
-                # move is not an allowed possible move or move is outside of palace
-                continue
-        # after looking at all moves, return the list of allowed moves as (col, row) values
-        return allowed_moves
-
-    def in_palace(self, location):
-        """
-        Takes in a location in index notation.
-        Returns True if location is in the player's palace, otherwise False
-        Restriction: does not handle algebraic notation
-        """
-        # get the column and row values of the location
-        col, row = location
-        # check if column is within the palace
-        if 3 <= col <= 5:
-            # check if player is red and row is within the red palace
-            if self._player == "RED" and 0 <= row <= 2:
-                # piece is in their palace
-                return True
-            # check if player is black and row is within the black palace
-            elif self._player == "BLACK" and 7 <= row <= 9:
-                # piece is in their palace
-                return True
-            else:
-                # if not within the palace or not that player's palace
-                return False
-        else:
-            # piece is not in palace
-            return False
-
-
-class Elephant(GamePiece):
-    """Represents Elephant in Xiangqi, subclass of GamePiece"""
-
-    def __init__(self, player, location):
-        """Initialize Elephant as GamePiece with player, name, symbol, and location"""
-        super().__init__(player, "elephant", "E", location)
-
-    def allowed_move(self, GameInstance):
-        """
-        Takes in a XiangqiGame Instance and returns the index notation of the Elephant's available moves.
-        Includes move validation of board boundary and handles board piece collisions
-        Parameter: XiangqiGame class instance
-        Returns: List of location tuples (col, row) of Elephant's allowed moves
-        """
-        # get the column and row values from elephant's location
-        col, row = self._location
-        # Initialize all the possible move increments the elephant can make
-        moves = [[2, 2], [2, -2], [-2, -2], [-2, 2]]
-        # Initialize all blocker directions increments
-        directions = [[1, 1], [1, -1], [-1, -1], [-1, 1]]
-        # Create list of possible moves tuples by adding the current location and move increments together
-        possible_moves = [(move[0] + col, move[1] + row) for move in moves]
-        # Create list of blocker location tuples by adding the current location and direction increments together
-        blocker_locations = [(direction[0] + col, direction[1] + row) for direction in directions]
-        # Initialize a list that will store the allowed moves after validating on board
-        allowed_moves = []
-        # look through each direction that the elephant can move and check if blocked
-        for direction in range(4):
-            # get move in that direction
-            move = possible_moves[direction]
-            # check if direction is not blocked by a piece at location in that direction
-            if blocker_locations[direction] not in GameInstance.get_board_dictionary():
-                # check if move contains another piece
-                if GameInstance.is_location_on_board(move, True):
-                    # check if the location contains a piece
-                    if move in GameInstance.get_board_dictionary():
-                        # get the piece at the move location
-                        other_piece = GameInstance.piece_at_location(move, True)
-                        # check if piece is not on the same team
-                        if other_piece.get_player() != self.get_player():
-                            # add the location to the allowed moves list
-                            allowed_moves.append(possible_moves[direction])
-                        else:
-                            # location is the same team, continue to next move
-                            continue
-                    else:
-                        # move is empty, add to allowed moves
-                        allowed_moves.append(possible_moves[direction])
-                else:
-                    # move not within boundary, continue
-                    continue
-
-            else:
-                # direction is blocked, continue to next move
-                continue
-        # after looking at all moves, return the list of allowed moves as (col, row) values
-        return allowed_moves
-
-
-class Horse(GamePiece):
-    """Represents Horse in Xiangqi, subclass of GamePiece"""
-
-    def __init__(self, player, location):
-        """Initialize Horse as GamePiece with player, name, symbol, and location"""
-        super().__init__(player, "horse", "H", location)
-
-    def allowed_move(self, GameInstance):
-        """
-        Takes in a XiangqiGame Instance and returns the index notation of the Horse's available moves.
-        Includes move validation of board boundary and handles board piece collisions
-        Parameter: XiangqiGame class instance
-        Returns: List of location tuples (col, row) of Horse's allowed moves
-        """
-        # get the column and row values from horse's location
-        col, row = self._location
-        # Initialize all the possible move increments the horse can make
-        moves = [[-1, 2], [1, 2], [2, 1], [2, -1], [1, -2], [-1, -2], [-2, -1], [-2, 1]]
-        # Initialize all blocker directions increments
-        directions = [[0, 1], [1, 0], [0, -1], [-1, 0]]
-        # Create list of possible moves tuples by adding the current location and move increments together
-        possible_moves = [(move[0] + col, move[1] + row) for move in moves]
-        # Create list of blocker location tuples by adding the current location and direction increments together
-        blocker_locations = [(direction[0] + col, direction[1] + row) for direction in directions]
-        # Initialize a list that will store the allowed moves after validating on board
-        allowed_moves = []
-        # look through each direction that the horse can move and check if blocked
-        for direction in range(4):
-            # get the two moves in that direction that the horse can make
-            moves_in_direction = possible_moves[:2]
-            # check if direction is not blocked by a piece at location in that direction
-            if blocker_locations[direction] not in GameInstance.get_board_dictionary():
-                # For each move in that direction, check if move contains a piece
-                for move in moves_in_direction:
-                    # check if move on the board
-                    if GameInstance.is_location_on_board(move, True):
-                        # check if the location contains a piece
-                        if move in GameInstance.get_board_dictionary():
-                            # get the piece at the move location
-                            other_piece = GameInstance.piece_at_location(move, True)
-                            # check if piece is not on the same team
-                            if other_piece.get_player() != self.get_player():
-                                # add the location to the allowed moves list
-                                allowed_moves.append(move)
-                            else:
-                                # piece is same team, continue to next move
-                                continue
-                        else:
-                            # move is empty, add to allowed moves
-                            allowed_moves.append(move)
-                    else:
-                        # move not within board boundary
-                        continue
-                    # Once the move in a direction have been checked, remove them from the possible moves
-                    possible_moves = possible_moves[2:]
-            else:
-                # Moves are blocked in direction, remove them from the possible moves
-                possible_moves = possible_moves[2:]
-        # after looking at all moves, return the list of allowed moves as (col, row) values
-        return allowed_moves
-
-
-class Chariot(GamePiece):
-    """Represents Chariot in Xiangqi, subclass of GamePiece"""
-
-    def __init__(self, player, location):
-        """Initialize Chariot as GamePiece with player, name, symbol, and location"""
-        super().__init__(player, "chariot", "C", location)
-
-    def allowed_move(self, GameInstance):
-        """
-        Takes in a XiangqiGame Instance and returns the index notation of the Chariot's available moves.
-        Includes move validation of board boundary and handles board piece collisions
-        Parameter: XiangqiGame class instance
-        Returns: List of location tuples (col, row) of Chariot's allowed moves
-        """
-        # get the column and row values from chariot's location
-        col, row = self._location
-        # Initialize all the possible move increments the chariot can make
-        moves = [[0, 1], [1, 0], [0, -1], [-1, 0]]
-        # Create list of possible moves tuples by adding the current location and move increments together
-        possible_moves = [(move[0] + col, move[1] + row) for move in moves]
-        # Initialize a list that will store the allowed moves after validating on board
-        allowed_moves = []
-        # look through each direction that the chariot can move
-        for direction in range(4):
-            # get move and the next move increment in that direction
-            move = possible_moves[direction]
-            motion_vector = moves[direction]
-            # Initialize continue moving variable for checking moves in a given direction
-            continue_moving = True
-            # For a given direction, check if move is allowed
-            # increment to next location in that direction until Chariot has a collision
-            while continue_moving:
-                # check if location is within the boundary of the board
-                if GameInstance.is_location_on_board(move, True):
-                    # check if the location contains a piece
-                    if move in GameInstance.get_board_dictionary():
-                        # get piece at that location
-                        other_piece = GameInstance.piece_at_location(move, True)
-                        # check if piece is not on the same team
-                        if other_piece.get_player() != self.get_player():
-                            # include opponents location to allowed moves list
-                            allowed_moves.append(move)
-                            # Chariot can't go any further, set continue moving to False
-                            continue_moving = False
-                        else:
-                            # The piece is the same team, Chariot can't go any further, set continue moving to False
-                            continue_moving = False
-                    else:
-                        # location is empty, add location to allowed moves
-                        allowed_moves.append(move)
-                        # update move to next location in that direction by using the increment move
-                        curCol, curRow = move
-                        move = (curCol + motion_vector[0], curRow + motion_vector[1])
-                else:
-                    # The move has reach the end of the board, Chariot can't go further, set continue mocing to False
-                    continue_moving = False
-        # after looking at all moves, return the list of allowed moves as (col, row) values
-        return allowed_moves
-
-
-class Cannon(GamePiece):
-    """Represents Cannon in Xiangqi, subclass of GamePiece"""
-
-    def __init__(self, player, location):
-        """Initialize Cannon as GamePiece with player, name, symbol, and location"""
-        super().__init__(player, "cannon", "O", location)
-
-    def allowed_move(self, GameInstance):
-        """
-        Takes in a XiangqiGame Instance and returns the index notation of the Cannon's available moves.
-        Includes move validation of board boundary and handles board piece collisions
-        Parameter: XiangqiGame class instance
-        Returns: List of location tuples (col, row) of Cannon's allowed moves
-        """
-        # get the column and row values from cannon's location
-        col, row = self._location
-        # Initialize all the possible move increments the cannon can make
-        moves = [[0, 1], [1, 0], [0, -1], [-1, 0]]
-        # Create list of possible moves tuples by adding the current location and move increments together
-        possible_moves = [(move[0] + col, move[1] + row) for move in moves]
-        # Initialize a list that will store the allowed moves after validating on board
-        allowed_moves = []
-        # look through each direction that the cannon can move
-        for direction in range(4):
-            # get move and the next move increment in that direction
-            move = possible_moves[direction]
-            motion_vector = moves[direction]
-            # Initialize continue moving variable for checking moves in a given direction
-            continue_moving = True
-            # Initialize the jump variable for setting state of capturing
-            has_jumped = False
-            # For a given direction, check if move is allowed
-            # increment to next location in that direction until cannon has a collision, then find capture, if any
-            while continue_moving:
-                # check if location is within the boundary of the board
-                if GameInstance.is_location_on_board(move, True):
-                    # check if cannon has jumped over another piece yet
-                    if has_jumped:
-                        # check if the location contains a piece
-                        if move in GameInstance.get_board_dictionary():
-                            # get piece at that location
-                            other_piece = GameInstance.piece_at_location(move, True)
-                            # check if piece is not on the same team
-                            if self.get_player() != other_piece.get_player():
-                                # include opponents location to allowed moves list
-                                allowed_moves.append(move)
-                                # Cannon can't go any further, set continue moving to False
-                                continue_moving = False
-                            else:
-                                # The piece is the same team, Cannon can't go any further, set continue moving to False
-                                continue_moving = False
-                        else:
-                            # increment move, continue to look if the cannon has a capture location
-                            move = (move[0] + motion_vector[0], move[1] + motion_vector[1])
-                    else:
-                        # Cannon has not jumped, check if move contains a piece
-                        if move in GameInstance.get_board_dictionary():
-                            # piece to jump off, set to True
-                            has_jumped = True
-                            # increment move, continue now to look if the cannon has capture location
-                            move = (move[0] + motion_vector[0], move[1] + motion_vector[1])
-                        else:
-                            # the space is empty, add to allowed moves
-                            allowed_moves.append(move)
-                            # increment move in that direction
-                            move = (move[0] + motion_vector[0], move[1] + motion_vector[1])
-                else:
-                    # cannon has reached end of board, set continue moving to False
-                    continue_moving = False
-        # after looking at all moves, return the list of allowed moves as (col, row) values
-        return allowed_moves
-
-
-class Soldier(GamePiece):
-    """Represents Soldier in Xiangqi, subclass of GamePiece"""
-
-    def __init__(self, player, location):
-        """Initialize Soldier as GamePiece with player, name, symbol, and location"""
-        super().__init__(player, "soldier", "S", location)
-
-    def allowed_move(self, GameInstance):
-        """
-        Takes in a XiangqiGame Instance and returns the index notation of the Soldier's available moves.
-        Includes move validation of board boundary and handles board piece collisions
-        Parameter: XiangqiGame class instance
-        Returns: List of location tuples (col, row) of Soldier's allowed moves
-        """
-        # get the column and row values from Soldier's location
-        curCol, curRow = self.get_location()
-        # Initialize all the possible move increments the soldier can make
-        moves = [[0, 1], [1, 0], [-1, 0], [0, -1]]
-        # Initialize a list that will store the allowed moves after validating on board
-        allowed_moves = []
-        # check who owns the piece
-        if self.get_player() == "RED":
-            # if soldier has passed the river, give more moves
-            if curRow > 4:
-                moves = moves[:3]
-            else:
-                # else soldier can only move in one direction
-                moves = [moves[0]]
-        if self.get_player() == "BLACK":
-            # if soldier has passed the river, give move moves
-            if curRow < 5:
-                moves = moves[1:]
-            else:
-                # else soldier can only moves in one direction
-                moves = [moves[3]]
-        # Create list of possible moves tuples by adding the current location and move increments together
-        possible_moves = [(move[0] + curCol, move[1] + curRow) for move in moves]
-        # look through each move to see if allowed
-        for move in possible_moves:
-            # check if move is on the board
-            if GameInstance.is_location_on_board(move, True):
-                # check if move contains another piece
-                if move in GameInstance.get_board_dictionary():
-                    # get piece at location
-                    other_piece = GameInstance.piece_at_location(move, True)
-                    # check that other piece is not on the same team
-                    if self.get_player() != other_piece.get_player():
-                        # add move to allowed moves
-                        allowed_moves.append(move)
-                    else:
-                        # other piece is on same team, go to next move
-                        continue
-                else:
-                    # location is empty, add to allowed moves
-                    allowed_moves.append(move)
-            else:
-                # lcoation is not within the board boudaries, go to next move
-                continue
-        return allowed_moves
-
-
-def ConvertAlgebraicNotation(location):
-    """
-    Takes simple algebraic notation (letter/number string only) and Returns column and row index values as a tuple.
-    Algebraic Notation example: 'a1' would return (0, 0)"
-    """
-    # verify input is converted into string
-    location = str(location)
-    # Set first value as variable storing alphabet coordinate
-    letter_coord = location[0]
-    # Set rest of values as variable storing number corrdinate
-    number_coord = location[1:]
-    # check that the letter coordinate is indeed a letter
-    if letter_coord.isalpha():
-        # convert letter coordinate to column index representation, starting with 'a' = 0, 'b' = 1, ect
-        alphabet = "abcdefghijklmnopqrstuvwxyz"
-        column = alphabet.index(letter_coord.lower())
-    else:
-        raise AlgebraicNotationAlphabetError
-    # check that the number coordinate only contains digits
-    if location[1:].isdigit():
-        # convert number coordinate to row index representation, starting with "1" = 0, "2" = 1, ect.
-        row = int(number_coord) - 1
-    else:
-        raise AlgebraicNotationDigitError
-    # Return algebraic notation values as a tuple: (column, row)
-    return column, row
-
-
-class AlgebraicNotationAlphabetError(Exception):
-    """Raised when first value of algebraic notation for a location is not a alphabet letter"""
-    pass
-
-
-class AlgebraicNotationDigitError(Exception):
-    """Raised when number value of algebraic notation for a location is not only digit values"""
-    pass
-
-
-class InvalidPlayerError(Exception):
-    """Raised when player parameter is incorrect, must be 'red' or 'black'"""
-    pass
-
-
-def main():
-    """Testing functionality"""
-    game = XiangqiGame()
-    #try:
-    #    import tkinter as tk
-    #    print("Tkinker import success")
-    #    window = tk.Tk()
-    #    window.title("Xiangqi")
-    #    window.geometry("400x300")
-    #    window.start = tk.Button()
-    #    window.start["text"] = "PLAY GAME"
-    #    window.start.pack(side="bottom")
-
-    #    window.mainloop()
-
-    #except ImportError:
-    #    print("tkinter import failed")
-    # print("Default to Terminal Interface...")
-    game.show_board()
-    print("Type PLAY to begin Xiangqi Game")
-    make_play = input()
-    # not typing play bypasses play option, goes to test code instead
-    if make_play.upper() == 'PLAY':
-        game.play_game(True)
-
-
-    # insert other testing code here
-
-    # Designer's temporary test code:
-    # removed soldiers temporarily to test in check method
-    # game.make_move("d1", "e2")
-    # game.make_move("a10", "a9")
-    # game.make_move("a1", "a2")
-    # game.make_move("a9", "e9")
-    # game.make_move("a2", "a3")
-    # game.make_move("e9", "e2")
-    # says red general is not allowed to move (0, 3)
-    # game.make_move("e1", "d1") # make_move also shows location updated before is_in_check when print() inserted
-    # print(game.is_in_check("red"))
-    # print(game.get_board_dictionary()) # general location is correct in dictionary
-    # # says move is not in allowed moves of general, check general attributes
-    # general = game.piece_at_location("e1") # match dictionary location
-    # print(general.get_location()) # general location matches game board dictionary
-    # same_general = game.get_players_general("red") # check program is referring to same object
-    # print(general is same_general) # same general object referred to within in_check method
-    # print(general.allowed_move(game))  # check allowed moves of general
-    # # location "d1" aka (3, 0) is in allowed moves
-    # # Note: When make_move happens, it updated board to new location before checking is_in_check,
-    # #       if is_in_check with updated is true, method resets locations to original locations.
-    # #       General is already at "d1" when checking for "in-check", so should not be returning True.
-    # #       Check 'is_in_check' method.
-    # general.set_location((3, 0))
-    # boardPieces = game.get_board_dictionary()
-    # boardPieces[(3, 0)] = general
-    # del boardPieces[(4, 0)]
-    # print(boardPieces)
-    # game.show_board()
-    # # insert print(piece) in is_in_check just before returning True, to get the piece checking the general
-    # game.make_move("a3", "a4")
-    # # checking piece: <__main__.General object at 0x033329B0> "memory address matches black general"
-    # # check black generals allowed moves
-    # blk_general = boardPieces[(4, 9)]
-    # print(blk_general.allowed_move(game)) # FIXED: is_in_check did not check if move of piece contained same team
-    # game.show_board()
-
-    # remove all black pieces except general, test is_in_check_mate
-    # game.make_move("b3", "e3")
-    # print(game.is_in_check_mate("black"))
-    # game.make_move("e10", "d10")
-    # print(game.is_in_check_mate("black"))
-    # game.make_move("a1", "a2")
-    # print(game.is_in_check_mate("black"))
-    # game.make_move("d10", "d9")
-    # print(game.is_in_check_mate("black"))
-    # game.make_move("a2", "d2")
-    # print(game.is_in_check_mate("black"))
-    # game.make_move("d9", "e9") # FIXED: Seems to work!
-    
-
-
-if __name__ == "__main__":
-    main()
+# Project: CS 162 Portfolio Project
+# Author: Christopher Eckerson
+# Date: 3/12/2020
+# Description: This script is a Xiangqi Game, with supporting classes and functions.
+#              It includes the main class, XiangqiGame, that manages and initializes the game,
+#              starting with red player.  There is a super class of GamePiece, and additional
+#              sub-classes game piece classes, represent their unique rules for moving.
+#              The XiangqiGame class manages the board progress using a flat 90 square board array,
+#              where each square holds a small integer piece code (piece type plus a side bit), and
+#              empty squares hold zero.  Square indexes run row by row, square = row * 9 + col.
+#              The board dictionary of GamePiece objects is now only a compatibility view built
+#              from the board array on request, for the tkinter interface and the CLI display.
+#              Locations within the program are stored as tuples of index notation, representing
+#              the horizontal and vertical (col, row) positions, starting from the red sides
+#              left corner if the board were arranged (as seen from above the board) with the
+#              red player as the top and black as the bottom.  Users by default are assumed to use
+#              algebraic notation, but have the option with board methods to also use index notation.
+
+#              The main function provides an interactive way to play the game or to test functionality
+#              of the program.  This script introduces two exceptions class for handling algebraic
+#              notation errors and a class for player name input errors.  The main function 'PLAY' option
+#              is supported by some of the display methods found in the XiangqiGame class.
+import time
+import random
+from array import array
+from enum import Enum
+
+# Piece type codes stored in the board array, black pieces also carry the BLACK_BIT
+EMPTY = 0
+GENERAL = 1
+ADVISOR = 2
+ELEPHANT = 3
+HORSE = 4
+CHARIOT = 5
+CANNON = 6
+SOLDIER = 7
+# mask that strips the side bit from a piece code, leaving the piece type
+TYPE_MASK = 7
+# side bit of a piece code, a piece code shifted right by 3 gives its side
+BLACK_BIT = 8
+# side values used by the board array, index into PLAYERS for the player name
+RED = 0
+BLACK = 1
+PLAYERS = ("RED", "BLACK")
+SIDES = {"RED": RED, "BLACK": BLACK}
+# board dimensions, squares are numbered row by row starting at the red side's left corner
+BOARD_COLS = 9
+BOARD_ROWS = 10
+BOARD_SQUARES = BOARD_COLS * BOARD_ROWS
+# index notation tuple (col, row) of every square, used to convert square indexes back to locations
+SQUARE_LOCATIONS = tuple((square % BOARD_COLS, square // BOARD_COLS) for square in range(BOARD_SQUARES))
+# names and board display symbols of each piece type
+PIECE_NAMES = {GENERAL: "general", ADVISOR: "advisor", ELEPHANT: "elephant", HORSE: "horse",
+               CHARIOT: "chariot", CANNON: "cannon", SOLDIER: "soldier"}
+PIECE_SYMBOLS = {GENERAL: "G", ADVISOR: "A", ELEPHANT: "E", HORSE: "H", CHARIOT: "C", CANNON: "O", SOLDIER: "S"}
+
+
+def square_index(col, row):
+    """Takes index notation column and row values and returns the board array square index"""
+    return row * BOARD_COLS + col
+
+
+def square_algebraic(square):
+    """Takes a board array square index and returns its algebraic notation, square 0 is 'a1'"""
+    col, row = SQUARE_LOCATIONS[square]
+    return "abcdefghi"[col] + str(row + 1)
+
+
+def on_board(col, row):
+    """Returns True if the column and row values are within the 9 column by 10 row board, otherwise False"""
+    return 0 <= col < BOARD_COLS and 0 <= row < BOARD_ROWS
+
+
+def in_palace(col, row, side):
+    """Returns True if the column and row values are within the palace of side (RED or BLACK), otherwise False"""
+    if 3 <= col <= 5:
+        # red palace is rows 0 to 2, black palace is rows 7 to 9
+        if side == RED:
+            return 0 <= row <= 2
+        return 7 <= row <= 9
+    return False
+
+
+def _build_step_table(side, steps, allowed):
+    """
+    Builds one move table entry per square for a stepping piece of side.
+    steps: (col, row) increments the piece steps by, allowed: function(col, row, side) deciding if a target is reachable
+    Returns a tuple, indexed by square, of tuples of target squares
+    """
+    table = []
+    for col, row in SQUARE_LOCATIONS:
+        table.append(tuple(square_index(col + step_col, row + step_row) for step_col, step_row in steps
+                           if allowed(col + step_col, row + step_row, side)))
+    return tuple(table)
+
+
+def _build_blocked_table(side, steps, allowed):
+    """
+    Builds one move table entry per square for a piece that can be blocked (horse leg or elephant eye).
+    steps: ((col, row) target increment, (col, row) blocker increment) pairs
+    Returns a tuple, indexed by square, of tuples of (target square, blocking square) pairs
+    """
+    table = []
+    for col, row in SQUARE_LOCATIONS:
+        entry = []
+        for (step_col, step_row), (block_col, block_row) in steps:
+            if allowed(col + step_col, row + step_row, side):
+                entry.append((square_index(col + step_col, row + step_row),
+                              square_index(col + block_col, row + block_row)))
+        table.append(tuple(entry))
+    return tuple(table)
+
+
+def _on_own_half(col, row, side):
+    """Returns True if the location is on the board and on side's half of the river, otherwise False"""
+    return on_board(col, row) and (row <= 4 if side == RED else row >= 5)
+
+
+def _soldier_steps(side):
+    """Returns the soldier move table for side, forward only, and also sideways once across the river"""
+    forward = 1 if side == RED else -1
+    table = []
+    for col, row in SQUARE_LOCATIONS:
+        steps = [(0, forward)]
+        if not _on_own_half(col, row, side):
+            steps += [(1, 0), (-1, 0)]
+        table.append(tuple(square_index(col + step_col, row + step_row) for step_col, step_row in steps
+                           if on_board(col + step_col, row + step_row)))
+    return tuple(table)
+
+
+# Precomputed move tables, built once at import so move generation walks tuples of squares instead of
+# building offset lists and checking the board boundary, palace and river on every call.
+# Tables indexed [side][square] depend on the side, HORSE_MOVES is indexed [square] only.
+ORTHOGONAL_STEPS = ((0, 1), (1, 0), (0, -1), (-1, 0))
+DIAGONAL_STEPS = ((1, 1), (-1, 1), (-1, -1), (1, -1))
+GENERAL_MOVES = tuple(_build_step_table(side, ORTHOGONAL_STEPS, in_palace) for side in (RED, BLACK))
+ADVISOR_MOVES = tuple(_build_step_table(side, DIAGONAL_STEPS, in_palace) for side in (RED, BLACK))
+# elephant moves pair each target with its 'elephant eye', the point between the elephant and target
+ELEPHANT_MOVES = tuple(_build_blocked_table(side, [((2 * step_col, 2 * step_row), (step_col, step_row))
+                                                   for step_col, step_row in DIAGONAL_STEPS], _on_own_half)
+                       for side in (RED, BLACK))
+# horse moves pair each target with its 'horse leg', the orthogonal point next to the horse
+HORSE_MOVES = _build_blocked_table(RED, [((-1, 2), (0, 1)), ((1, 2), (0, 1)), ((2, 1), (1, 0)), ((2, -1), (1, 0)),
+                                         ((1, -2), (0, -1)), ((-1, -2), (0, -1)), ((-2, -1), (-1, 0)),
+                                         ((-2, 1), (-1, 0))], lambda col, row, side: on_board(col, row))
+SOLDIER_MOVES = tuple(_soldier_steps(side) for side in (RED, BLACK))
+# indexed [side][piece code], True where a piece of side may land on a square holding that piece code
+CAN_LAND = tuple(bytes(code == EMPTY or code >> 3 != side for code in range(16)) for side in (RED, BLACK))
+
+
+def _build_line_table(length):
+    """
+    Builds the sliding move table for a line (rank or file) of length points.
+    The table is indexed by position << length | occupancy mask, where bit n of the mask is set if point n
+    of the line holds a piece.  Each entry is a tuple of three tuples of line positions:
+    (empty points slid to before the first piece, first piece hit in each direction, piece behind the cannon screen)
+    """
+    table = []
+    # share identical entries, most occupancy masks give the same few results for a position
+    shared = {}
+    for position in range(length):
+        for mask in range(1 << length):
+            slides = []
+            hits = []
+            screens = []
+            # look along the line in both directions from the position
+            for step in (1, -1):
+                point = position + step
+                while 0 <= point < length and not mask >> point & 1:
+                    slides.append(point)
+                    point += step
+                if 0 <= point < length:
+                    # first piece found, chariot captures here and cannon uses it as a screen
+                    hits.append(point)
+                    point += step
+                    while 0 <= point < length and not mask >> point & 1:
+                        point += step
+                    if 0 <= point < length:
+                        screens.append(point)
+            entry = (tuple(slides), tuple(hits), tuple(screens))
+            table.append(shared.setdefault(entry, entry))
+    return tuple(table)
+
+
+# Sliding move tables for chariots and cannons.  Ranks are 9 points wide and indexed by column,
+# files are 10 points long and indexed by row, see _build_line_table
+RANK_LINES = _build_line_table(BOARD_COLS)
+FILE_LINES = _build_line_table(BOARD_ROWS)
+# bit of each square in its rank occupancy mask and in its file occupancy mask
+RANK_BITS = tuple(1 << col for col, row in SQUARE_LOCATIONS)
+FILE_BITS = tuple(1 << row for col, row in SQUARE_LOCATIONS)
+
+
+def _invert_table(table):
+    """
+    Takes a move table indexed by the square a piece stands on and returns the attack table indexed by target square.
+    Entries of the attack table list the squares a piece could attack the target from, keeping any blocking square
+    paired with the origin, so (target, blocker) entries become (origin, blocker) entries.
+    """
+    attacks = [[] for square in range(BOARD_SQUARES)]
+    for origin, entry in enumerate(table):
+        for move in entry:
+            if isinstance(move, tuple):
+                attacks[move[0]].append((origin, move[1]))
+            else:
+                attacks[move].append(origin)
+    return tuple(tuple(attackers) for attackers in attacks)
+
+
+# Attack tables used to look outward from a target square for the pieces that attack it
+HORSE_ATTACKS = _invert_table(HORSE_MOVES)
+ELEPHANT_ATTACKS = tuple(_invert_table(ELEPHANT_MOVES[side]) for side in (RED, BLACK))
+ADVISOR_ATTACKS = tuple(_invert_table(ADVISOR_MOVES[side]) for side in (RED, BLACK))
+GENERAL_ATTACKS = tuple(_invert_table(GENERAL_MOVES[side]) for side in (RED, BLACK))
+SOLDIER_ATTACKS = tuple(_invert_table(SOLDIER_MOVES[side]) for side in (RED, BLACK))
+# horse legs that can block a horse attack on each square, these are the square's diagonal neighbours
+HORSE_BLOCKERS = tuple(frozenset(leg for origin, leg in HORSE_ATTACKS[square]) for square in range(BOARD_SQUARES))
+
+# Position status values, see XiangqiGame.get_position_status
+NORMAL = "NORMAL"
+CHECK = "CHECK"
+CHECKMATE = "CHECKMATE"
+STALEMATE = "STALEMATE"
+# number of position statuses a game keeps before its status cache is cleared
+STATUS_CACHE_SIZE = 1024
+
+# Zobrist hashing keys, 64 random bits for each piece code on each square plus one for black to move.
+# A fixed seed keeps position hashes the same between runs, so they can be stored (opening books, archives).
+# The EMPTY piece code row is all zeros so an empty capture square leaves the hash unchanged.
+_zobrist_random = random.Random(0x58514731)
+ZOBRIST_PIECES = tuple(tuple(_zobrist_random.getrandbits(64) if code & TYPE_MASK else 0
+                             for square in range(BOARD_SQUARES)) for code in range(16))
+ZOBRIST_SIDE = _zobrist_random.getrandbits(64)
+
+# FEN (Forsyth-Edwards Notation) letters of the red pieces, black pieces use the lowercase letters.
+# Both the western (B, N) and the alternative (E, H) letters of the elephant and horse are read.
+FEN_PIECES = {"K": GENERAL, "A": ADVISOR, "B": ELEPHANT, "E": ELEPHANT, "N": HORSE, "H": HORSE,
+              "R": CHARIOT, "C": CANNON, "P": SOLDIER}
+FEN_LETTERS = {GENERAL: "K", ADVISOR: "A", ELEPHANT: "B", HORSE: "N", CHARIOT: "R", CANNON: "C", SOLDIER: "P"}
+# FEN of the starting position
+START_FEN = "rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C5C1/9/RNBAKABNR w - - 0 1"
+
+# console messages of algebraic notation errors
+NOTATION_ALPHABET_MESSAGE = "first value of algebraic notation must be an alphabetical value"
+NOTATION_DIGIT_MESSAGE = "second value of algebraic notation must be an integer value"
+
+# Game states, their index is the state code stored in the game log
+GAME_STATES = ("UNFINISHED", "RED_WON", "BLACK_WON", "DRAW")
+# the game log keeps a full board keyframe every KEYFRAME_INTERVAL turns, and only move deltas in between
+KEYFRAME_INTERVAL = 32
+
+# Kinds of repeated positions, see XiangqiGame.classify_repetition.  A player who checks with every move of the
+# cycle loses, otherwise a player who chases an unprotected piece with every move of the cycle loses, otherwise
+# (both or neither player) the game is drawn.
+PERPETUAL_CHECK = "PERPETUAL_CHECK"
+PERPETUAL_CHASE = "PERPETUAL_CHASE"
+REPETITION = "REPETITION"
+# number of times a position must occur before make_move adjudicates the repetition
+REPETITION_LIMIT = 3
+
+# Stages of legal move generation, all moves or only the captures or only the quiet (non-capture) moves
+ALL_MOVES = 0
+CAPTURE_MOVES = 1
+QUIET_MOVES = 2
+
+# Methods that can be instrumented with call counts and timings, see XiangqiGame.enable_stats.
+# make_move is timed through make_move_result, which does the work of make_move, and allowed_move is timed through
+# get_allowed_moves, the piece rules check of make_move and GamePiece.allowed_move.  make_move checks through
+# is_in_check and is_in_check_mate, so their stats include the checks made for every move.
+INSTRUMENTED_METHODS = ("make_move_result", "is_in_check", "is_in_check_mate", "update_log", "get_allowed_moves")
+# stat names of the instrumented methods that are reported under another name
+STAT_NAMES = {"make_move_result": "make_move"}
+
+# Moves are stored as a single integer, the from square shifted left by MOVE_SHIFT bits plus the to square
+MOVE_SHIFT = 7
+MOVE_MASK = (1 << MOVE_SHIFT) - 1
+
+
+def encode_move(from_square, to_square):
+    """Takes the board array from and to square indexes of a move and returns the move as one integer"""
+    return from_square << MOVE_SHIFT | to_square
+
+
+def decode_move(move):
+    """Takes a move integer and returns its board array (from square, to square) indexes as a tuple"""
+    return move >> MOVE_SHIFT, move & MOVE_MASK
+
+
+class XiangqiGame:
+    """Represents Game of Xiangqi with players, board pieces, and a game state"""
+
+    def __init__(self, headless=False):
+        """
+        Initialize Xiangqi game parameters, set up the game piece.
+        headless: True for a game that never prints to the console, for servers.  make_move_result then reports
+        what happened and the caller renders the messages.
+        """
+        self._headless = headless
+        self._game_log = None
+        self.counter = 1
+        self._game_state = "UNFINISHED"
+        self._active_player = "RED"
+        self._other_player = "BLACK"
+        # board array of piece codes and the square of each side's general, indexed by side
+        self._board = bytearray(BOARD_SQUARES)
+        self._general_squares = [0, 0]
+        # occupancy bit masks of each rank (9 bits, by column) and each file (10 bits, by row) for sliding pieces
+        self._rank_occupancy = [0] * BOARD_ROWS
+        self._file_occupancy = [0] * BOARD_COLS
+        # GamePiece dictionary view of the board array, rebuilt only when requested after a change
+        self._board_view = None
+        # Zobrist hash of the board and the side to move, kept up to date move by move
+        self._hash = 0
+        # undo records of the moves made by push, taken back by pop
+        self._undo_stack = []
+        # repetition history, the hash of each position since the undo stack started (the current position last),
+        # the number of times each hash is in it, and the history index of each position reached by a capture.
+        # Positions before the last capture can't occur again, the positions after it are the reversible window.
+        self._hash_history = []
+        self._hash_counts = {}
+        self._capture_indexes = []
+        # moves made from the positions at the start of the repetition history that are not on the undo stack,
+        # rebuilt by seek from the hashes of the game log
+        self._history_moves = []
+        # number of moves at the bottom of the undo stack that are in the game log, moves made with push after them
+        # are logged by the next update_log
+        self._logged_plies = 0
+        # check, checkmate and stalemate status of each position seen, keyed by position and side to move
+        self._status_cache = {}
+        # FEN halfmove clock and fullmove number of the position the game log starts from
+        self._start_halfmove = 0
+        self._start_fullmove = 1
+        # moves made from the position the game log starts from, and moves since the last capture, before the first
+        # move of the undo stack.  The FEN move numbers are counted on from these, whichever way moves are made.
+        self._base_ply = 0
+        self._base_halfmove = 0
+        # instrumentation call counts and seconds by stat name, and functions called after each instrumented call
+        self._stats = {}
+        self._stats_callbacks = []
+        self._stats_enabled = False
+        self.board_piece_setup()
+        self._reset_history()
+        self.update_log()
+
+    def update_log(self):
+        """
+        Append current state to game play log.  The first call starts the log from the current position,
+        after that every move made since the last logged move (by make_move or push) is appended with the game
+        state after it, replacing any later turns left in the log by seek or sync_to_last_log.
+        """
+        if self._game_log is None:
+            self._game_log = GameLog(self._board, SIDES[self._active_player], self._game_state, self._hash,
+                                     self._base_halfmove)
+        elif len(self._undo_stack) > self._logged_plies:
+            if len(self._game_log) >= self.counter:
+                self._game_log.truncate(self.counter - 1)
+            undo_stack = self._undo_stack
+            if len(undo_stack) - self._logged_plies > 1:
+                # moves made with push before this one, the game state after a move is the state kept by the
+                # next move's undo record
+                for index in range(self._logged_plies, len(undo_stack) - 1):
+                    self._game_log.append(undo_stack[index][0], undo_stack[index][1], undo_stack[index + 1][3],
+                                          undo_stack[index + 1][2])
+            self._game_log.append(undo_stack[-1][0], undo_stack[-1][1], self._game_state, self._hash)
+        self._logged_plies = len(self._undo_stack)
+        self.counter = len(self._game_log) + 1
+
+    def _sync_log(self):
+        """Logs the moves made with push since the last logged move, so the game log reaches the current position"""
+        if len(self._undo_stack) > self._logged_plies:
+            self.update_log()
+
+    def sync_to_last_log(self):
+        """
+        Update game to last game play in log (Effectively an 'Undo last move').
+        Returns True if a move was taken back, False if there is no past game play.
+        """
+        try:
+            # log any moves made with push first, the last of them is the move taken back
+            if len(self._undo_stack) > self._logged_plies:
+                self.update_log()
+            # don't allow popping of past initial game state
+            turn = self.counter - 1
+            if turn <= 1:
+                raise IndexError
+            # take back the last move, restoring the board, hash and game state
+            if self._undo_stack:
+                self.pop()
+            else:
+                # the moves before a seek were not made with push, rebuild the previous turn from the log
+                self.seek(turn - 1)
+            # remove current state
+            self._game_log.truncate(turn - 1)
+            self.counter = turn
+            return True
+        except IndexError:
+            self._console("Index Error: No past game play found")
+            return False
+
+    def seek(self, turn):
+        """
+        Takes in a turn number of the game log (1 is the starting position) and sets the game to that turn.
+        The position is rebuilt from the nearest keyframe, replaying at most KEYFRAME_INTERVAL - 1 moves, and the
+        repetition history before the keyframe back to the last capture is rebuilt from the hashes of the log.
+        Later turns stay in the log until a new move is made, raises IndexError if the turn is not in the log.
+        """
+        self._sync_log()
+        if not 1 <= turn <= len(self._game_log):
+            raise IndexError("turn " + str(turn) + " is not in the game log")
+        keyframe_turn, board, side, state_code, position_hash, halfmove = self._game_log.get_keyframe(turn)
+        self._load_position(board, side, GAME_STATES[state_code], keyframe_turn - 1, halfmove)
+        # the positions since the last capture before the keyframe can recur, take their hashes and moves from the log
+        first_turn = max(keyframe_turn - halfmove, 1)
+        self._reset_history([self._game_log.get_hash(log_turn) for log_turn in range(first_turn, keyframe_turn)],
+                            [self._game_log.get_delta(log_turn)[0] for log_turn in range(first_turn + 1,
+                                                                                         keyframe_turn + 1)])
+        for log_turn in range(keyframe_turn + 1, turn + 1):
+            move, captured, state_code = self._game_log.get_delta(log_turn)
+            self.push(move)
+            self._game_state = GAME_STATES[state_code]
+        self._logged_plies = len(self._undo_stack)
+        self.counter = turn + 1
+
+    def _load_position(self, board, side, state, ply=0, halfmove=0):
+        """
+        Replaces the whole position with board (90 piece codes), side (RED or BLACK) to move and the game state.
+        ply: moves made from the position the game log starts from, halfmove: moves since the last capture.
+        Rebuilds the general squares, occupancy masks and hash, and forgets the moves that push could take back
+        and the repetition history.
+        """
+        self._base_ply = ply
+        self._base_halfmove = halfmove
+        self._board = bytearray(board)
+        self._general_squares = [self._board.index(GENERAL), self._board.index(GENERAL | BLACK_BIT)]
+        self._active_player = PLAYERS[side]
+        self._other_player = PLAYERS[1 - side]
+        self._game_state = state
+        self._undo_stack = []
+        self._logged_plies = 0
+        self._update_occupancy()
+        self._hash = self._compute_hash()
+        self._reset_history()
+
+    def _reset_history(self, hashes=(), moves=()):
+        """
+        Restarts the repetition history from the current position.  hashes: the positions since the last capture
+        that led to it, not on the undo stack, and moves: the move made from each of them
+        """
+        self._hash_history = list(hashes)
+        self._hash_history.append(self._hash)
+        self._hash_counts = {}
+        for position_hash in self._hash_history:
+            self._hash_counts[position_hash] = self._hash_counts.get(position_hash, 0) + 1
+        self._history_moves = list(moves)
+        self._capture_indexes = []
+
+    @classmethod
+    def from_fen(cls, fen, headless=False):
+        """
+        Takes in a position in xiangqi FEN and returns a new XiangqiGame starting from it, see set_fen.
+        headless: as for XiangqiGame
+        """
+        game = cls(headless)
+        game.set_fen(fen)
+        return game
+
+    def set_fen(self, fen):
+        """
+        Takes in a position in xiangqi FEN and sets the game to it, building the board array directly.
+        The ranks are listed from black's back rank (row 10) to red's (row 1), files a to i, uppercase for red.
+        The side to move is 'w' or 'r' for red and 'b' for black, the halfmove and fullmove numbers are optional.
+        The game log restarts from the position and the game state is worked out, a player with no legal move lost.
+        Raises InvalidFenError if the FEN can't be read or a side doesn't have exactly one general.
+        """
+        fields = fen.split()
+        if not fields:
+            raise InvalidFenError("empty FEN")
+        ranks = fields[0].split("/")
+        if len(ranks) != BOARD_ROWS:
+            raise InvalidFenError("FEN must have 10 ranks: " + fields[0])
+        board = bytearray(BOARD_SQUARES)
+        for rank_index, rank in enumerate(ranks):
+            # the first rank of a FEN is black's back rank, the last row of the board array
+            row = BOARD_ROWS - 1 - rank_index
+            col = 0
+            for letter in rank:
+                if letter.isdigit():
+                    col += int(letter)
+                elif letter.upper() in FEN_PIECES and col < BOARD_COLS:
+                    board[square_index(col, row)] = FEN_PIECES[letter.upper()] | (BLACK_BIT if letter.islower() else 0)
+                    col += 1
+                else:
+                    raise InvalidFenError("invalid FEN rank: " + rank)
+            if col != BOARD_COLS:
+                raise InvalidFenError("FEN rank must have 9 files: " + rank)
+        if board.count(GENERAL) != 1 or board.count(GENERAL | BLACK_BIT) != 1:
+            raise InvalidFenError("each side must have exactly one general")
+        side_field = fields[1].lower() if len(fields) > 1 else "w"
+        if side_field not in ("w", "r", "b"):
+            raise InvalidFenError("invalid side to move: " + fields[1])
+        side = BLACK if side_field == "b" else RED
+        try:
+            halfmove = int(fields[4]) if len(fields) > 4 else 0
+            fullmove = int(fields[5]) if len(fields) > 5 else 1
+        except ValueError:
+            raise InvalidFenError("invalid move numbers: " + fen)
+
+        self.set_board_array(board, PLAYERS[side], halfmove, fullmove)
+
+    def to_fen(self):
+        """
+        Returns the current position in xiangqi FEN, for example START_FEN for the starting position.
+        The halfmove clock counts the moves since the last capture, made with make_move or push.
+        """
+        ranks = []
+        for row in range(BOARD_ROWS - 1, -1, -1):
+            rank = ""
+            empty = 0
+            for col in range(BOARD_COLS):
+                piece = self._board[square_index(col, row)]
+                if piece == EMPTY:
+                    empty += 1
+                    continue
+                if empty:
+                    rank += str(empty)
+                    empty = 0
+                letter = FEN_LETTERS[piece & TYPE_MASK]
+                rank += letter.lower() if piece & BLACK_BIT else letter
+            if empty:
+                rank += str(empty)
+            ranks.append(rank)
+        # moves made since the game log started and the moves since the last capture, counted from the undo stack
+        # so moves made with push count as well as moves made with make_move
+        undo_stack = self._undo_stack
+        plies = self._base_ply + len(undo_stack)
+        halfmove = self._base_halfmove + len(undo_stack)
+        for index in range(len(undo_stack) - 1, -1, -1):
+            if undo_stack[index][1] != EMPTY:
+                halfmove = len(undo_stack) - 1 - index
+                break
+        start_side = self._game_log.get_keyframe(1)[2]
+        fullmove = self._start_fullmove + (plies + start_side) // 2
+        side = "b" if self._active_player == "BLACK" else "w"
+        return "/".join(ranks) + " " + side + " - - " + str(halfmove) + " " + str(fullmove)
+
+    def board_piece_setup(self):
+        """Sets up board array, placing the piece code of each starting piece on its starting square"""
+        board = self._board
+        # Place player's Cannon pieces at starting locations, by index notation (col, row)
+        board[square_index(1, 2)] = CANNON
+        board[square_index(1, 7)] = CANNON | BLACK_BIT
+        board[square_index(7, 2)] = CANNON
+        board[square_index(7, 7)] = CANNON | BLACK_BIT
+        # Create list of piece types that are found in the back row of each player
+        back_row = [CHARIOT, HORSE, ELEPHANT, ADVISOR, GENERAL, ADVISOR, ELEPHANT, HORSE, CHARIOT]
+        # loop through each column on board
+        for column in range(9):
+            # For each column, place the piece type found in the back row for each player
+            board[square_index(column, 0)] = back_row[column]
+            board[square_index(column, 9)] = back_row[column] | BLACK_BIT
+            # for even column values, place the Soldier pieces
+            if column % 2 == 0:
+                board[square_index(column, 3)] = SOLDIER
+                board[square_index(column, 6)] = SOLDIER | BLACK_BIT
+        # record where each general starts
+        self._general_squares = [square_index(4, 0), square_index(4, 9)]
+        self._update_occupancy()
+        self._hash = self._compute_hash()
+
+    def _compute_hash(self):
+        """Returns the Zobrist hash of the whole board and side to move, used when the board is set up from scratch"""
+        position_hash = 0
+        for square, piece in enumerate(self._board):
+            position_hash ^= ZOBRIST_PIECES[piece][square]
+        if self._active_player == "BLACK":
+            position_hash ^= ZOBRIST_SIDE
+        return position_hash
+
+    def get_position_hash(self):
+        """Returns the 64 bit Zobrist hash of the current position, the board pieces and the side to move"""
+        return self._hash
+
+    def _update_occupancy(self):
+        """Rebuilds the rank and file occupancy masks from the board array after the whole board is replaced"""
+        self._rank_occupancy = [0] * BOARD_ROWS
+        self._file_occupancy = [0] * BOARD_COLS
+        for square, piece in enumerate(self._board):
+            if piece != EMPTY:
+                col, row = SQUARE_LOCATIONS[square]
+                self._rank_occupancy[row] |= RANK_BITS[square]
+                self._file_occupancy[col] |= FILE_BITS[square]
+        self._board_view = None
+
+    def _move_piece(self, from_square, to_square):
+        """
+        Moves the piece on from_square to to_square in the board array, without any rule checking.
+        Returns the piece code that was on to_square (EMPTY if nothing was captured) for _unmove_piece
+        """
+        board = self._board
+        piece = board[from_square]
+        captured = board[to_square]
+        board[to_square] = piece
+        board[from_square] = EMPTY
+        # clear the from square bits, the to square bits only change when it was empty
+        from_row = from_square // BOARD_COLS
+        from_col = from_square - from_row * BOARD_COLS
+        self._rank_occupancy[from_row] ^= RANK_BITS[from_square]
+        self._file_occupancy[from_col] ^= FILE_BITS[from_square]
+        if captured == EMPTY:
+            to_row = to_square // BOARD_COLS
+            self._rank_occupancy[to_row] ^= RANK_BITS[to_square]
+            self._file_occupancy[to_square - to_row * BOARD_COLS] ^= FILE_BITS[to_square]
+        # keep track of the generals, they are looked up by every check test
+        if piece & TYPE_MASK == GENERAL:
+            self._general_squares[piece >> 3] = to_square
+        self._board_view = None
+        return captured
+
+    def _unmove_piece(self, from_square, to_square, captured):
+        """Reverses _move_piece, returning the piece to from_square and restoring the captured piece code"""
+        board = self._board
+        piece = board[to_square]
+        board[from_square] = piece
+        board[to_square] = captured
+        from_row = from_square // BOARD_COLS
+        from_col = from_square - from_row * BOARD_COLS
+        self._rank_occupancy[from_row] ^= RANK_BITS[from_square]
+        self._file_occupancy[from_col] ^= FILE_BITS[from_square]
+        if captured == EMPTY:
+            to_row = to_square // BOARD_COLS
+            self._rank_occupancy[to_row] ^= RANK_BITS[to_square]
+            self._file_occupancy[to_square - to_row * BOARD_COLS] ^= FILE_BITS[to_square]
+        if piece & TYPE_MASK == GENERAL:
+            self._general_squares[piece >> 3] = from_square
+        self._board_view = None
+
+    def _occupied_squares(self, side):
+        """Returns a list of the board array squares holding pieces owned by side (RED or BLACK)"""
+        return [square for square, piece in enumerate(self._board) if piece and piece >> 3 == side]
+
+    def get_piece_targets(self, square):
+        """
+        Takes in a board array square index and returns a list of the square indexes the piece there can move to.
+        Handles board boundaries, blocking pieces and pieces of the same team, but not leaving the general in check.
+        Returns an empty list if the square is empty.
+        """
+        piece = self._board[square]
+        kind = piece & TYPE_MASK
+        side = piece >> 3
+        if kind == CHARIOT:
+            return self._chariot_targets(square, side)
+        elif kind == CANNON:
+            return self._cannon_targets(square, side)
+        elif kind == HORSE:
+            return self._horse_targets(square, side)
+        elif kind == SOLDIER:
+            return self._soldier_targets(square, side)
+        elif kind == ELEPHANT:
+            return self._elephant_targets(square, side)
+        elif kind == ADVISOR:
+            return self._advisor_targets(square, side)
+        elif kind == GENERAL:
+            return self._general_targets(square, side)
+        # square is empty, no moves
+        return []
+
+    def _general_targets(self, square, side):
+        """Returns target squares of the general on square, including the 'flying general' capture"""
+        board = self._board
+        row = square // BOARD_COLS
+        col = square - row * BOARD_COLS
+        targets = []
+        # check if the general can perform the 'flying general' move, the other general is the first piece on the file
+        other_square = self._general_squares[1 - side]
+        if other_square % BOARD_COLS == col:
+            if other_square // BOARD_COLS in FILE_LINES[row << BOARD_ROWS | self._file_occupancy[col]][1]:
+                targets.append(other_square)
+        # the general steps one point orthogonally and stays within the palace
+        land = CAN_LAND[side]
+        targets.extend([target for target in GENERAL_MOVES[side][square] if land[board[target]]])
+        return targets
+
+    def _advisor_targets(self, square, side):
+        """Returns target squares of the advisor on square, one point diagonally within the palace"""
+        board = self._board
+        land = CAN_LAND[side]
+        return [target for target in ADVISOR_MOVES[side][square] if land[board[target]]]
+
+    def _elephant_targets(self, square, side):
+        """Returns target squares of the elephant on square, two points diagonally unless its 'elephant eye' is blocked"""
+        board = self._board
+        land = CAN_LAND[side]
+        # the table already keeps elephants on the board and on their side of the river
+        return [target for target, eye in ELEPHANT_MOVES[side][square] if not board[eye] and land[board[target]]]
+
+    def _horse_targets(self, square, side):
+        """Returns target squares of the horse on square, skipping the moves blocked at the 'horse leg'"""
+        board = self._board
+        land = CAN_LAND[side]
+        return [target for target, leg in HORSE_MOVES[square] if not board[leg] and land[board[target]]]
+
+    def _chariot_targets(self, square, side):
+        """Returns target squares of the chariot on square, sliding until the edge of the board or a piece"""
+        board = self._board
+        land = CAN_LAND[side]
+        row = square // BOARD_COLS
+        col = square - row * BOARD_COLS
+        rank_start = row * BOARD_COLS
+        # look up the rank and file lines by the chariot's position and the line's occupancy
+        slides, hits, screens = RANK_LINES[col << BOARD_COLS | self._rank_occupancy[row]]
+        targets = [rank_start + point for point in slides]
+        # the first piece hit in each direction is captured if it is an opponent's piece
+        for point in hits:
+            if land[board[rank_start + point]]:
+                targets.append(rank_start + point)
+        slides, hits, screens = FILE_LINES[row << BOARD_ROWS | self._file_occupancy[col]]
+        targets.extend([point * BOARD_COLS + col for point in slides])
+        for point in hits:
+            if land[board[point * BOARD_COLS + col]]:
+                targets.append(point * BOARD_COLS + col)
+        return targets
+
+    def _cannon_targets(self, square, side):
+        """Returns target squares of the cannon on square, sliding to empty points or jumping one piece to capture"""
+        board = self._board
+        land = CAN_LAND[side]
+        row = square // BOARD_COLS
+        col = square - row * BOARD_COLS
+        rank_start = row * BOARD_COLS
+        # look up the rank and file lines by the cannon's position and the line's occupancy
+        slides, hits, screens = RANK_LINES[col << BOARD_COLS | self._rank_occupancy[row]]
+        targets = [rank_start + point for point in slides]
+        # the piece behind the first piece (the screen) in each direction is captured if it is an opponent's piece
+        for point in screens:
+            if land[board[rank_start + point]]:
+                targets.append(rank_start + point)
+        slides, hits, screens = FILE_LINES[row << BOARD_ROWS | self._file_occupancy[col]]
+        targets.extend([point * BOARD_COLS + col for point in slides])
+        for point in screens:
+            if land[board[point * BOARD_COLS + col]]:
+                targets.append(point * BOARD_COLS + col)
+        return targets
+
+    def _soldier_targets(self, square, side):
+        """Returns target squares of the soldier on square, forward only, and also sideways once across the river"""
+        board = self._board
+        land = CAN_LAND[side]
+        return [target for target in SOLDIER_MOVES[side][square] if land[board[target]]]
+
+    def is_square_attacked(self, square, by_side):
+        """
+        Takes in a board array square index and a side (RED or BLACK) and returns True if a piece of by_side
+        could capture on that square, otherwise False.
+        Looks outward from the square along its rank and file and at the squares horses, soldiers, elephants,
+        advisors and the general could attack it from, instead of generating the moves of every piece.
+        """
+        board = self._board
+        side_bit = by_side << 3
+        row = square // BOARD_COLS
+        col = square - row * BOARD_COLS
+        rank_start = row * BOARD_COLS
+        # chariots are the first piece along a line, cannons are the piece behind the first piece
+        chariot = CHARIOT | side_bit
+        cannon = CANNON | side_bit
+        slides, hits, screens = FILE_LINES[row << BOARD_ROWS | self._file_occupancy[col]]
+        for point in hits:
+            piece = board[point * BOARD_COLS + col]
+            if piece == chariot:
+                return True
+            # facing generals, the general attacks the other general along an open file
+            if piece == GENERAL | side_bit and square == self._general_squares[1 - by_side]:
+                return True
+        for point in screens:
+            if board[point * BOARD_COLS + col] == cannon:
+                return True
+        slides, hits, screens = RANK_LINES[col << BOARD_COLS | self._rank_occupancy[row]]
+        for point in hits:
+            if board[rank_start + point] == chariot:
+                return True
+        for point in screens:
+            if board[rank_start + point] == cannon:
+                return True
+        # horses attack from their origin square unless their leg is blocked
+        horse = HORSE | side_bit
+        for origin, leg in HORSE_ATTACKS[square]:
+            if board[origin] == horse and not board[leg]:
+                return True
+        soldier = SOLDIER | side_bit
+        for origin in SOLDIER_ATTACKS[by_side][square]:
+            if board[origin] == soldier:
+                return True
+        # the remaining pieces stay on their own half of the board, most squares have no entries here
+        elephant = ELEPHANT | side_bit
+        for origin, eye in ELEPHANT_ATTACKS[by_side][square]:
+            if board[origin] == elephant and not board[eye]:
+                return True
+        advisor = ADVISOR | side_bit
+        for origin in ADVISOR_ATTACKS[by_side][square]:
+            if board[origin] == advisor:
+                return True
+        general = GENERAL | side_bit
+        for origin in GENERAL_ATTACKS[by_side][square]:
+            if board[origin] == general:
+                return True
+        return False
+
+    def _side_in_check(self, side):
+        """Returns True if the general of side (RED or BLACK) could be captured by the other side, otherwise False"""
+        return self.is_square_attacked(self._general_squares[side], 1 - side)
+
+    def is_in_check(self, player):
+        """takes as parameters 'red' or 'black' and returns True is that player is in check and False otherwise"""
+        try:
+            # make user input not case-sensitive
+            player = player.upper()
+            # check that user entered a player name found in Xiangqi Game
+            if player in SIDES:
+                return self._side_in_check(SIDES[player])
+            # incorrect player name entered
+            else:
+                raise InvalidPlayerError
+        except InvalidPlayerError:
+            self._console("Invalid Player Parameter: player parameter must be 'red' or 'black', not case-sensitive")
+
+    def get_allowed_moves(self, square):
+        """
+        Takes in a board array square index and returns the squares the piece there is allowed to move to by its
+        own rules, like get_piece_targets.  This is the piece rules check used by make_move and
+        GamePiece.allowed_move, kept separate from move generation so it can be instrumented as allowed_move.
+        """
+        return self.get_piece_targets(square)
+
+    def _iter_legal_moves(self, side, stage=ALL_MOVES):
+        """
+        Yields every legal move of side (RED or BLACK) as a move integer, see encode_move.
+        stage: ALL_MOVES, or CAPTURE_MOVES or QUIET_MOVES to only generate captures or non-captures.
+        A move can only leave the general in check if the general is already in check, the general itself moves,
+        the piece leaves the general's rank or file (a chariot pin, cannon screen or facing generals) or a horse leg
+        beside the general, or the piece lands on the general's rank or file (making a new cannon screen).
+        Only those moves are made and tested on the board, every other pseudo-legal move is legal as generated.
+        The board must be unchanged each time the generator is resumed.
+        """
+        board = self._board
+        general_square = self._general_squares[side]
+        general_row = general_square // BOARD_COLS
+        general_col = general_square - general_row * BOARD_COLS
+        horse_blockers = HORSE_BLOCKERS[general_square]
+        in_check = self._side_in_check(side)
+        captures_only = stage == CAPTURE_MOVES
+        for square in self._occupied_squares(side):
+            row = square // BOARD_COLS
+            col = square - row * BOARD_COLS
+            # moves of a piece that is pinned, screening or blocking could expose the general
+            exposed = (in_check or square == general_square or row == general_row or col == general_col or
+                       square in horse_blockers)
+            for target in self.get_piece_targets(square):
+                # skip the moves of the other stage, targets holding a piece are captures
+                if stage and captures_only != (board[target] != EMPTY):
+                    continue
+                if exposed or target // BOARD_COLS == general_row or target % BOARD_COLS == general_col:
+                    # make the move on the board and test the general before putting the pieces back
+                    captured = self._move_piece(square, target)
+                    illegal = self._side_in_check(side)
+                    self._unmove_piece(square, target, captured)
+                    if illegal:
+                        continue
+                yield square << MOVE_SHIFT | target
+
+    def _has_legal_move(self, side):
+        """
+        Returns True if side (RED or BLACK) has at least one legal move, stopping at the first one found.
+        When side isn't in check, a move of a piece off the general's rank, file and horse legs that also lands off
+        the general's rank and file can't expose the general (see _iter_legal_moves), so those moves are looked for
+        first without making them.  Only if there is none are the other moves made and tested.
+        """
+        board = self._board
+        general_square = self._general_squares[side]
+        general_row = general_square // BOARD_COLS
+        general_col = general_square - general_row * BOARD_COLS
+        if not self._side_in_check(side):
+            horse_blockers = HORSE_BLOCKERS[general_square]
+            for square, piece in enumerate(board):
+                if not piece or piece >> 3 != side:
+                    continue
+                row = square // BOARD_COLS
+                if row == general_row or square - row * BOARD_COLS == general_col or square in horse_blockers:
+                    continue
+                for target in self.get_piece_targets(square):
+                    if target // BOARD_COLS != general_row and target % BOARD_COLS != general_col:
+                        return True
+        return next(self._iter_legal_moves(side), None) is not None
+
+    def has_legal_move(self, player=None):
+        """Takes in 'red' or 'black' (defaults to the active player) and returns True if they have a legal move"""
+        if player is None:
+            player = self._active_player
+        player = player.upper()
+        if player not in SIDES:
+            raise InvalidPlayerError
+        return self._has_legal_move(SIDES[player])
+
+    def iter_legal_moves(self, player=None):
+        """
+        Takes in 'red' or 'black' (defaults to the active player) and lazily yields their legal moves as move integers.
+        Stops generating once the caller stops iterating, the board must not be left changed between moves.
+        """
+        if player is None:
+            player = self._active_player
+        player = player.upper()
+        if player not in SIDES:
+            raise InvalidPlayerError
+        return self._iter_legal_moves(SIDES[player])
+
+    def generate_legal_moves(self, player=None):
+        """
+        Takes in 'red' or 'black' (defaults to the active player) and returns a list of all their legal moves.
+        Moves are move integers, decode_move gives the board array (from square, to square) of each move.
+        """
+        return list(self.iter_legal_moves(player))
+
+    def generate_legal_captures(self, player=None):
+        """
+        Takes in 'red' or 'black' (defaults to the active player) and returns a list of their legal captures,
+        for searches that generate captures before the quiet moves.
+        """
+        if player is None:
+            player = self._active_player
+        return list(self._iter_legal_moves(SIDES[player.upper()], CAPTURE_MOVES))
+
+    def generate_legal_quiets(self, player=None):
+        """Takes in 'red' or 'black' (defaults to the active player) and returns a list of their legal non-captures"""
+        if player is None:
+            player = self._active_player
+        return list(self._iter_legal_moves(SIDES[player.upper()], QUIET_MOVES))
+
+    def is_legal_move(self, move):
+        """
+        Takes in a move integer and returns True if it is a legal move for the active player, otherwise False.
+        Used to check moves remembered from other positions (hash moves, killer moves) before making them.
+        """
+        from_square = move >> MOVE_SHIFT
+        to_square = move & MOVE_MASK
+        if from_square >= BOARD_SQUARES or to_square >= BOARD_SQUARES:
+            return False
+        piece = self._board[from_square]
+        side = SIDES[self._active_player]
+        if piece == EMPTY or piece >> 3 != side or to_square not in self.get_piece_targets(from_square):
+            return False
+        captured = self._move_piece(from_square, to_square)
+        illegal = self._side_in_check(side)
+        self._unmove_piece(from_square, to_square, captured)
+        return not illegal
+
+    def legal_moves_from(self, location, indexNotation=False):
+        """
+        Returns the index notation (col, row) of the legal moves of the piece at location, taken by default in
+        algebraic notation.  Returns an empty list if there is no piece at location.
+        IndexNotation: parameter as True allows user to input index notation tuple instead (col, row)
+        """
+        if not indexNotation:
+            if not self.is_location_on_board(location):
+                return []
+            location = ConvertAlgebraicNotation(location)
+        elif not self.is_location_on_board(location, True):
+            return []
+        square = square_index(*location)
+        piece = self._board[square]
+        if piece == EMPTY:
+            return []
+        return [SQUARE_LOCATIONS[move & MOVE_MASK] for move in self._iter_legal_moves(piece >> 3)
+                if move >> MOVE_SHIFT == square]
+
+    def is_in_check_mate(self, player):
+        """
+        Takes in 'red' or 'black' and returns True if player has no more moves and is in checkmate, otherwise False
+        """
+        try:
+            # make user input not case-sensitive
+            player = player.upper()
+            # check that user entered a player name found in Xiangqi Game
+            if player in SIDES:
+                # the player is checkmated (or stalemated) when they have no legal move left
+                return self._position_status(SIDES[player]) in (CHECKMATE, STALEMATE)
+            else:
+                raise InvalidPlayerError
+        except InvalidPlayerError:
+            self._console("Invalid Player Parameter: player parameter must be 'red' or 'black', not case-sensitive")
+
+    def _position_key(self, side):
+        """Returns the Zobrist hash of the current board position with side (RED or BLACK) to move"""
+        if side == SIDES[self._active_player]:
+            return self._hash
+        return self._hash ^ ZOBRIST_SIDE
+
+    def clear_status_cache(self):
+        """Forgets the cached check, checkmate and stalemate status of every position, so it is worked out again"""
+        self._status_cache.clear()
+
+    def _position_status(self, side):
+        """
+        Returns the status (NORMAL, CHECK, CHECKMATE or STALEMATE) of side (RED or BLACK) in the current position.
+        The status of a position is worked out once and cached, later calls for the same position are a lookup.
+        """
+        key = self._position_key(side)
+        status = self._status_cache.get(key)
+        if status is None:
+            in_check = self._side_in_check(side)
+            if self._has_legal_move(side):
+                status = CHECK if in_check else NORMAL
+            else:
+                status = CHECKMATE if in_check else STALEMATE
+            # keep the cache bounded for long games
+            if len(self._status_cache) >= STATUS_CACHE_SIZE:
+                self._status_cache.clear()
+            self._status_cache[key] = status
+        return status
+
+    def get_position_status(self, player=None):
+        """
+        Takes in 'red' or 'black' (defaults to the active player) and returns their status in the current position,
+        'NORMAL', 'CHECK', 'CHECKMATE' or 'STALEMATE'.  A stalemated player has no legal move and loses like checkmate.
+        """
+        if player is None:
+            player = self._active_player
+        player = player.upper()
+        if player not in SIDES:
+            raise InvalidPlayerError
+        return self._position_status(SIDES[player])
+
+    def make_move(self, currentPosition, nextPosition):
+        """
+        Takes the algebraic notation representing locations where piece is from and moving to.
+        Checks if game is already over, validates algebraic notation, checks if move is possible,
+        and if the moves puts the other player in check. Prints messages to inform the user of the
+        action, unless the game is headless.  See make_move_result for the move itself.
+        Returns either True if move is allowed, otherwise False.
+        """
+        result = self.make_move_result(currentPosition, nextPosition)
+        if not self._headless:
+            for message in result.get_messages():
+                print(message)
+        return result.is_made()
+
+    def make_move_result(self, currentPosition, nextPosition):
+        """
+        Takes the algebraic notation representing locations where piece is from and moving to, makes the move
+        if it is allowed and returns a MoveResult saying what happened.  Never prints to the console.
+        Invalid moves are rejected by the cheap checks first, checkmate is only worked out for a new
+        position and then cached.
+        """
+        # if game is already over
+        if self._game_state != "UNFINISHED":
+            return MoveResult(MoveStatus.GAME_OVER, self._active_player, game_state=self._game_state)
+
+        # check that locations are in algebraic notation and are on the board
+        from_square, error = self._notation_square(currentPosition)
+        if from_square is not None:
+            to_square, error = self._notation_square(nextPosition)
+            if to_square is None:
+                return MoveResult(MoveStatus.ILLEGAL_NOTATION, self._active_player, message=error)
+        else:
+            return MoveResult(MoveStatus.ILLEGAL_NOTATION, self._active_player, message=error)
+        # If no piece is at the current position, the move is rejected
+        piece = self._board[from_square]
+        if piece == EMPTY:
+            return MoveResult(MoveStatus.EMPTY_SQUARE, self._active_player)
+
+        # There is a piece at the given current location
+        side = SIDES[self._active_player]
+        piece_name = PIECE_NAMES[piece & TYPE_MASK]
+        # If the piece at current location is not the active player's piece, the move is rejected
+        if piece >> 3 != side:
+            return MoveResult(MoveStatus.WRONG_SIDE, PLAYERS[piece >> 3], piece_name)
+
+        # check the move is one of the piece's allowed moves
+        if to_square not in self.get_allowed_moves(from_square):
+            return MoveResult(MoveStatus.ILLEGAL_PIECE_MOVE, self._active_player, piece_name)
+
+        # before move, check if player is in check mate, the status is cached from the last move.  make_move checks
+        # through is_in_check and is_in_check_mate so their instrumentation stats include the checks of every move.
+        if self.is_in_check_mate(self._active_player):
+            # update game state to other player has won, move not allowed
+            self._game_state = self._other_player + "_WON"
+            return MoveResult(MoveStatus.GAME_OVER, self._active_player, piece_name, game_state=self._game_state)
+
+        # make the move, capturing any opponent piece there
+        self.push(from_square << MOVE_SHIFT | to_square)
+        # check if new location puts player in check
+        if self.is_in_check(PLAYERS[side]):
+            # move puts player in check, take the move back
+            self.pop()
+            return MoveResult(MoveStatus.LEAVES_IN_CHECK, self._active_player, piece_name,
+                              in_check=self._position_status(side) == CHECK)
+
+        # the move is allowed, update_log below drops any later turns left in the game log by seek
+        captured = self._undo_stack[-1][1]
+        captured_name = PIECE_NAMES[captured & TYPE_MASK] if captured != EMPTY else None
+        # end move, check if move checkmates other player, who is now the active player
+        repetition = None
+        if self.is_in_check_mate(self._active_player):
+            # update game state to player who moved has won
+            self._game_state = PLAYERS[side] + "_WON"
+            move_status = MoveStatus.CHECKMATE
+        elif self.get_repetition_count() >= REPETITION_LIMIT:
+            # adjudicate the repetition, the offending player loses, otherwise the game is drawn
+            repetition, offender = self.classify_repetition()
+            self._game_state = "DRAW" if offender is None else PLAYERS[1 - SIDES[offender]] + "_WON"
+            move_status = MoveStatus.REPETITION
+        elif captured != EMPTY:
+            move_status = MoveStatus.CAPTURED
+        else:
+            move_status = MoveStatus.MOVED
+        # update game play log
+        self.update_log()
+        return MoveResult(move_status, PLAYERS[side], piece_name, captured_name, self._game_state,
+                          repetition=repetition)
+
+    def push(self, move):
+        """
+        Makes move (a move integer, see encode_move) on the board and passes the turn to the other player.
+        No rules are checked, the move should come from generate_legal_moves.  Only the two squares of the move
+        change, a small undo record (move, captured piece code, previous hash, previous game state) is kept for pop,
+        and the new position is added to the repetition history.
+        """
+        from_square = move >> MOVE_SHIFT
+        to_square = move & MOVE_MASK
+        piece_keys = ZOBRIST_PIECES[self._board[from_square]]
+        captured = self._move_piece(from_square, to_square)
+        previous_hash = self._hash
+        self._hash = (previous_hash ^ piece_keys[from_square] ^ piece_keys[to_square] ^
+                      ZOBRIST_PIECES[captured][to_square] ^ ZOBRIST_SIDE)
+        self._undo_stack.append((move, captured, previous_hash, self._game_state))
+        # add the new position to the repetition history
+        if captured:
+            self._capture_indexes.append(len(self._hash_history))
+        self._hash_history.append(self._hash)
+        self._hash_counts[self._hash] = self._hash_counts.get(self._hash, 0) + 1
+        # exchange active player and other player
+        self._active_player, self._other_player = self._other_player, self._active_player
+
+    def pop(self):
+        """
+        Takes back the last move made by push, the exact inverse of push.
+        Returns the move integer that was taken back, raises IndexError if there is no move to take back.
+        """
+        move, captured, previous_hash, previous_state = self._undo_stack.pop()
+        # remove the position from the repetition history
+        count = self._hash_counts[self._hash] - 1
+        if count:
+            self._hash_counts[self._hash] = count
+        else:
+            del self._hash_counts[self._hash]
+        self._hash_history.pop()
+        if captured:
+            self._capture_indexes.pop()
+        if len(self._undo_stack) < self._logged_plies:
+            # a logged move was taken back, the log keeps it as a later turn until the next move is logged
+            self._logged_plies -= 1
+            self.counter -= 1
+        self._unmove_piece(move >> MOVE_SHIFT, move & MOVE_MASK, captured)
+        self._hash = previous_hash
+        self._game_state = previous_state
+        self._active_player, self._other_player = self._other_player, self._active_player
+        return move
+
+    def replay_moves(self, moves):
+        """
+        Takes in move integers already known to be legal, such as the moves of a game record, makes them with push
+        and logs them, so the game log, counter and FEN move numbers follow the game.  The game state of the position
+        reached is worked out, a player with no legal move lost.
+        """
+        for move in moves:
+            self.push(move)
+        status = self._position_status(SIDES[self._active_player])
+        if status == CHECKMATE or status == STALEMATE:
+            self._game_state = self._other_player + "_WON"
+        self._sync_log()
+
+    def get_repetition_count(self):
+        """Returns the number of times the current position has occurred, 1 for a position not repeated"""
+        return self._hash_counts[self._hash]
+
+    def is_repetition(self):
+        """Returns True if the current position occurred before, otherwise False.  A lookup, used by the search."""
+        return self._hash_counts[self._hash] > 1
+
+    def get_repetition_cycle(self):
+        """
+        Returns the list of move integers made since the current position last occurred, or an empty list if it
+        didn't occur before.  Only the positions since the last capture (the reversible window) are searched.
+        """
+        if self._hash_counts[self._hash] < 2:
+            return []
+        window_start = self._capture_indexes[-1] if self._capture_indexes else 0
+        # the history starts with the positions rebuilt by seek, then one position for each undo record
+        prefix = len(self._history_moves)
+        # the same player is to move every second position, and a cycle takes at least two moves each
+        for index in range(len(self._hash_history) - 5, window_start - 1, -2):
+            if self._hash_history[index] == self._hash:
+                return self._history_moves[index:] + [entry[0] for entry in self._undo_stack[max(index - prefix, 0):]]
+        return []
+
+    def _is_chase(self, square, side):
+        """
+        Returns True if the piece of side on square attacks a piece of the other side, other than the general,
+        that no piece of the other side protects, otherwise False
+        """
+        for target in self.get_piece_targets(square):
+            piece = self._board[target]
+            if piece and piece & TYPE_MASK != GENERAL and not self.is_square_attacked(target, 1 - side):
+                return True
+        return False
+
+    def classify_repetition(self):
+        """
+        Returns the (kind, offending player) tuple of the cycle of moves that led back to the current position:
+        PERPETUAL_CHECK if one player checked with every move of the cycle, otherwise PERPETUAL_CHASE if one player
+        chased an unprotected piece with every move of the cycle (with the piece moved), with that player as the
+        offender, otherwise REPETITION and None.  Returns (None, None) if the position isn't repeated.
+        """
+        cycle = self.get_repetition_cycle()
+        if not cycle:
+            return None, None
+        # the cycle started from the current position, play it again and take it back, noting for each player if
+        # every move checked and if every move chased
+        checks = [True, True]
+        chases = [True, True]
+        for move in cycle:
+            side = SIDES[self._active_player]
+            self.push(move)
+            if not self._side_in_check(1 - side):
+                checks[side] = False
+            if not self._is_chase(move & MOVE_MASK, side):
+                chases[side] = False
+        for move in cycle:
+            self.pop()
+        if checks[RED] != checks[BLACK]:
+            return PERPETUAL_CHECK, PLAYERS[RED if checks[RED] else BLACK]
+        if not checks[RED] and chases[RED] != chases[BLACK]:
+            return PERPETUAL_CHASE, PLAYERS[RED if chases[RED] else BLACK]
+        return REPETITION, None
+
+    def perft(self, depth):
+        """
+        Takes in a depth and returns the number of legal move sequences of that many plies from the current position
+        (the perft node count), for checking the move generator against known counts.  The game is left unchanged.
+        """
+        if depth <= 0:
+            return 1
+        side = SIDES[self._active_player]
+        if depth == 1:
+            # count the last ply without making the moves
+            return sum(1 for move in self._iter_legal_moves(side))
+        nodes = 0
+        for move in list(self._iter_legal_moves(side)):
+            self.push(move)
+            nodes += self.perft(depth - 1)
+            self.pop()
+        return nodes
+
+    def divide(self, depth):
+        """
+        Takes in a depth and returns a dictionary of the perft count below each legal move of the current position,
+        keyed by (from, to) algebraic notation tuples, for finding which move a wrong perft count comes from.
+        """
+        counts = {}
+        for move in self.generate_legal_moves():
+            self.push(move)
+            counts[(square_algebraic(move >> MOVE_SHIFT), square_algebraic(move & MOVE_MASK))] = self.perft(depth - 1)
+            self.pop()
+        return counts
+
+    def piece_at_location(self, location, indexNotation=False):
+        """
+        Returns GamePiece if at location, taken by default in algebraic notation, else returns None.
+        IndexNotation: parameter as True allows user to input index notation tuple instead (col, row)
+        """
+        # If location given in algebraic notation
+        if not indexNotation:
+            # check if location is within board boundaries
+            if not self.is_location_on_board(location):
+                return None
+            # convert algebraic notation into index notation
+            location = ConvertAlgebraicNotation(location)
+        # location is given in index notation, check if location is within board boundaries
+        elif not self.is_location_on_board(location, True):
+            return None
+        # check the board array for a piece before building the GamePiece view
+        if self._board[square_index(*location)] == EMPTY:
+            return None
+        return self.get_board_dictionary()[location]
+
+    def is_location_on_board(self, location, indexNotation=False):
+        """
+        Returns True if location is within the boundary of the board [10 rows by 9 cols], otherwise False.
+        Location by default is assumed to be in algebraic Notation.
+        IndexNotation: parameter as True allows user to input index notation tuple instead (col, row)
+        """
+        # If location is given in index notation
+        if indexNotation:
+            # get the column and row values from the location
+            col, row = location
+            # check that the column and row values are within the board boundary
+            if 0 <= col <= 8 and 0 <= row <= 9:
+                # location is within the board, return True
+                return True
+            else:
+                # location is outside of the board, Return False
+                return False
+        else:
+            # Location is given in algebraic notation
+            try:
+                # Try to convert input from algebraic Notation into index notation (col, row)
+                location = ConvertAlgebraicNotation(location)
+                # get the column and row values from the location
+                col, row = location
+                # check that the column and row values are within the board boundary
+                if 0 <= col <= 8 and 0 <= row <= 9:
+                    # location is within the board, return True
+                    return True
+                else:
+                    # location is outside of the board, Return False
+                    return False
+                # if user input is not in correct algebraic notation, raises Exception, print message, return False
+            except AlgebraicNotationAlphabetError:
+                self._console(NOTATION_ALPHABET_MESSAGE)
+                return False
+            except AlgebraicNotationDigitError:
+                self._console(NOTATION_DIGIT_MESSAGE)
+                return False
+
+    def _console(self, *message):
+        """Prints message to the console, unless the game is headless"""
+        if not self._headless:
+            print(*message)
+
+    def is_headless(self):
+        """Returns True if the game never prints to the console, otherwise False"""
+        return self._headless
+
+    def _notation_square(self, location):
+        """
+        Takes in a location in algebraic notation and returns a (square index, error message) tuple without printing.
+        The square is None if the location is not on the board, with the message of a notation error or None.
+        """
+        try:
+            col, row = ConvertAlgebraicNotation(location)
+        except AlgebraicNotationAlphabetError:
+            return None, NOTATION_ALPHABET_MESSAGE
+        except AlgebraicNotationDigitError:
+            return None, NOTATION_DIGIT_MESSAGE
+        if 0 <= col <= 8 and 0 <= row <= 9:
+            return square_index(col, row), None
+        return None, None
+
+    def show_board(self):
+        """Displays Xiangqi current instant of the board arrangement onto the console"""
+        # print title of board and column values in algebraic notation
+        print("Xiangqi board")
+        print("     a    b    c    d    e    f    g    h    i")
+        # for each row, go through each element and give piece objects a label
+        for row in range(0, 10):
+            # Start each row with an empty row list
+            rowList = []
+            for col in range(0, 9):
+                # for each element in each row, get the piece code at location
+                piece = self._board[square_index(col, row)]
+                if piece != EMPTY:
+                    # append the symbol associated with each piece type
+                    rowList.append(PIECE_SYMBOLS[piece & TYPE_MASK])
+                # For the locations that contain no piece, append a space to rowList
+                else:
+                    rowList.append(" ")
+            # print rowList to the console and move onto next row
+            if row < 9:
+                # to align board display for row 9 and below, add a space after row number
+                print(str(row + 1) + " ", rowList)
+            else:
+                print(str(row + 1), rowList)
+
+    def show_moves_on_board(self, targetLocation, indexNotation=False):
+        """
+        Displays current Xiangqi board arrangement and possible moves for piece at targetLocation,
+        defaulted to algebraic notation.
+        IndexNotation: parameter as True allows user to input index notation tuple instead (col, row)
+        """
+        # location is in algebraic notation
+        if not indexNotation:
+            # For locations not within the board boundaries, return without printing board
+            if not self.is_location_on_board(targetLocation):
+                return
+            else:
+                # convert algebraic notation to index notation
+                targetLocation = ConvertAlgebraicNotation(targetLocation)
+        # location is in index notation
+        else:
+            # For locations not within the board boundaries, return without printing board
+            if not self.is_location_on_board(targetLocation, True):
+                return
+
+        # check if target location contains a piece
+        target_square = square_index(*targetLocation)
+        target_piece = self._board[target_square]
+        if target_piece == EMPTY:
+            # not piece found at location, print error message and return without printing board
+            print("no target at location")
+            return
+        # A piece was found at the location, display board and possible moves
+        # print title of board and column values in algebraic notation
+        print("Xiangqi board")
+        print("     a    b    c    d    e    f    g    h    i")
+        # get the allowed moves of the piece at target location
+        targets_moves = self.get_piece_targets(target_square)
+        # initialize a list that will contain any pieces that could be captured
+        possible_captures = []
+        # for each row, go through each element and give piece objects a label
+        for row in range(0, 10):
+            # Start each row with an empty row list
+            rowList = []
+            for col in range(0, 9):
+                # for each element in each row, get the piece code at location
+                position = square_index(col, row)
+                piece = self._board[position]
+                # if location contains a piece
+                if piece != EMPTY:
+                    # allowed moves never land on the same team, so an occupied allowed move is a capture
+                    if position in targets_moves:
+                        # label a possible capture move with a 'X' symbol on board
+                        rowList.append("X")
+                        # add other piece to possible captures
+                        possible_captures.append(PIECE_NAMES[piece & TYPE_MASK])
+                    else:
+                        # position is not an allowed move, append the symbol associated with each piece type
+                        rowList.append(PIECE_SYMBOLS[piece & TYPE_MASK])
+                # For the locations that contain no piece, append a space to rowList
+                else:
+                    # if empty location is an allowed move for target, give it a '*' symbol
+                    if position in targets_moves:
+                        # add possible move symbol to rowList
+                        rowList.append("*")
+                    else:
+                        # location is empty and not an allowed move
+                        rowList.append(" ")
+            # print rowList to the console and move onto next row
+            if row < 9:
+                # to align board display for row 9 and below, add a space after row number
+                print(str(row + 1) + " ", rowList)
+            else:
+                print(str(row + 1), rowList)
+        # print to console the target piece color, name, and location
+        print(PLAYERS[target_piece >> 3], PIECE_NAMES[target_piece & TYPE_MASK], targetLocation)
+        # print possible capture list to console.
+        print("Possible captures:", possible_captures)
+
+    def play_game(self, continual_play=False):
+        """
+        Displays one round played by player, displaying baord, taking in location for making a move,
+        and input options to see possible moves and exit method if continual play is set to True
+        continual_play: By default, only plays one round, but set to True activates while loop
+        """
+        while continual_play:
+            # print options instructions to console each round
+            print("Type HELP anytime to see pieces possible moves or exit")
+            # prints current player's turn
+            print(self.get_active_player(), "player's turn:")
+            # prints a prompt for the first from location in make a move method
+            curLocation = input("from: ")
+            # check if user instead input the string 'help'
+            if curLocation.upper() == 'HELP':
+                # for the help options, print exit instructions for play_game
+                print("Type EXIT to exit active game")
+                # else user is prompted to input the location they would like to display possible moves
+                piece_location = input("Else, enter location of piece to see moves:")
+                # check if user instead input the string 'exit'
+                if piece_location.upper() == 'EXIT':
+                    # set continual play to false, then bypass rest of code and jump out of while loop
+                    continual_play = False
+                    continue
+                else:
+                    # user input a target location to see possible moves, display moves
+                    self.show_moves_on_board(piece_location)
+                    # bypass rest of code, restart while loop
+                    continue
+            else:
+                # user has input the from location, prompt user to input to location
+                nexLocation = input("To: ")
+                # check if input here was the string 'help'
+                if nexLocation.upper() == 'HELP':
+                    # for the help options, print exit instructions for play_game
+                    print("Type EXIT to exit active game")
+                    # else user is prompted to input the location they would like to display possible moves
+                    piece_location = input("Else, enter location of piece to see moves:")
+                    # check if user instead input the string 'exit'
+                    if piece_location.upper() == 'EXIT':
+                        # set continual play to false, then bypass rest of code and jump out of while loop
+                        continual_play = False
+                        continue
+                    else:
+                        # user input a target location to see possible moves, display moves
+                        self.show_moves_on_board(piece_location)
+                        # bypass rest of code, restart while loop
+                        continue
+                else:
+                    # user input both from and to locations, execute make move method and show board
+                    for message in self.make_move_result(curLocation, nexLocation).get_messages():
+                        print(message)
+                    self.show_board()
+                    # print the current check status of the two players
+                    print("red checked:", self.is_in_check("red"))
+                    print("black checked:", self.is_in_check("black"))
+                    # print the current game state
+                    print(self.get_game_state())
+
+    def get_game_state(self):
+        """Returns the game state.  It should be either 'UNFINSHED', 'RED_WON', 'BLACK_WON' or 'DRAW'"""
+        return self._game_state
+
+    def get_gamelog(self):
+        """
+        Returns the game play log, a sequence with one entry per turn.  Entries are dictionaries of the turn,
+        state, player, opponent, board dictionary, generals and hash, built only when an entry is read.
+        Moves made with push since the last logged move are logged first.
+        """
+        self._sync_log()
+        return self._game_log
+
+    def get_active_player(self):
+        """Returns the active player whose turn it is"""
+        return self._active_player
+
+    def get_other_player(self):
+        """Returns the other player of the game"""
+        return self._other_player
+
+    def get_players_general(self, player):
+        """Takes a player as 'red' or 'black' (not case-sensitive) and returns their General object"""
+        try:
+            # make user input not case-sensitive
+            player = player.upper()
+            # check that user entered a player name found in Xiangqi Game
+            if player in SIDES:
+                # get that players general from the board dictionary view
+                location = SQUARE_LOCATIONS[self._general_squares[SIDES[player]]]
+                return self.get_board_dictionary()[location]
+            else:
+                raise InvalidPlayerError
+        except InvalidPlayerError:
+            self._console("Invalid Player Parameter: player parameter must be 'red' or 'black', not case-sensitive")
+
+    def enable_stats(self):
+        """
+        Turns on instrumentation of the INSTRUMENTED_METHODS: each call is counted and timed (including the time of
+        instrumented calls it makes) and passed to the stats callbacks.  The methods are replaced on this game
+        instance only, so a game without stats enabled runs the plain methods with no instrumentation cost.
+        """
+        if self._stats_enabled:
+            return
+        self._stats_enabled = True
+        for name in INSTRUMENTED_METHODS:
+            # an instance attribute shadows the class method until disable_stats deletes it
+            setattr(self, name, self._instrument(name, getattr(self, name)))
+
+    def disable_stats(self):
+        """Turns off instrumentation, restoring the plain methods.  The stats collected so far are kept."""
+        if not self._stats_enabled:
+            return
+        self._stats_enabled = False
+        for name in INSTRUMENTED_METHODS:
+            delattr(self, name)
+
+    def _instrument(self, name, method):
+        """Returns a function calling method that counts and times each call under its stat name"""
+        stats = self._stats
+        callbacks = self._stats_callbacks
+
+        def instrumented(*args):
+            start = time.perf_counter()
+            try:
+                return method(*args)
+            finally:
+                elapsed = time.perf_counter() - start
+                if name == "get_allowed_moves":
+                    # allowed_move is counted by piece type
+                    stat_name = "allowed_move[" + PIECE_NAMES.get(self._board[args[0]] & TYPE_MASK, "empty") + "]"
+                else:
+                    stat_name = STAT_NAMES.get(name, name)
+                entry = stats.get(stat_name)
+                if entry is None:
+                    entry = stats[stat_name] = [0, 0.0]
+                entry[0] += 1
+                entry[1] += elapsed
+                for callback in callbacks:
+                    callback(stat_name, elapsed)
+        return instrumented
+
+    def is_stats_enabled(self):
+        """Returns True if instrumentation is turned on, otherwise False"""
+        return self._stats_enabled
+
+    def get_stats(self):
+        """
+        Returns a snapshot of the instrumentation stats, a dictionary by stat name ('make_move', 'is_in_check',
+        'is_in_check_mate', 'update_log' and 'allowed_move[piece name]') of {'calls': count, 'seconds': total time}
+        """
+        return {name: {"calls": calls, "seconds": seconds} for name, (calls, seconds) in self._stats.items()}
+
+    def reset_stats(self):
+        """Sets every instrumentation count and time back to zero"""
+        self._stats.clear()
+
+    def add_stats_callback(self, callback):
+        """
+        Takes in a function to call with (stat name, seconds) after every instrumented call while stats are enabled,
+        for sending the timings to a metrics system
+        """
+        self._stats_callbacks.append(callback)
+
+    def remove_stats_callback(self, callback):
+        """Takes in a function added by add_stats_callback and stops calling it"""
+        self._stats_callbacks.remove(callback)
+
+    def __getstate__(self):
+        """
+        Returns the game's data members for pickling (copying the game to another process).  The instrumented
+        methods and callbacks are functions that can't be pickled, so the copy starts with stats disabled.
+        """
+        state = self.__dict__.copy()
+        for name in INSTRUMENTED_METHODS:
+            state.pop(name, None)
+        state["_stats"] = dict((name, list(entry)) for name, entry in self._stats.items())
+        state["_stats_callbacks"] = []
+        state["_stats_enabled"] = False
+        return state
+
+    def get_board_array(self):
+        """Returns the XiangqiGame board array of piece codes, indexed by square = row * 9 + col"""
+        return self._board
+
+    def set_board_array(self, board, player="RED", halfmove=0, fullmove=1):
+        """
+        Takes in a board of 90 piece codes, indexed by square = row * 9 + col, and the player to move ('red' or
+        'black'), and sets the game to that position.  Each side must have exactly one general.
+        halfmove, fullmove: FEN halfmove clock and fullmove number of the position.
+        The game log restarts from the position and the game state is worked out, a player with no legal move lost.
+        """
+        side = SIDES[player.upper()]
+        self._start_halfmove = halfmove
+        self._start_fullmove = fullmove
+        self._load_position(board, side, "UNFINISHED", 0, halfmove)
+        # the game is already over if the player to move has no legal move
+        status = self._position_status(side)
+        if status == CHECKMATE or status == STALEMATE:
+            self._game_state = self._other_player + "_WON"
+        # restart the game log from this position
+        self._game_log = None
+        self.update_log()
+
+    def load_board_array(self, board, player="RED"):
+        """
+        Takes in a board of 90 piece codes and the player to move ('red' or 'black') and sets the game to that
+        position without working out the game state or restarting the game log, for tools that only generate
+        moves from many positions, such as tablebase generation.  The game state is UNFINISHED and the game log is
+        left as it was, use set_board_array to play a game from the position.
+        """
+        self._load_position(board, SIDES[player.upper()], "UNFINISHED")
+
+    def get_board_dictionary(self):
+        """
+        Returns a dictionary view of the board, where keys are (col, row) locations and GamePieces are values.
+        The view is built from the board array and cached until the board changes, editing it does not move pieces.
+        """
+        if self._board_view is None:
+            self._board_view = build_board_dictionary(self._board)
+        return self._board_view
+
+
+class MoveStatus(Enum):
+    """Outcome of a make_move call, see MoveResult"""
+    ILLEGAL_NOTATION = "illegal-notation"
+    EMPTY_SQUARE = "empty-square"
+    WRONG_SIDE = "wrong-side"
+    ILLEGAL_PIECE_MOVE = "illegal-piece-move"
+    LEAVES_IN_CHECK = "leaves-in-check"
+    GAME_OVER = "game-over"
+    MOVED = "moved"
+    CAPTURED = "captured"
+    CHECKMATE = "checkmate"
+    REPETITION = "repetition"
+
+
+class MoveResult:
+    """
+    Represents the result of a make_move_result call: the MoveStatus, the player and piece involved, the piece
+    captured and the game state after the call.  The console messages of make_move are only built on request.
+    """
+
+    def __init__(self, status, player, piece=None, captured=None, game_state=None, in_check=False, message=None,
+                 repetition=None):
+        """
+        Initialize the result with its MoveStatus and the player whose piece was selected (the owner of the piece
+        for WRONG_SIDE), the name of that piece, the name of the piece captured, the game state, whether the player
+        was in check (for LEAVES_IN_CHECK), the notation error message (for ILLEGAL_NOTATION) and the kind of
+        repetition adjudicated (for REPETITION)
+        """
+        self._status = status
+        self._player = player
+        self._piece = piece
+        self._captured = captured
+        self._game_state = game_state
+        self._in_check = in_check
+        self._message = message
+        self._repetition = repetition
+
+    def get_status(self):
+        """Returns the MoveStatus of the result"""
+        return self._status
+
+    def is_made(self):
+        """Returns True if the move was made, otherwise False"""
+        return self._status in (MoveStatus.MOVED, MoveStatus.CAPTURED, MoveStatus.CHECKMATE, MoveStatus.REPETITION)
+
+    def __bool__(self):
+        """A result is true if the move was made"""
+        return self.is_made()
+
+    def get_player(self):
+        """Returns the player whose piece was selected, or the owner of the piece for WRONG_SIDE"""
+        return self._player
+
+    def get_piece(self):
+        """Returns the name of the piece selected, or None"""
+        return self._piece
+
+    def get_captured(self):
+        """Returns the name of the piece captured by the move, or None"""
+        return self._captured
+
+    def get_game_state(self):
+        """Returns the game state after the call, or None if the move was rejected before the game state was read"""
+        return self._game_state
+
+    def get_repetition(self):
+        """Returns the kind of repetition adjudicated, PERPETUAL_CHECK, PERPETUAL_CHASE or REPETITION, or None"""
+        return self._repetition
+
+    def get_messages(self):
+        """Returns the list of console messages describing the result, as printed by make_move"""
+        messages = []
+        if self._status == MoveStatus.ILLEGAL_NOTATION:
+            if self._message is not None:
+                messages.append(self._message)
+            return messages
+        if self._status == MoveStatus.EMPTY_SQUARE:
+            return ["current position contains no pieces"]
+        if self._status == MoveStatus.WRONG_SIDE:
+            return ["Incorrect Piece: Location contains a " + self._player + " " + self._piece]
+        if self._piece is not None:
+            messages.append("Selected " + self._player + " " + self._piece)
+        if self._status == MoveStatus.ILLEGAL_PIECE_MOVE:
+            messages.append(self._piece + " is not allowed to move there")
+        elif self._status == MoveStatus.LEAVES_IN_CHECK:
+            if self._in_check:
+                messages.append("Invalid Move: general is in check.")
+            else:
+                messages.append("Invalid Move: general would be in check.")
+        elif self._status == MoveStatus.GAME_OVER or self._status == MoveStatus.CHECKMATE:
+            messages.append(self._game_state)
+        elif self._status == MoveStatus.REPETITION:
+            messages.append(self._piece + " was moved")
+            messages.append(self._repetition.lower().replace("_", " ") + ": " + self._game_state)
+        elif self._status == MoveStatus.CAPTURED:
+            messages.append(self._captured + " was captured")
+        else:
+            messages.append(self._piece + " was moved")
+        return messages
+
+    def __repr__(self):
+        """Returns a one line summary of the result"""
+        return "MoveResult(" + self._status.value + ", " + "; ".join(self.get_messages()) + ")"
+
+
+class GameLog:
+    """
+    Represents the game play log of a XiangqiGame as move deltas with periodic board keyframes.
+    Each turn after the first is stored as one packed integer (move, captured piece code, game state after the move)
+    with the position hash of every turn, and a full board keyframe is kept every KEYFRAME_INTERVAL turns, so any
+    turn is rebuilt by replaying at most KEYFRAME_INTERVAL - 1 moves and its repetition history from the hashes.
+    Reading an entry returns the dictionary format of the original deep-copied log, built on request.
+    """
+
+    def __init__(self, board, side, state, position_hash, halfmove=0):
+        """
+        Initialize the log with the starting position as turn 1: board piece codes, side to move, state, hash
+        and halfmove clock (moves since the last capture)
+        """
+        # packed move deltas, the delta of turn t is at index t - 2
+        self._deltas = array('I')
+        # position hash of each turn, the hash of turn t is at index t - 1
+        self._hashes = array('Q', [position_hash])
+        # keyframes as (turn, board bytes, side to move, state code, hash, halfmove clock),
+        # one every KEYFRAME_INTERVAL turns
+        self._keyframes = [(1, bytes(board), side, GAME_STATES.index(state), position_hash, halfmove)]
+
+    def __len__(self):
+        """Returns the number of turns in the log"""
+        return len(self._deltas) + 1
+
+    def append(self, move, captured, state, position_hash):
+        """
+        Appends a turn: the move integer made, the piece code it captured, the game state and the position hash
+        after the move
+        """
+        self._deltas.append(move | captured << 14 | GAME_STATES.index(state) << 18)
+        self._hashes.append(position_hash)
+        turn = len(self._deltas) + 1
+        if turn % KEYFRAME_INTERVAL == 1:
+            # replay from the last keyframe once to store the next one
+            self._keyframes.append(self._rebuild(turn))
+
+    def truncate(self, turn):
+        """Removes every turn after turn from the log"""
+        del self._deltas[max(turn - 1, 0):]
+        del self._hashes[max(turn, 1):]
+        while self._keyframes[-1][0] > turn:
+            self._keyframes.pop()
+
+    def get_delta(self, turn):
+        """Returns the (move, captured piece code, state code) tuple of how turn was reached from the turn before"""
+        delta = self._deltas[turn - 2]
+        return delta & 0x3fff, delta >> 14 & 15, delta >> 18 & 3
+
+    def get_hash(self, turn):
+        """Returns the position hash of turn"""
+        return self._hashes[turn - 1]
+
+    def get_keyframe(self, turn):
+        """
+        Returns the latest keyframe at or before turn as (turn, board bytes, side to move, state code, hash,
+        halfmove clock)
+        """
+        return self._keyframes[min((turn - 1) // KEYFRAME_INTERVAL, len(self._keyframes) - 1)]
+
+    def _rebuild(self, turn):
+        """Replays the deltas from the nearest keyframe and returns turn as a keyframe tuple"""
+        keyframe_turn, board, side, state_code, position_hash, halfmove = self.get_keyframe(turn)
+        board = bytearray(board)
+        for log_turn in range(keyframe_turn + 1, turn + 1):
+            move, captured, state_code = self.get_delta(log_turn)
+            halfmove = 0 if captured else halfmove + 1
+            from_square = move >> MOVE_SHIFT
+            to_square = move & MOVE_MASK
+            board[to_square] = board[from_square]
+            board[from_square] = EMPTY
+            side = 1 - side
+        return turn, bytes(board), side, state_code, self._hashes[turn - 1], halfmove
+
+    def __getitem__(self, index):
+        """Returns the log entry of a turn by list index (turn - 1), in the dictionary format of the original log"""
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("game log index out of range")
+        turn, board, side, state_code, position_hash, halfmove = self._rebuild(index + 1)
+        view = build_board_dictionary(board)
+        return {
+            'turn': turn,
+            'state': GAME_STATES[state_code],
+            'player': PLAYERS[side],
+            'opponent': PLAYERS[1 - side],
+            'board': view,
+            'generals': {"RED": view[SQUARE_LOCATIONS[board.index(GENERAL)]],
+                         "BLACK": view[SQUARE_LOCATIONS[board.index(GENERAL | BLACK_BIT)]]},
+            'hash': position_hash}
+
+    def __iter__(self):
+        """Yields the log entries in turn order"""
+        for index in range(len(self)):
+            yield self[index]
+
+
+class GamePiece:
+    """Represents a game piece in Xiangqi with name, player, symbol, location, and capture status"""
+
+    def __init__(self, player, pieceName, symbol, location):
+        """Initialize player and location to none until assigned"""
+        self._pieceName = pieceName
+        self._player = player
+        self._symbol = symbol
+        self._location = location
+        self._captured = False
+
+    def allowed_move(self, GameInstance):
+        """
+        Takes in a XiangqiGame Instance and returns the index notation of the GamePiece's available moves.
+        Move generation is done by the game's board array, see XiangqiGame.get_allowed_moves.
+        Parameter: XiangqiGame class instance
+        Returns: List of location tuples (col, row) of GamePiece's allowed moves
+        """
+        targets = GameInstance.get_allowed_moves(square_index(*self._location))
+        return [SQUARE_LOCATIONS[target] for target in targets]
+
+    def get_pieceSymbol(self):
+        """Returns the symbol given to the GamePiece"""
+        return self._symbol
+
+    def get_pieceName(self):
+        """Returns the name of the GamePiece"""
+        return self._pieceName
+
+    def get_location(self):
+        """Returns the location of the Gamepiece"""
+        return self._location
+
+    def set_location(self, location):
+        """Sets location of GamePiece"""
+        self._location = location
+
+    def captured(self):
+        """Game Piece has been captured, reset location to None and set captured status as True"""
+        self._location = None
+        self._captured = True
+
+    def is_captured(self):
+        """Return True if piece is captured, otherwise False."""
+        return self._captured
+
+    def get_player(self):
+        """Get player who owns the piece"""
+        return self._player
+
+    def set_player(self, player):
+        """Set the player who will own the piece"""
+        self._player = player
+
+
+class General(GamePiece):
+    """Represents General in Xiangqi, subclass of GamePiece"""
+
+    def __init__(self, player, location):
+        """Initialize General as GamePiece with player, name, symbol, and location"""
+        super().__init__(player, "general", "G", location)
+
+    def in_palace(self, location):
+        """
+        Takes in a location in index notation.
+        Returns True if location is in the player's palace, otherwise False
+        Restriction: does not handle algebraic notation
+        """
+        col, row = location
+        return in_palace(col, row, SIDES[self._player])
+
+    def flying_general(self, GameInstance):
+        """
+        Takes in a XiangqiGame object instance, returns True if general can capture other general, otherwise False.
+        """
+        # the other general's square is one of the general's targets only by the 'flying general' move
+        other_square = GameInstance.get_board_array().index(GENERAL | (BLACK_BIT if self._player == "RED" else 0))
+        return other_square in GameInstance.get_piece_targets(square_index(*self._location))
+
+
+class Advisor(GamePiece):
+    """Represents Advisor in Xiangqi, subclass of GamePiece"""
+
+    def __init__(self, player, location):
+        """Initialize Advisor as GamePiece with player, name, symbol, and location"""
+        super().__init__(player, "advisor", "A", location)
+
+    def in_palace(self, location):
+        """
+        Takes in a location in index notation.
+        Returns True if location is in the player's palace, otherwise False
+        Restriction: does not handle algebraic notation
+        """
+        col, row = location
+        return in_palace(col, row, SIDES[self._player])
+
+
+class Elephant(GamePiece):
+    """Represents Elephant in Xiangqi, subclass of GamePiece"""
+
+    def __init__(self, player, location):
+        """Initialize Elephant as GamePiece with player, name, symbol, and location"""
+        super().__init__(player, "elephant", "E", location)
+
+
+class Horse(GamePiece):
+    """Represents Horse in Xiangqi, subclass of GamePiece"""
+
+    def __init__(self, player, location):
+        """Initialize Horse as GamePiece with player, name, symbol, and location"""
+        super().__init__(player, "horse", "H", location)
+
+
+class Chariot(GamePiece):
+    """Represents Chariot in Xiangqi, subclass of GamePiece"""
+
+    def __init__(self, player, location):
+        """Initialize Chariot as GamePiece with player, name, symbol, and location"""
+        super().__init__(player, "chariot", "C", location)
+
+
+class Cannon(GamePiece):
+    """Represents Cannon in Xiangqi, subclass of GamePiece"""
+
+    def __init__(self, player, location):
+        """Initialize Cannon as GamePiece with player, name, symbol, and location"""
+        super().__init__(player, "cannon", "O", location)
+
+
+class Soldier(GamePiece):
+    """Represents Soldier in Xiangqi, subclass of GamePiece"""
+
+    def __init__(self, player, location):
+        """Initialize Soldier as GamePiece with player, name, symbol, and location"""
+        super().__init__(player, "soldier", "S", location)
+
+
+# GamePiece class of each piece type, used to build the board dictionary view
+PIECE_CLASSES = {GENERAL: General, ADVISOR: Advisor, ELEPHANT: Elephant, HORSE: Horse,
+                 CHARIOT: Chariot, CANNON: Cannon, SOLDIER: Soldier}
+
+
+def build_board_dictionary(board):
+    """
+    Takes a board array of piece codes and returns the board dictionary of it,
+    where keys are (col, row) locations and GamePieces are values
+    """
+    view = {}
+    for square, piece in enumerate(board):
+        if piece != EMPTY:
+            location = SQUARE_LOCATIONS[square]
+            view[location] = PIECE_CLASSES[piece & TYPE_MASK](PLAYERS[piece >> 3], location)
+    return view
+
+
+def ConvertAlgebraicNotation(location):
+    """
+    Takes simple algebraic notation (letter/number string only) and Returns column and row index values as a tuple.
+    Algebraic Notation example: 'a1' would return (0, 0)"
+    """
+    # verify input is converted into string
+    location = str(location)
+    # Set first value as variable storing alphabet coordinate
+    letter_coord = location[0]
+    # Set rest of values as variable storing number corrdinate
+    number_coord = location[1:]
+    # check that the letter coordinate is indeed a letter
+    if letter_coord.isalpha():
+        # convert letter coordinate to column index representation, starting with 'a' = 0, 'b' = 1, ect
+        alphabet = "abcdefghijklmnopqrstuvwxyz"
+        column = alphabet.index(letter_coord.lower())
+    else:
+        raise AlgebraicNotationAlphabetError
+    # check that the number coordinate only contains digits
+    if location[1:].isdigit():
+        # convert number coordinate to row index representation, starting with "1" = 0, "2" = 1, ect.
+        row = int(number_coord) - 1
+    else:
+        raise AlgebraicNotationDigitError
+    # Return algebraic notation values as a tuple: (column, row)
+    return column, row
+
+
+class AlgebraicNotationAlphabetError(Exception):
+    """Raised when first value of algebraic notation for a location is not a alphabet letter"""
+    pass
+
+
+class AlgebraicNotationDigitError(Exception):
+    """Raised when number value of algebraic notation for a location is not only digit values"""
+    pass
+
+
+class InvalidFenError(Exception):
+    """Raised when a position in FEN can't be read"""
+    pass
+
+
+class InvalidPlayerError(Exception):
+    """Raised when player parameter is incorrect, must be 'red' or 'black'"""
+    pass
+
+
+def main():
+    """Testing functionality"""
+    game = XiangqiGame()
+    #try:
+    #    import tkinter as tk
+    #    print("Tkinker import success")
+    #    window = tk.Tk()
+    #    window.title("Xiangqi")
+    #    window.geometry("400x300")
+    #    window.start = tk.Button()
+    #    window.start["text"] = "PLAY GAME"
+    #    window.start.pack(side="bottom")
+
+    #    window.mainloop()
+
+    #except ImportError:
+    #    print("tkinter import failed")
+    # print("Default to Terminal Interface...")
+    game.show_board()
+    print("Type PLAY to begin Xiangqi Game")
+    make_play = input()
+    # not typing play bypasses play option, goes to test code instead
+    if make_play.upper() == 'PLAY':
+        game.play_game(True)
+
+
+    # insert other testing code here
+
+    # Designer's temporary test code:
+    # removed soldiers temporarily to test in check method
+    # game.make_move("d1", "e2")
+    # game.make_move("a10", "a9")
+    # game.make_move("a1", "a2")
+    # game.make_move("a9", "e9")
+    # game.make_move("a2", "a3")
+    # game.make_move("e9", "e2")
+    # says red general is not allowed to move (0, 3)
+    # game.make_move("e1", "d1") # make_move also shows location updated before is_in_check when print() inserted
+    # print(game.is_in_check("red"))
+    # print(game.get_board_dictionary()) # general location is correct in dictionary
+    # # says move is not in allowed moves of general, check general attributes
+    # general = game.piece_at_location("e1") # match dictionary location
+    # print(general.get_location()) # general location matches game board dictionary
+    # same_general = game.get_players_general("red") # check program is referring to same object
+    # print(general is same_general) # same general object referred to within in_check method
+    # print(general.allowed_move(game))  # check allowed moves of general
+    # # location "d1" aka (3, 0) is in allowed moves
+    # # Note: When make_move happens, it updated board to new location before checking is_in_check,
+    # #       if is_in_check with updated is true, method resets locations to original locations.
+    # #       General is already at "d1" when checking for "in-check", so should not be returning True.
+    # #       Check 'is_in_check' method.
+    # general.set_location((3, 0))
+    # boardPieces = game.get_board_dictionary()
+    # boardPieces[(3, 0)] = general
+    # del boardPieces[(4, 0)]
+    # print(boardPieces)
+    # game.show_board()
+    # # insert print(piece) in is_in_check just before returning True, to get the piece checking the general
+    # game.make_move("a3", "a4")
+    # # checking piece: <__main__.General object at 0x033329B0> "memory address matches black general"
+    # # check black generals allowed moves
+    # blk_general = boardPieces[(4, 9)]
+    # print(blk_general.allowed_move(game)) # FIXED: is_in_check did not check if move of piece contained same team
+    # game.show_board()
+
+    # remove all black pieces except general, test is_in_check_mate
+    # game.make_move("b3", "e3")
+    # print(game.is_in_check_mate("black"))
+    # game.make_move("e10", "d10")
+    # print(game.is_in_check_mate("black"))
+    # game.make_move("a1", "a2")
+    # print(game.is_in_check_mate("black"))
+    # game.make_move("d10", "d9")
+    # print(game.is_in_check_mate("black"))
+    # game.make_move("a2", "d2")
+    # print(game.is_in_check_mate("black"))
+    # game.make_move("d9", "e9") # FIXED: Seems to work!
+    
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,745 @@
+# Project: CS 162 Portfolio Project
+# Author: Christopher Eckerson
+# Description: Unit tests of the Xiangqi Game, run with: python -m unittest test_XiangqiGame
+import gc
+import io
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+from array import array
+from multiprocessing import shared_memory
+from XiangqiGame import *
+from xiangqiAI import *
+from xiangqiRecords import GameRecord, RecordError, ICCS, WXF, read_games, write_games
+from xiangqiArchive import Archive, ArchiveWriter, ArchiveError
+import xiangqiIndex
+from xiangqiIndex import PositionIndex, IndexFileError, build_index
+from xiangqiBook import OpeningBook, BookError, build_book
+from xiangqiTablebase import Tablebase, Tablebases, TablebaseError, generate_tablebase, WIN, LOSS, DRAW, \
+    INVALID_VALUE, TABLEBASE_EXTENSION
+
+
+def algebraic_move(currentPosition, nextPosition):
+    """Takes two algebraic notation locations and returns the move integer between them"""
+    return encode_move(square_index(*ConvertAlgebraicNotation(currentPosition)),
+                       square_index(*ConvertAlgebraicNotation(nextPosition)))
+
+
+class TestGameLog(unittest.TestCase):
+    """Tests that the game log follows moves made by make_move and by push"""
+
+    def test_push_then_make_move_is_logged(self):
+        """A move made with push before make_move is in the log, seek and undo go through it"""
+        game = XiangqiGame(headless=True)
+        game.push(algebraic_move("h3", "e3"))
+        self.assertTrue(game.make_move("h10", "g8"))
+        self.assertEqual(len(game.get_gamelog()), 3)
+        after_push = "rnbakabnr/9/1c5c1/p1p1p1p1p/9/9/P1P1P1P1P/1C2C4/9/RNBAKABNR b"
+        game.seek(2)
+        self.assertTrue(game.to_fen().startswith(after_push))
+        game.seek(3)
+        self.assertTrue(game.sync_to_last_log())
+        self.assertTrue(game.to_fen().startswith(after_push))
+        self.assertTrue(game.sync_to_last_log())
+        self.assertTrue(game.to_fen().startswith(START_FEN.split()[0] + " w"))
+        self.assertFalse(game.sync_to_last_log())
+
+    def test_pop_of_logged_move_then_make_move(self):
+        """Taking back a logged move with pop leaves the log consistent for the next make_move"""
+        game = XiangqiGame(headless=True)
+        self.assertTrue(game.make_move("h3", "e3"))
+        game.pop()
+        self.assertTrue(game.make_move("b3", "e3"))
+        self.assertEqual(len(game.get_gamelog()), 2)
+        game.seek(1)
+        game.seek(2)
+        self.assertEqual(game.get_position_hash(), game.get_gamelog()[1]['hash'])
+
+    def test_seek_keeps_repetition_history(self):
+        """Seek rebuilds the repetition history before the keyframe from the log, without replaying past it"""
+        game = XiangqiGame(headless=True)
+        cycle = [algebraic_move("b1", "c3"), algebraic_move("b10", "c8"),
+                 algebraic_move("c3", "b1"), algebraic_move("c8", "b10")]
+        for repeat in range(10):
+            for move in cycle:
+                game.push(move)
+        game.seek(KEYFRAME_INTERVAL + 1)
+        self.assertEqual(len(game._undo_stack), 0)
+        self.assertEqual(game.get_repetition_count(), 9)
+        self.assertEqual(game.get_repetition_cycle(), cycle)
+        game.seek(len(game.get_gamelog()))
+        self.assertLess(len(game._undo_stack), KEYFRAME_INTERVAL)
+        self.assertEqual(game.get_repetition_count(), 11)
+        self.assertEqual(game.classify_repetition(), (REPETITION, None))
+
+
+class TestFen(unittest.TestCase):
+    """Tests the FEN move numbers after moves made by make_move and by push"""
+
+    def test_push_then_to_fen(self):
+        """Moves made with push count in the halfmove clock and fullmove number"""
+        game = XiangqiGame.from_fen(START_FEN.split()[0] + " w - - 4 7", headless=True)
+        game.push(algebraic_move("h3", "e3"))
+        self.assertTrue(game.to_fen().endswith(" b - - 5 7"))
+        game.push(algebraic_move("h10", "g8"))
+        self.assertTrue(game.to_fen().endswith(" w - - 6 8"))
+        game.push(algebraic_move("e3", "e7"))
+        self.assertTrue(game.to_fen().endswith(" b - - 0 8"))
+        game.pop()
+        self.assertTrue(game.to_fen().endswith(" w - - 6 8"))
+
+    def test_make_move_then_push_to_fen(self):
+        """The clocks follow a push made after logged moves, and seek restores them"""
+        game = XiangqiGame(headless=True)
+        self.assertTrue(game.make_move("h3", "e3"))
+        self.assertTrue(game.make_move("h10", "g8"))
+        game.push(algebraic_move("e3", "e7"))
+        self.assertTrue(game.to_fen().endswith(" b - - 0 2"))
+        game.seek(3)
+        self.assertTrue(game.to_fen().endswith(" w - - 2 2"))
+        game.seek(4)
+        self.assertTrue(game.to_fen().endswith(" b - - 0 2"))
+
+
+class TestMoveResult(unittest.TestCase):
+    """Tests each MoveStatus returned by make_move_result, and that rejected moves leave the game unchanged"""
+
+    # the red chariot on e2 is pinned to the red general by the black chariot on e9
+    PINNED_FEN = "3k5/4r4/9/9/9/9/9/9/4R4/4K4 w - - 0 1"
+
+    def check_rejected(self, game, currentPosition, nextPosition, status):
+        """Makes the move with make_move_result, checks it is rejected with status and returns the result"""
+        fen = game.to_fen()
+        result = game.make_move_result(currentPosition, nextPosition)
+        self.assertEqual(result.get_status(), status)
+        self.assertFalse(result.is_made())
+        self.assertEqual(game.to_fen(), fen)
+        return result
+
+    def test_illegal_notation(self):
+        """A location that isn't on the board or isn't algebraic notation is rejected"""
+        game = XiangqiGame(headless=True)
+        self.check_rejected(game, "z1", "a2", MoveStatus.ILLEGAL_NOTATION)
+        self.check_rejected(game, "a1", "a11", MoveStatus.ILLEGAL_NOTATION)
+        result = self.check_rejected(game, "a1", "ab", MoveStatus.ILLEGAL_NOTATION)
+        self.assertEqual(result.get_messages(), [NOTATION_DIGIT_MESSAGE])
+
+    def test_empty_square(self):
+        """A move from a square with no piece is rejected"""
+        game = XiangqiGame(headless=True)
+        self.check_rejected(game, "e5", "e6", MoveStatus.EMPTY_SQUARE)
+
+    def test_wrong_side(self):
+        """A move of the other player's piece is rejected, naming the piece's owner"""
+        game = XiangqiGame(headless=True)
+        result = self.check_rejected(game, "a10", "a9", MoveStatus.WRONG_SIDE)
+        self.assertEqual(result.get_player(), "BLACK")
+        self.assertEqual(result.get_piece(), "chariot")
+
+    def test_illegal_piece_move(self):
+        """A move the piece's rules don't allow is rejected"""
+        game = XiangqiGame(headless=True)
+        self.check_rejected(game, "a1", "b2", MoveStatus.ILLEGAL_PIECE_MOVE)
+
+    def test_leaves_in_check(self):
+        """A move that leaves the mover's general in check is rejected"""
+        game = XiangqiGame.from_fen(self.PINNED_FEN, headless=True)
+        result = self.check_rejected(game, "e2", "d2", MoveStatus.LEAVES_IN_CHECK)
+        self.assertEqual(result.get_messages()[-1], "Invalid Move: general would be in check.")
+        # an advisor move that doesn't block the horse leaves the general in check
+        game = XiangqiGame.from_fen("3k5/9/9/9/9/9/9/2n6/4A4/3K5 w - - 0 1", headless=True)
+        result = self.check_rejected(game, "e2", "f3", MoveStatus.LEAVES_IN_CHECK)
+        self.assertEqual(result.get_messages()[-1], "Invalid Move: general is in check.")
+
+    def test_moved_and_captured(self):
+        """A quiet move is MOVED and a capture is CAPTURED, naming the piece taken"""
+        game = XiangqiGame.from_fen(self.PINNED_FEN, headless=True)
+        self.assertEqual(game.make_move_result("e2", "e3").get_status(), MoveStatus.MOVED)
+        result = game.make_move_result("e9", "e3")
+        self.assertEqual(result.get_status(), MoveStatus.CAPTURED)
+        self.assertEqual(result.get_captured(), "chariot")
+        self.assertEqual(result.get_player(), "BLACK")
+
+    def test_checkmate_then_game_over(self):
+        """The mating move is CHECKMATE and every move after it is GAME_OVER"""
+        game = XiangqiGame.from_fen(TestSearch.MATE_IN_ONE_FEN, headless=True)
+        result = game.make_move_result("b1", "d1")
+        self.assertEqual(result.get_status(), MoveStatus.CHECKMATE)
+        self.assertEqual(result.get_game_state(), "RED_WON")
+        result = self.check_rejected(game, "d10", "e10", MoveStatus.GAME_OVER)
+        self.assertEqual(result.get_game_state(), "RED_WON")
+
+    def test_repetition(self):
+        """The move that repeats the position too often is REPETITION and ends the game in a draw"""
+        game = XiangqiGame(headless=True)
+        cycle = [("b1", "c3"), ("b10", "c8"), ("c3", "b1"), ("c8", "b10")]
+        statuses = [game.make_move_result(*move).get_status() for repeat in range(2) for move in cycle]
+        self.assertEqual(statuses, [MoveStatus.MOVED] * 7 + [MoveStatus.REPETITION])
+        self.assertEqual(game.get_game_state(), "DRAW")
+
+
+class TestStats(unittest.TestCase):
+    """Tests the optional per-method call counts and timings"""
+
+    def test_stats_count_make_move(self):
+        """Enabled stats count the make_move calls and the checks they make, disabled stats stop counting"""
+        game = XiangqiGame(headless=True)
+        self.assertFalse(game.is_stats_enabled())
+        game.enable_stats()
+        self.assertTrue(game.make_move("h3", "e3"))
+        self.assertFalse(game.make_move("h10", "h11"))
+        stats = game.get_stats()
+        self.assertEqual(stats["make_move"]["calls"], 2)
+        self.assertEqual(stats["update_log"]["calls"], 1)
+        self.assertGreaterEqual(stats["allowed_move[cannon]"]["calls"], 1)
+        self.assertGreaterEqual(stats["is_in_check"]["calls"], 1)
+        self.assertGreaterEqual(stats["make_move"]["seconds"], stats["update_log"]["seconds"])
+        game.disable_stats()
+        self.assertTrue(game.make_move("h10", "g8"))
+        self.assertEqual(game.get_stats()["make_move"]["calls"], 2)
+        game.reset_stats()
+        self.assertEqual(game.get_stats(), {})
+
+    def test_stats_callback(self):
+        """A stats callback is called with the stat name and time of every instrumented call until it is removed"""
+        game = XiangqiGame(headless=True)
+        calls = []
+
+        def callback(name, seconds):
+            calls.append((name, seconds))
+        game.add_stats_callback(callback)
+        game.enable_stats()
+        self.assertTrue(game.make_move("h3", "e3"))
+        names = [name for name, seconds in calls]
+        self.assertEqual(names[-1], "make_move")
+        self.assertIn("update_log", names)
+        self.assertTrue(all(seconds >= 0 for name, seconds in calls))
+        counts = {name: names.count(name) for name in names}
+        self.assertEqual(counts, {name: entry["calls"] for name, entry in game.get_stats().items()})
+        game.remove_stats_callback(callback)
+        self.assertTrue(game.make_move("h10", "g8"))
+        self.assertEqual(len(calls), len(names))
+
+
+class TestMoveGeneration(unittest.TestCase):
+    """Tests the staged move generators and the legality check of remembered moves"""
+
+    FENS = [
+        START_FEN,
+        # the red chariot is pinned on the general's file
+        "3k5/4r4/9/9/9/9/9/9/4R4/4K4 w - - 0 1",
+        # the red soldier and horse are the two screens between the black cannon and the red general
+        "4k4/9/9/9/4c4/4P4/9/4N4/9/3AKA3 w - - 0 1",
+        # red is in check from the black horse
+        "3k5/9/9/9/9/9/9/2n6/4A4/3K5 w - - 0 1",
+        # black to move in an opening with captures
+        "r1bakab1r/9/1cn4c1/p1p1p1p1p/9/9/P1P1P1P1P/1C2C1N2/9/RNBAKAB1R b - - 0 1",
+    ]
+
+    def check_stages(self, game):
+        """The captures and quiet moves of the position are disjoint and together are all the legal moves"""
+        board = game.get_board_array()
+        captures = game.generate_legal_captures()
+        quiets = game.generate_legal_quiets()
+        self.assertTrue(all(board[move & MOVE_MASK] != EMPTY for move in captures))
+        self.assertTrue(all(board[move & MOVE_MASK] == EMPTY for move in quiets))
+        self.assertEqual(sorted(captures + quiets), sorted(game.generate_legal_moves()))
+
+    def test_stages_make_up_legal_moves(self):
+        """The capture and quiet stages generate every legal move of each position once"""
+        for fen in self.FENS:
+            with self.subTest(fen=fen):
+                self.check_stages(XiangqiGame.from_fen(fen, headless=True))
+
+    def test_stages_during_random_games(self):
+        """The capture and quiet stages generate every legal move along random games"""
+        for record in random_games(3, 80, 12):
+            game = XiangqiGame(headless=True)
+            for move in record.get_moves():
+                self.check_stages(game)
+                game.push(move)
+
+    def test_is_legal_move_rejects_stale_moves(self):
+        """Moves remembered from another position are rejected once they aren't legal"""
+        game = XiangqiGame(headless=True)
+        cannon_move = algebraic_move("h3", "e3")
+        self.assertTrue(game.is_legal_move(cannon_move))
+        game.push(cannon_move)
+        # the piece has moved and it is the other player's turn
+        self.assertFalse(game.is_legal_move(cannon_move))
+        self.assertFalse(game.is_legal_move(algebraic_move("e3", "e7")))
+        # the black cannon captures the horse over the screen, but can't jump to the square once it is empty
+        capture = algebraic_move("b8", "b1")
+        self.assertTrue(game.is_legal_move(capture))
+        game.pop()
+        game.push(algebraic_move("b1", "c3"))
+        self.assertFalse(game.is_legal_move(capture))
+        # the pinned chariot may move along the file but not off it
+        game = XiangqiGame.from_fen(self.FENS[1], headless=True)
+        self.assertTrue(game.is_legal_move(algebraic_move("e2", "e9")))
+        pinned_move = algebraic_move("e2", "d2")
+        self.assertIn(pinned_move & MOVE_MASK, game.get_piece_targets(pinned_move >> MOVE_SHIFT))
+        self.assertFalse(game.is_legal_move(pinned_move))
+        # squares past the end of the board
+        self.assertFalse(game.is_legal_move(encode_move(0, BOARD_SQUARES)))
+
+
+class TestSearch(unittest.TestCase):
+    """Tests the XiangqiAI search finds mates, honours its limits and leaves the game as it found it"""
+
+    # red to move mates with either chariot along the black general's rank
+    MATE_IN_ONE_FEN = "3k5/R8/9/9/9/9/9/9/9/1R2K4 w - - 0 1"
+
+    def test_finds_mate_in_one(self):
+        """The search returns a mating move with a mate score, and make_move confirms the checkmate"""
+        game = XiangqiGame.from_fen(self.MATE_IN_ONE_FEN, headless=True)
+        result = XiangqiAI(hash_mb=1).best_move(game, depth=3)
+        self.assertGreaterEqual(result.get_score(), MATE_BOUND)
+        self.assertEqual(game.make_move_result(*result.get_algebraic_move()).get_status(), MoveStatus.CHECKMATE)
+        self.assertEqual(game.get_game_state(), "RED_WON")
+
+    def test_quiescence_sees_recapture(self):
+        """At depth 1 the quiescence search sees the chariot that takes the horse is lost to the recapture"""
+        # the black horse on a6 is defended by the black chariot on a10
+        game = XiangqiGame.from_fen("r3k4/9/9/9/n8/R8/9/9/9/3K5 w - - 0 1", headless=True)
+        capture = algebraic_move("a5", "a6")
+        self.assertIn(capture, game.generate_legal_captures())
+        result = XiangqiAI(hash_mb=1).best_move(game, depth=1)
+        self.assertNotEqual(result.get_move(), capture)
+        self.assertGreater(result.get_score(), -PIECE_VALUES[HORSE])
+
+    def test_quiescence_sees_stalemate(self):
+        """At depth 1 the quiescence search scores a stalemate as a loss instead of standing pat"""
+        # the chariot on i9 leaves the black general no move, it can't face the red general on the e file
+        game = XiangqiGame.from_fen("3k5/9/9/9/9/9/9/9/9/4K3R w - - 0 1", headless=True)
+        result = XiangqiAI(hash_mb=1).best_move(game, depth=1)
+        self.assertEqual(result.get_move(), algebraic_move("i1", "i9"))
+        self.assertEqual(result.get_score(), MATE_SCORE - 1)
+
+    def test_search_leaves_game_unchanged(self):
+        """The hash, undo stack, FEN and game log are the same after a search as before it"""
+        game = XiangqiGame(headless=True)
+        self.assertTrue(game.make_move("h3", "e3"))
+        game.push(algebraic_move("h10", "g8"))
+        position_hash = game.get_position_hash()
+        undo_stack = list(game._undo_stack)
+        fen = game.to_fen()
+        result = XiangqiAI(hash_mb=1).best_move(game, depth=3)
+        self.assertEqual(result.get_depth(), 3)
+        self.assertEqual(game.get_position_hash(), position_hash)
+        self.assertEqual(game._undo_stack, undo_stack)
+        self.assertEqual(game.to_fen(), fen)
+        self.assertEqual(len(game.get_gamelog()), 3)
+
+    def test_tiny_time_limit_returns_legal_move(self):
+        """A search given a millisecond still returns a legal move, and a depth limit is not passed"""
+        game = XiangqiGame(headless=True)
+        engine = XiangqiAI(hash_mb=1)
+        result = engine.best_move(game, time_ms=1)
+        self.assertTrue(game.is_legal_move(result.get_move()))
+        self.assertLess(result.get_time_ms(), 1000)
+        self.assertEqual(engine.best_move(game, depth=2).get_depth(), 2)
+        self.assertEqual(game.to_fen(), START_FEN)
+
+    def test_parallel_search_returns_legal_move(self):
+        """Two workers sharing a fractional size table search to the depth limit and return a legal move"""
+        game = XiangqiGame.from_fen(self.MATE_IN_ONE_FEN, headless=True)
+        with XiangqiAI(hash_mb=0.5, workers=2) as engine:
+            result = engine.best_move(game, depth=2)
+        self.assertTrue(game.is_legal_move(result.get_move()))
+        self.assertGreaterEqual(result.get_score(), MATE_BOUND)
+        self.assertEqual(game.to_fen(), self.MATE_IN_ONE_FEN)
+
+    def test_unclosed_parallel_engine_frees_shared_memory(self):
+        """The shared memory of a parallel engine is removed when the engine is garbage collected"""
+        engine = XiangqiAI(hash_mb=0.5, workers=2)
+        name = engine._shared_memory.name
+        del engine
+        gc.collect()
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=name)
+
+
+
+class TestTranspositionTable(unittest.TestCase):
+    """Tests the packed entries, check words, replacement rules and mate score adjustment of the table"""
+
+    def test_store_then_probe(self):
+        """An entry reads back with the move, score, depth and bound it was stored with, negative scores too"""
+        table = TranspositionTable(1)
+        move = algebraic_move("h3", "e3")
+        table.store(0x123456789abcdef0, move, -250, 7, BOUND_LOWER)
+        self.assertEqual(table.probe(0x123456789abcdef0), (move, -250, 7, BOUND_LOWER))
+        self.assertIsNone(table.probe(0x0fedcba987654321))
+
+    def test_corrupted_check_word_is_rejected(self):
+        """An entry whose check word doesn't match its data word, as a torn write leaves it, is not returned"""
+        table = TranspositionTable(1)
+        key = 0x1111222233334444
+        table.store(key, algebraic_move("h3", "e3"), 12, 3, BOUND_EXACT)
+        index = (key & table._bucket_mask) * BUCKET_WORDS
+        table._words[index] ^= 1 << 20
+        self.assertIsNone(table.probe(key))
+
+    def test_older_age_is_replaced_before_deeper_entry(self):
+        """A shallow entry replaces a deep one from an older search, but not a deep one from the current search"""
+        table = TranspositionTable(1)
+        deep_key = 0x5555666677778888
+        # keys one table size apart share a bucket
+        shallow_key = deep_key + table._bucket_mask + 1
+        other_key = shallow_key + table._bucket_mask + 1
+        table.store(deep_key, algebraic_move("h3", "e3"), 40, 9, BOUND_EXACT)
+        table.store(shallow_key, algebraic_move("b3", "e3"), 10, 2, BOUND_UPPER)
+        # the deep entry of this search keeps the depth-preferred slot, the shallow one takes the other slot
+        self.assertEqual(table.probe(deep_key)[2], 9)
+        self.assertEqual(table.probe(shallow_key)[2], 2)
+        table.new_search()
+        table.store(other_key, algebraic_move("b1", "c3"), 5, 1, BOUND_LOWER)
+        self.assertIsNone(table.probe(deep_key))
+        self.assertEqual(table.probe(other_key), (algebraic_move("b1", "c3"), 5, 1, BOUND_LOWER))
+
+    def test_mate_scores_are_stored_relative_to_the_position(self):
+        """A mate found 3 plies from the root is stored as mate from the position and read back from the root"""
+        score = MATE_SCORE - 5
+        self.assertEqual(score_to_table(score, 3), MATE_SCORE - 2)
+        self.assertEqual(score_from_table(score_to_table(score, 3), 3), score)
+        self.assertEqual(score_from_table(score_to_table(-score, 3), 3), -score)
+        # a mate stored from one line is read back at the distance of another
+        self.assertEqual(score_from_table(score_to_table(score, 3), 1), MATE_SCORE - 3)
+        self.assertEqual(score_to_table(150, 3), 150)
+
+
+
+def random_games(count, plies, seed):
+    """Returns count GameRecords of random legal games of up to plies moves from the starting position"""
+    rng = random.Random(seed)
+    game = XiangqiGame(headless=True)
+    records = []
+    for index in range(count):
+        moves = []
+        for ply in range(plies):
+            legal_moves = game.generate_legal_moves()
+            if not legal_moves:
+                break
+            moves.append(rng.choice(legal_moves))
+            game.push(moves[-1])
+        for move in moves:
+            game.pop()
+        records.append(GameRecord({"Event": "random " + str(index)}, moves, rng.choice(["1-0", "0-1", "*"])))
+    return records
+
+
+class TestRecords(unittest.TestCase):
+    """Tests writing and reading game records in ICCS and WXF notation"""
+
+    def convert(self, records, notation):
+        """Writes records in notation and returns the records read back"""
+        stream = io.StringIO()
+        write_games(stream, records, notation)
+        return list(read_games(io.StringIO(stream.getvalue())))
+
+    def test_iccs_wxf_round_trip(self):
+        """Games converted from ICCS to WXF and back keep their moves, results and headers"""
+        records = random_games(12, 80, 162)
+        for notation in (ICCS, WXF):
+            read_back = self.convert(records, notation)
+            self.assertEqual(len(read_back), len(records))
+            for record, record_read in zip(records, read_back):
+                self.assertTrue(record_read.is_valid(), record_read)
+                self.assertEqual(list(record_read.get_moves()), list(record.get_moves()))
+                self.assertEqual(record_read.get_result(), record.get_result())
+                self.assertEqual(record_read.get_headers()["Event"], record.get_headers()["Event"])
+        twice = self.convert(self.convert(self.convert(records, WXF), ICCS), WXF)
+        self.assertEqual([list(record.get_moves()) for record in twice],
+                         [list(record.get_moves()) for record in records])
+
+    def test_quoted_header_value_round_trip(self):
+        """Quotes and backslashes in a header value are escaped when written and read back unchanged"""
+        record = GameRecord({"Event": 'the "open" \\ final'}, [algebraic_move("h3", "e3")], "*")
+        self.assertEqual(self.convert([record], ICCS)[0].get_headers()["Event"], 'the "open" \\ final')
+        with self.assertRaises(RecordError):
+            self.convert([GameRecord({"Event": "two\nlines"}, [], "*")], ICCS)
+
+    def test_unvalidated_error_ply(self):
+        """Without validation a bad ICCS token is reported at its own ply, with the moves read before it"""
+        text = "[Format \"ICCS\"]\n1. h2e2 h9g7 2. h0g2 z9z9 3. a0a1 *\n"
+        record = next(read_games(io.StringIO(text), validate=False))
+        self.assertFalse(record.is_valid())
+        self.assertEqual(record.get_error_ply(), 4)
+        self.assertEqual(len(record), 3)
+
+
+
+class TestArchive(unittest.TestCase):
+    """Tests writing an archive and reading its games back"""
+
+    def setUp(self):
+        """Makes a temporary directory for the archive files"""
+        self._directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._directory.name, "games.xqa")
+
+    def tearDown(self):
+        """Removes the temporary directory"""
+        self._directory.cleanup()
+
+    def test_write_then_read(self):
+        """Results, moves, move ranges and headers read back as written"""
+        records = random_games(5, 60, 21)
+        with ArchiveWriter(self.path) as writer:
+            for record in records:
+                writer.add_record(record)
+        with Archive(self.path) as archive:
+            self.assertEqual(len(archive), len(records))
+            for game_id, record in enumerate(records):
+                moves = list(record.get_moves())
+                self.assertEqual(archive.get_result(game_id), record.get_result())
+                self.assertEqual(archive.get_move_count(game_id), len(moves))
+                self.assertEqual(list(archive.get_moves(game_id)), moves)
+                self.assertEqual(list(archive.get_moves(game_id, 10, 20)), moves[10:20])
+                self.assertEqual(list(archive.get_moves(game_id, 50, 500)), moves[50:])
+                self.assertEqual(archive.get_headers(game_id), record.get_headers())
+            with self.assertRaises(IndexError):
+                archive.get_result(len(records))
+
+    def test_replay(self):
+        """replay returns the position after the moves with the game log, counter, FEN and game state following"""
+        records = random_games(1, 40, 7)
+        moves = list(records[0].get_moves())
+        mate_fen = TestSearch.MATE_IN_ONE_FEN
+        with ArchiveWriter(self.path) as writer:
+            writer.add_record(records[0])
+            writer.add_game([algebraic_move("b1", "d1")], "1-0", {"FEN": mate_fen})
+        game = XiangqiGame(headless=True)
+        for move in moves[:25]:
+            game.push(move)
+        with Archive(self.path) as archive:
+            replayed = archive.replay(0, 25)
+            self.assertEqual(replayed.get_position_hash(), game.get_position_hash())
+            self.assertEqual(replayed.to_fen(), game.to_fen())
+            self.assertEqual(len(replayed.get_gamelog()), 26)
+            self.assertEqual(replayed.counter, 27)
+            mated = archive.replay(1)
+            self.assertEqual(mated.get_game_state(), "RED_WON")
+            self.assertTrue(mated.to_fen().endswith(" b - - 1 1"))
+
+    def test_empty_or_truncated_file(self):
+        """An empty, short or truncated file raises ArchiveError"""
+        with ArchiveWriter(self.path) as writer:
+            for record in random_games(3, 30, 3):
+                writer.add_record(record)
+        with open(self.path, "rb") as archive_file:
+            data = archive_file.read()
+        for length in (0, 10, len(data) - 8):
+            with open(self.path, "wb") as archive_file:
+                archive_file.write(data[:length])
+            with self.assertRaises(ArchiveError):
+                Archive(self.path)
+
+
+
+class TestPositionIndex(unittest.TestCase):
+    """Tests the position index built by merging sorted runs against a dictionary of every position"""
+
+    def setUp(self):
+        """Writes an archive of random games and the brute force dictionary of their positions"""
+        self._directory = tempfile.TemporaryDirectory()
+        self.archive_path = os.path.join(self._directory.name, "games.xqa")
+        self.index_path = os.path.join(self._directory.name, "games.xqix")
+        records = random_games(8, 40, 99)
+        # the games share their first moves, so positions are reached by several games
+        records.append(GameRecord({}, records[0].get_moves()[:6], "1/2-1/2"))
+        self.expected = {}
+        game = XiangqiGame(headless=True)
+        with ArchiveWriter(self.archive_path) as writer:
+            for game_id, record in enumerate(records):
+                writer.add_record(record)
+                self.expected.setdefault(game.get_position_hash(), []).append((game_id, 0, record.get_result()))
+                for ply, move in enumerate(record.get_moves(), 1):
+                    game.push(move)
+                    self.expected.setdefault(game.get_position_hash(), []).append(
+                        (game_id, ply, record.get_result()))
+                for move in record.get_moves():
+                    game.pop()
+        self.entries = sum(len(hits) for hits in self.expected.values())
+
+    def tearDown(self):
+        """Removes the temporary directory"""
+        self._directory.cleanup()
+
+    def check_index(self):
+        """Builds the index from several small runs and compares every lookup with the dictionary"""
+        self.assertEqual(build_index(self.archive_path, self.index_path, run_entries=37), self.entries)
+        with PositionIndex(self.index_path) as index:
+            self.assertEqual(len(index), self.entries)
+            for position_hash, hits in self.expected.items():
+                self.assertEqual(sorted(index.lookup_hash(position_hash)), sorted(hits))
+            self.assertEqual(index.lookup_hash(0x0123456789abcdef), [])
+            self.assertEqual(index.query(START_FEN).get_game_count(), 9)
+
+    def test_build_and_lookup(self):
+        """Every position's hits are found in an index merged from many runs"""
+        self.check_index()
+
+    def test_build_and_lookup_swapped_words(self):
+        """The byte swapping path of big-endian machines builds and searches the same index"""
+        with mock.patch.object(xiangqiIndex, "_SWAP_BYTES", True):
+            self.check_index()
+
+    def test_empty_file(self):
+        """An empty file raises IndexFileError"""
+        open(self.index_path, "wb").close()
+        with self.assertRaises(IndexFileError):
+            PositionIndex(self.index_path)
+
+
+
+class _RecordingRandom:
+    """Stands in for random when choosing a book move, picking the heaviest move and keeping the weights given"""
+
+    def __init__(self):
+        """Initialize with no weights seen"""
+        self.weights = None
+
+    def choices(self, population, weights):
+        """Returns a list of the move with the largest weight, like random.choices with k=1"""
+        self.weights = weights
+        return [population[weights.index(max(weights))]]
+
+
+class TestOpeningBook(unittest.TestCase):
+    """Tests building an opening book from known games, probing it and playing from it"""
+
+    def setUp(self):
+        """Writes a record file of four short games"""
+        self._directory = tempfile.TemporaryDirectory()
+        self.records_path = os.path.join(self._directory.name, "games.pgn")
+        self.book_path = os.path.join(self._directory.name, "games.xqbk")
+        self.central_cannon = algebraic_move("h3", "e3")
+        self.horse_right = algebraic_move("h10", "g8")
+        self.horse_left = algebraic_move("b10", "c8")
+        self.horse_opening = algebraic_move("b1", "c3")
+        records = [GameRecord({}, [self.central_cannon, self.horse_right], "1-0"),
+                   GameRecord({}, [self.central_cannon, self.horse_left], "0-1"),
+                   GameRecord({}, [self.horse_opening, self.horse_right], "1/2-1/2"),
+                   GameRecord({}, [self.central_cannon, self.horse_right], "1-0")]
+        with open(self.records_path, "w", encoding="utf-8") as records_file:
+            write_games(records_file, records)
+
+    def tearDown(self):
+        """Removes the temporary directory"""
+        self._directory.cleanup()
+
+    def book_counts(self, book, game):
+        """Returns the book moves of the game's position as {move: (games, wins, draws, losses)}"""
+        return {book_move.get_move(): (book_move.get_games(), book_move.get_wins(), book_move.get_draws(),
+                                       book_move.get_losses()) for book_move in book.get_moves(game)}
+
+    def test_probe_counts(self):
+        """Each position's moves are found with their games and results, for the player making the move"""
+        self.assertEqual(build_book(self.records_path, self.book_path, min_games=1), 5)
+        game = XiangqiGame(headless=True)
+        with OpeningBook(self.book_path) as book:
+            self.assertEqual(self.book_counts(book, game),
+                             {self.central_cannon: (3, 2, 0, 1), self.horse_opening: (1, 0, 1, 0)})
+            self.assertEqual(book.get_moves(game)[0].get_move(), self.central_cannon)
+            game.push(self.central_cannon)
+            self.assertEqual(self.book_counts(book, game),
+                             {self.horse_right: (2, 0, 0, 2), self.horse_left: (1, 1, 0, 0)})
+            game.push(self.horse_right)
+            self.assertEqual(book.get_moves(game), [])
+
+    def test_min_games(self):
+        """Moves played in fewer than min_games games are left out"""
+        self.assertEqual(build_book(self.records_path, self.book_path, min_games=2), 2)
+        with OpeningBook(self.book_path) as book:
+            self.assertEqual(list(self.book_counts(book, XiangqiGame(headless=True))), [self.central_cannon])
+
+    def test_choose_move_weights(self):
+        """Moves are weighted by two per win and one per draw, moves with no win or draw are never chosen"""
+        build_book(self.records_path, self.book_path, min_games=1)
+        game = XiangqiGame(headless=True)
+        rng = _RecordingRandom()
+        with OpeningBook(self.book_path) as book:
+            self.assertEqual(book.choose_move(game, rng).get_move(), self.central_cannon)
+            self.assertEqual(rng.weights, [4, 1])
+            game.push(self.central_cannon)
+            self.assertEqual(book.choose_move(game, rng).get_move(), self.horse_left)
+            self.assertEqual(rng.weights, [2])
+            game.push(self.horse_right)
+            self.assertIsNone(book.choose_move(game, rng))
+
+    def test_engine_plays_book_move(self):
+        """best_move answers a book position with a book move without searching, and searches out of the book"""
+        build_book(self.records_path, self.book_path, min_games=1)
+        game = XiangqiGame(headless=True)
+        with OpeningBook(self.book_path) as book:
+            engine = XiangqiAI(hash_mb=1, book=book)
+            result = engine.best_move(game, depth=2)
+            self.assertTrue(result.is_book_move())
+            self.assertIn(result.get_move(), (self.central_cannon, self.horse_opening))
+            self.assertEqual(result.get_nodes(), 0)
+            game.push(self.central_cannon)
+            game.push(self.horse_right)
+            result = engine.best_move(game, depth=2)
+            self.assertFalse(result.is_book_move())
+            self.assertEqual(result.get_depth(), 2)
+
+    def test_empty_file(self):
+        """An empty file raises BookError"""
+        open(self.book_path, "wb").close()
+        with self.assertRaises(BookError):
+            OpeningBook(self.book_path)
+
+
+
+class TestTablebase(unittest.TestCase):
+    """Tests generated tablebases against known results"""
+
+    @classmethod
+    def setUpClass(cls):
+        """Generates the K-K and KR-K tablebases once for every test"""
+        cls._directory = tempfile.TemporaryDirectory()
+        generate_tablebase("KR-K", cls._directory.name, workers=2)
+
+    @classmethod
+    def tearDownClass(cls):
+        """Removes the tablebase files"""
+        cls._directory.cleanup()
+
+    def test_bare_generals_are_drawn(self):
+        """Every position of K-K that can occur is a draw"""
+        path = os.path.join(self._directory.name, "K-K" + TABLEBASE_EXTENSION)
+        with Tablebase(path) as tablebase:
+            values = array('h')
+            values.frombytes(tablebase._map[-2 * len(tablebase):])
+        self.assertIn(0, values)
+        self.assertEqual(set(values), {0, INVALID_VALUE})
+
+    def test_chariot_wins_at_known_distance(self):
+        """KR-K positions are won or lost in the plies to mate the search finds"""
+        tablebases = Tablebases(self._directory.name)
+        try:
+            game = XiangqiGame.from_fen("4k4/9/9/9/9/9/9/9/9/3K4R w - - 0 1", headless=True)
+            self.assertEqual(tablebases.probe(game), (WIN, 3))
+            result = XiangqiAI(hash_mb=1).best_move(game, depth=4)
+            self.assertEqual(result.get_score(), MATE_SCORE - 3)
+            game = XiangqiGame.from_fen("4k4/9/9/9/9/4R4/9/9/9/3K5 b - - 0 1", headless=True)
+            self.assertEqual(tablebases.probe(game), (LOSS, 2))
+            # the colour swapped position is probed in the same tablebase
+            game = XiangqiGame.from_fen("3k5/9/9/9/4r4/9/9/9/9/4K4 w - - 0 1", headless=True)
+            self.assertEqual(tablebases.probe(game), (LOSS, 2))
+        finally:
+            tablebases.close()
+
+    def test_empty_file(self):
+        """An empty file raises TablebaseError"""
+        path = os.path.join(self._directory.name, "empty" + TABLEBASE_EXTENSION)
+        open(path, "wb").close()
+        with self.assertRaises(TablebaseError):
+            Tablebase(path)
+
+
+if __name__ == "__main__":
+    unittest.main()
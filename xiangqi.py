@@ -17,9 +17,11 @@ class Board(Canvas):
         self.pack()
 
     def initgame(self):
-        self.board_status = XiangqiGame()
+        # the game doesn't print, the interface shows the message of each move itself
+        self.board_status = XiangqiGame(headless=True)
         self.selected = False
         self.last_position = ''
+        self.last_message = ''
         # bind left click from mouse as user input
         self.bind_all('<Button-1>', self.click)
         # bind right click from mouse as move options
@@ -71,6 +73,8 @@ class Board(Canvas):
         color_bx_size = 15
         self.create_rectangle(4, board_size + offset - 4, 4 + color_bx_size, board_size + offset - 4 - color_bx_size, fill=color)
         self.create_text(4 + color_bx_size + 4, board_size + offset - 4 - color_bx_size, text=player_text, anchor=NW, fill='#f6e198')
+        # message of the last move tried
+        self.create_text(board_size + offset - 2, 2, text=self.last_message, anchor=NE, fill='#f6e198')
         
 
     def load_images(self):
@@ -146,7 +150,11 @@ class Board(Canvas):
         pixel_location = (int(col * board_size / 8) + offset / 4, int((row - 1) * board_size / 9) + offset / 4)
         if self.selected:
             print(" from:" + self.last_position + "to:" + position)
-            madeMove = self.board_status.make_move(self.last_position, position)
+            result = self.board_status.make_move_result(self.last_position, position)
+            for message in result.get_messages():
+                print(message)
+            self.last_message = '; '.join(result.get_messages())
+            madeMove = result.is_made()
             self.board_status.show_board()
             self.board_setup()
             self.draw_pieces()
@@ -174,7 +182,8 @@ class Board(Canvas):
         piece = self.board_status.piece_at_location(position)
         if piece != None:
             print('show moves')
-            moves = piece.allowed_move(self.board_status)
+            # only show moves that don't leave the general in check
+            moves = self.board_status.legal_moves_from(position)
             for move in moves:
                 
                 pixel_location = (int(move[0] * board_size / 8) + offset / 4, int((move[1]) * board_size / 9) + offset / 4)
@@ -1 +1,731 @@
-# ask player for new game (player vs player OR player vs AI)
\ No newline at end of file
+# Project: CS 162 Portfolio Project
+# Author: Christopher Eckerson
+# Description: Computer player for the Xiangqi Game.  The XiangqiAI class searches a XiangqiGame position with
+#              negamax alpha-beta search and iterative deepening, under a depth limit and/or a time limit,
+#              ending each line with a quiescence search of captures so only quiet positions are evaluated.
+#              The search runs directly on the game's legal move generator and its push/pop make and unmake
+#              moves, so the game is searched in place and left exactly as it was found.
+#              Scores are in centipawns (a soldier is worth 100) from the point of view of the side to move.
+#              A position that repeats one earlier in the game or the line searched is scored as a draw.
+#              With more than one worker the search runs in parallel processes (Lazy SMP) that share one
+#              transposition table in shared memory.
+#              With an opening book (see xiangqiBook) positions found in the book are answered with a book move
+#              without searching.
+import os
+import queue
+import time
+import weakref
+import multiprocessing
+from multiprocessing import shared_memory
+from XiangqiGame import *
+
+# Value of each piece type, the general can't be captured so it has no material value
+PIECE_VALUES = {GENERAL: 0, ADVISOR: 200, ELEPHANT: 200, HORSE: 400, CHARIOT: 900, CANNON: 450, SOLDIER: 100}
+# score of checkmating the other player, reduced by the number of plies it takes so faster mates score higher
+MATE_SCORE = 30000
+# scores beyond this are mate scores
+MATE_BOUND = MATE_SCORE - 1000
+# depth searched when best_move is given no limits
+DEFAULT_DEPTH = 4
+# fraction of the time limit after which no new iteration is started (the soft limit)
+SOFT_TIME_FRACTION = 0.5
+# number of nodes searched between checks of the clock
+NODES_PER_TIME_CHECK = 1024
+# transposition table size in megabytes used when an engine is not given one
+DEFAULT_HASH_MB = 16
+# seconds the parallel search waits for a worker message before checking its time limits again
+WORKER_POLL_SECONDS = 0.01
+# seconds the parallel search waits for the workers to send their final message after telling them to stop,
+# a worker still running after that is terminated
+WORKER_GRACE_SECONDS = 1.0
+# deepest ply the search keeps killer moves for, the quiescence search stops at this ply
+MAX_PLY = 128
+# margin over the captured piece's value under which a capture can't raise the quiescence score to alpha
+DELTA_MARGIN = 200
+
+# Transposition table bound types, saying how a stored score relates to the position's true score
+BOUND_NONE = 0
+BOUND_UPPER = 1
+BOUND_LOWER = 2
+BOUND_EXACT = 3
+# each bucket holds two entries of two 64 bit words (check word, data word):
+# a depth-preferred entry and an always-replace entry
+BUCKET_WORDS = 4
+BUCKET_BYTES = BUCKET_WORDS * 8
+# offset added to scores so they are stored as unsigned 16 bit values
+SCORE_OFFSET = 1 << 15
+
+
+def _position_bonus(kind, side, square):
+    """Returns the positional bonus of a piece type of side (RED or BLACK) on square, in centipawns"""
+    col, row = SQUARE_LOCATIONS[square]
+    # rows counted from the side's own back row, so both sides share the same bonuses
+    advance = row if side == RED else 9 - row
+    center = 4 - abs(col - 4)
+    if kind == SOLDIER:
+        # a soldier across the river can move sideways and is worth about twice as much
+        if advance >= 5:
+            return 90 + 10 * min(advance - 5, 3) + 5 * center
+        return 0
+    if kind == HORSE or kind == CANNON:
+        return 4 * center + 2 * min(advance, 6)
+    if kind == CHARIOT:
+        return 2 * center + 2 * min(advance, 6)
+    return 0
+
+
+# Capture ordering by most valuable victim, then least valuable attacker, indexed [victim type][attacker type].
+# Victims are ranked by piece value, an equal victim is taken first by the cheaper attacker.
+_ORDER_RANKS = {GENERAL: 7, CHARIOT: 6, CANNON: 5, HORSE: 4, ELEPHANT: 3, ADVISOR: 2, SOLDIER: 1, EMPTY: 0}
+MVV_LVA = tuple(tuple(_ORDER_RANKS[victim] * 8 - _ORDER_RANKS[attacker] for attacker in range(8))
+                for victim in range(8))
+
+# Value of each piece code on each square, positive for red pieces and negative for black pieces
+PIECE_SQUARE_VALUES = tuple(
+    tuple(0 if code & TYPE_MASK == EMPTY else
+          (1 if code >> 3 == RED else -1) *
+          (PIECE_VALUES[code & TYPE_MASK] + _position_bonus(code & TYPE_MASK, code >> 3, square))
+          for square in range(BOARD_SQUARES))
+    for code in range(16))
+
+
+def score_to_table(score, ply):
+    """Returns score made relative to the position for storing, mate scores count plies from the position not root"""
+    if score >= MATE_BOUND:
+        return score + ply
+    if score <= -MATE_BOUND:
+        return score - ply
+    return score
+
+
+def score_from_table(score, ply):
+    """Returns a stored score made relative to the root again, the inverse of score_to_table"""
+    if score >= MATE_BOUND:
+        return score - ply
+    if score <= -MATE_BOUND:
+        return score + ply
+    return score
+
+
+class SearchResult:
+    """Represents the result of a search: best move, score, depth reached, nodes searched and time taken"""
+
+    def __init__(self, move, score, depth, nodes, elapsed, workers=1, book=False):
+        """
+        Initialize the result with the move integer, its score, the completed depth, node count and seconds taken,
+        the number of worker processes that searched (nodes counts the positions searched by all of them)
+        and whether the move came from the opening book instead of a search
+        """
+        self._move = move
+        self._score = score
+        self._depth = depth
+        self._nodes = nodes
+        self._elapsed = elapsed
+        self._workers = workers
+        self._book = book
+
+    def get_move(self):
+        """Returns the best move as a move integer, or None if the side to move has no legal move"""
+        return self._move
+
+    def get_algebraic_move(self):
+        """Returns the best move as a (from, to) tuple of algebraic notation strings for make_move, or None"""
+        if self._move is None:
+            return None
+        from_square, to_square = decode_move(self._move)
+        return square_algebraic(from_square), square_algebraic(to_square)
+
+    def get_score(self):
+        """Returns the score of the best move in centipawns, from the point of view of the side to move"""
+        return self._score
+
+    def get_depth(self):
+        """Returns the deepest search depth that was completed"""
+        return self._depth
+
+    def get_nodes(self):
+        """Returns the number of positions searched"""
+        return self._nodes
+
+    def get_time_ms(self):
+        """Returns the time the search took in milliseconds"""
+        return self._elapsed * 1000
+
+    def get_workers(self):
+        """Returns the number of worker processes that searched"""
+        return self._workers
+
+    def is_book_move(self):
+        """Returns True if the move came from the opening book, otherwise False"""
+        return self._book
+
+    def get_nps(self):
+        """Returns the search speed in nodes per second"""
+        if self._elapsed <= 0:
+            return 0
+        return int(self._nodes / self._elapsed)
+
+    def __repr__(self):
+        """Returns a one line summary of the search result"""
+        return ("SearchResult(move=%s, score=%d, depth=%d, nodes=%d, time=%.1fms, nps=%d, workers=%d%s)" %
+                (self.get_algebraic_move(), self._score, self._depth, self._nodes, self.get_time_ms(), self.get_nps(),
+                 self._workers, ", book" if self._book else ""))
+
+
+def table_size_bytes(size_mb):
+    """Returns the bytes used by a transposition table of size_mb megabytes, a power of two number of buckets"""
+    bucket_count = 1
+    while bucket_count * 2 * BUCKET_BYTES <= size_mb * 1024 * 1024:
+        bucket_count *= 2
+    return bucket_count * BUCKET_BYTES
+
+
+def _free_shared_memory(table, memory):
+    """Releases the table's view of the shared memory holding it, then closes and removes the shared memory"""
+    table.release()
+    memory.close()
+    memory.unlink()
+
+
+class TranspositionTable:
+    """
+    Represents a fixed size transposition table keyed by the 64 bit Zobrist position hash.
+    Entries live in one flat array of unsigned 64 bit words instead of Python objects, two entries per bucket.
+    The first entry of a bucket is replaced by deeper searches (or by entries from an older search), the second
+    entry is always replaced.  Each entry's check word is the hash XOR the data word, so an entry that was torn by
+    a concurrent writer fails its check instead of returning another position's data.
+    Data words pack the best move (14 bits), score (16 bits), depth (8 bits), bound type (2 bits) and age (8 bits).
+    """
+
+    def __init__(self, size_mb=DEFAULT_HASH_MB, buffer=None, age=0):
+        """
+        Initialize a table using size_mb megabytes, rounded down to a power of two number of buckets.
+        buffer: optional writable buffer of at least size_mb megabytes to hold the table, for sharing it
+        age: starting search age, so tables sharing a buffer agree on which entries are stale
+        """
+        size = table_size_bytes(size_mb)
+        if buffer is None:
+            buffer = bytearray(size)
+        self._words = memoryview(buffer)[:size].cast('Q')
+        self._bucket_mask = size // BUCKET_BYTES - 1
+        self._age = age
+
+    def get_size_mb(self):
+        """Returns the memory used by the table entries in megabytes"""
+        return (self._bucket_mask + 1) * BUCKET_BYTES / (1024 * 1024)
+
+    def get_age(self):
+        """Returns the age of the current search"""
+        return self._age
+
+    def release(self):
+        """Releases the table's view of its buffer, so a shared memory buffer can be closed"""
+        self._words.release()
+
+    def new_search(self):
+        """Advances the age counter, entries stored by earlier searches become the first to be replaced"""
+        self._age = (self._age + 1) & 0xff
+
+    def clear(self):
+        """Removes every entry from the table"""
+        words = self._words
+        for index in range(len(words)):
+            words[index] = 0
+
+    def probe(self, key):
+        """
+        Takes in a position hash and returns the stored (move, score, depth, bound) tuple for it, or None.
+        A move of 0 means no best move was stored.
+        """
+        words = self._words
+        index = (key & self._bucket_mask) * BUCKET_WORDS
+        for slot in (index, index + 2):
+            data = words[slot + 1]
+            if words[slot] ^ data == key and data:
+                return (data & 0x3fff, (data >> 14 & 0xffff) - SCORE_OFFSET, data >> 30 & 0xff, data >> 38 & 3)
+        return None
+
+    def store(self, key, move, score, depth, bound):
+        """Stores the search result of a position: best move (0 for none), score, depth searched and bound type"""
+        words = self._words
+        index = (key & self._bucket_mask) * BUCKET_WORDS
+        old_data = words[index + 1]
+        same_position = words[index] ^ old_data == key
+        # keep the previous best move of the position if this search didn't find one
+        if not move and same_position:
+            move = old_data & 0x3fff
+        data = (move | (score + SCORE_OFFSET) << 14 | depth << 30 | bound << 38 | self._age << 40)
+        # the depth-preferred entry takes the result if it is empty, as deep, stale or the same position
+        if (not old_data or same_position or depth >= (old_data >> 30 & 0xff) or
+                (old_data >> 40 & 0xff) != self._age):
+            slot = index
+        else:
+            slot = index + 2
+            if not move and words[slot] ^ words[slot + 1] == key:
+                data |= words[slot + 1] & 0x3fff
+        words[slot] = key ^ data
+        words[slot + 1] = data
+
+    def get_hashfull(self):
+        """Returns how full the table is in permille, sampled from the first 1000 buckets' entries of this search"""
+        words = self._words
+        sample = min(1000, self._bucket_mask + 1)
+        used = 0
+        for bucket in range(sample):
+            data = words[bucket * BUCKET_WORDS + 1]
+            if data and (data >> 40 & 0xff) == self._age:
+                used += 1
+        return used * 1000 // sample
+
+
+class SearchTimeout(Exception):
+    """Raised inside the search when the hard time limit has passed"""
+    pass
+
+
+class XiangqiAI:
+    """
+    Represents a computer player that picks moves for a XiangqiGame with alpha-beta search.
+    Can be used in a with statement, close frees the shared memory of a parallel engine.
+    """
+
+    def __init__(self, hash_mb=DEFAULT_HASH_MB, workers=1, table=None, book=None):
+        """
+        Initialize the search counters, time limits and a transposition table of hash_mb megabytes.
+        workers: number of processes searching in parallel, None for one per CPU core.  With more than one worker
+        the transposition table is kept in shared memory, call close when the engine is no longer needed
+        (an engine that is never closed frees it when it is garbage collected).
+        table: optional TranspositionTable to search with instead of a new one, used by the parallel workers
+        book: optional OpeningBook (see xiangqiBook) whose moves are played without searching
+        """
+        if workers is None:
+            workers = os.cpu_count() or 1
+        self._workers = max(1, workers)
+        self._hash_mb = hash_mb
+        self._nodes = 0
+        self._next_time_check = NODES_PER_TIME_CHECK
+        self._hard_deadline = None
+        # set by the parallel search to stop a worker's search
+        self._stop_event = None
+        self._shared_memory = None
+        # frees the shared memory when the engine is closed or garbage collected
+        self._finalizer = None
+        if table is None and self._workers > 1:
+            self._shared_memory = shared_memory.SharedMemory(create=True, size=table_size_bytes(hash_mb))
+            table = TranspositionTable(hash_mb, self._shared_memory.buf)
+            self._finalizer = weakref.finalize(self, _free_shared_memory, table, self._shared_memory)
+        elif table is None:
+            table = TranspositionTable(hash_mb)
+        self._table = table
+        self._book = book
+        # two killer moves per ply, quiet moves that caused a cutoff at the same ply in a sibling position
+        self._killers = [[0, 0] for ply in range(MAX_PLY)]
+        # history scores of quiet moves by move integer, raised each time the move causes a cutoff
+        self._history = [0] * (1 << 14)
+
+    def get_transposition_table(self):
+        """Returns the engine's TranspositionTable"""
+        return self._table
+
+    def get_workers(self):
+        """Returns the number of processes the engine searches with"""
+        return self._workers
+
+    def get_book(self):
+        """Returns the engine's OpeningBook, or None"""
+        return self._book
+
+    def set_book(self, book):
+        """Sets the OpeningBook the engine plays from, None to always search"""
+        self._book = book
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Frees the shared memory transposition table of a parallel engine, which can't search after closing"""
+        if self._shared_memory is not None:
+            self._finalizer()
+            self._shared_memory = None
+
+    def best_move(self, game, time_ms=None, depth=None):
+        """
+        Takes in a XiangqiGame and returns a SearchResult with the best move found for the active player.
+        Searches with iterative deepening until depth is completed or time_ms milliseconds have passed.
+        A new iteration is not started after half of time_ms (soft limit) and the search in progress is
+        abandoned at time_ms (hard limit), the result of the last completed iteration is returned.
+        With no limits given the search runs to DEFAULT_DEPTH, with only a depth there is no time limit.
+        With more than one worker the result is the deepest iteration completed by any worker.
+        If the position is in the opening book a book move is returned at once, with depth 0 and no nodes.
+        """
+        if self._book is not None:
+            start = time.perf_counter()
+            book_move = self._book.choose_move(game)
+            if book_move is not None:
+                return SearchResult(book_move.get_move(), 0, 0, 0, time.perf_counter() - start, self._workers, True)
+        if time_ms is None and depth is None:
+            depth = DEFAULT_DEPTH
+        if self._workers > 1:
+            return self._parallel_best_move(game, time_ms, depth)
+        return self._iterative_deepening(game, time_ms, depth)
+
+    def _iterative_deepening(self, game, time_ms, depth, first_depth=1, root_shift=0, report=None):
+        """
+        Runs the iterative deepening search of best_move and returns its SearchResult.
+        first_depth: depth of the first iteration, root_shift: number of root moves rotated to the back before
+        the first iteration, report: function called with (move, score, depth, nodes) after each iteration.
+        The parallel workers use these to search in different orders and report back to the main process.
+        """
+        start = time.perf_counter()
+        if time_ms is not None:
+            self._hard_deadline = start + time_ms / 1000
+            soft_deadline = start + time_ms * SOFT_TIME_FRACTION / 1000
+        else:
+            self._hard_deadline = None
+            soft_deadline = None
+        self._nodes = 0
+        self._next_time_check = NODES_PER_TIME_CHECK
+        self._table.new_search()
+        # start each search with fresh killers and with history from the last search weighted down
+        self._killers = [[0, 0] for ply in range(MAX_PLY)]
+        self._history = [score >> 2 for score in self._history]
+
+        root_moves = game.generate_legal_moves()
+        if not root_moves:
+            # no legal moves, the active player is checkmated or stalemated
+            return SearchResult(None, -MATE_SCORE, 0, 0, time.perf_counter() - start)
+        shift = root_shift % len(root_moves)
+        root_moves = root_moves[shift:] + root_moves[:shift]
+        # fall back to the first legal move if not even depth 1 finishes in time
+        best_move = root_moves[0]
+        best_score = 0
+        completed_depth = 0
+        max_depth = depth if depth is not None else 100
+        for iteration_depth in range(min(first_depth, max_depth), max_depth + 1):
+            try:
+                move, score = self._search_root(game, root_moves, iteration_depth)
+            except SearchTimeout:
+                break
+            best_move, best_score, completed_depth = move, score, iteration_depth
+            if report is not None:
+                report(move, score, iteration_depth, self._nodes)
+            # search the best move first in the next iteration
+            root_moves.remove(move)
+            root_moves.insert(0, move)
+            # stop early once a forced mate is found, or when the soft time limit has passed
+            if abs(score) >= MATE_BOUND:
+                break
+            if soft_deadline is not None and time.perf_counter() >= soft_deadline:
+                break
+        return SearchResult(best_move, best_score, completed_depth, self._nodes, time.perf_counter() - start)
+
+    def _parallel_best_move(self, game, time_ms, depth):
+        """
+        Searches the game position with a Lazy SMP parallel search and returns the deepest completed SearchResult.
+        Every worker process runs its own iterative deepening on the same position and shares the transposition
+        table, so the workers mostly speed each other up through the table.  Odd numbered workers start one ply
+        deeper and each worker starts from a different root move, so they don't all search the same moves at once.
+        The search ends when any worker completes depth, finds a mate, or the time limits pass.  A worker that dies
+        without sending its final message counts as finished, and workers still running WORKER_GRACE_SECONDS after
+        they were told to stop are terminated, so a lost worker can't hang the search.
+        """
+        start = time.perf_counter()
+        if not game.generate_legal_moves():
+            # no legal moves, the active player is checkmated or stalemated
+            return SearchResult(None, -MATE_SCORE, 0, 0, time.perf_counter() - start, self._workers)
+        self._table.new_search()
+        if time_ms is not None:
+            hard_deadline = start + time_ms / 1000
+            soft_deadline = start + time_ms * SOFT_TIME_FRACTION / 1000
+        else:
+            hard_deadline = None
+            soft_deadline = None
+        context = multiprocessing.get_context()
+        stop_event = context.Event()
+        messages = context.Queue()
+        processes = []
+        for index in range(self._workers):
+            process = context.Process(target=_search_worker, daemon=True,
+                                      args=(index, self._shared_memory.name, self._hash_mb, self._table.get_age(),
+                                            game, time_ms, depth, stop_event, messages))
+            process.start()
+            processes.append(process)
+
+        best = None
+        worker_nodes = [0] * self._workers
+        # workers that sent their final message or died, and the time the workers were told to stop
+        finished = [False] * self._workers
+        stop_time = None
+        gave_up = False
+        while not all(finished):
+            # once stopped, wait for every worker to send its final node count
+            try:
+                message = messages.get(timeout=WORKER_POLL_SECONDS)
+            except queue.Empty:
+                message = None
+                # a worker flushes its messages before it exits, so with none waiting a dead worker sent its last
+                for index, process in enumerate(processes):
+                    if not finished[index] and not process.is_alive():
+                        finished[index] = True
+            if message is not None:
+                index, move, score, completed_depth, nodes = message
+                worker_nodes[index] = nodes
+                if move is None:
+                    # the worker has stopped
+                    finished[index] = True
+                elif best is None or completed_depth > best[2]:
+                    best = (move, score, completed_depth)
+            now = time.perf_counter()
+            if stop_time is not None:
+                if now >= stop_time + WORKER_GRACE_SECONDS:
+                    # give up on the workers that haven't stopped
+                    gave_up = True
+                    break
+                continue
+            if best is not None and ((depth is not None and best[2] >= depth) or abs(best[1]) >= MATE_BOUND or
+                                     (soft_deadline is not None and now >= soft_deadline)):
+                stop_event.set()
+            elif hard_deadline is not None and now >= hard_deadline:
+                stop_event.set()
+            if stop_event.is_set():
+                stop_time = now
+        for process in processes:
+            if gave_up and process.is_alive():
+                process.terminate()
+            process.join()
+        if best is None:
+            # not even depth 1 finished in time, fall back to the first legal move
+            best = (game.generate_legal_moves()[0], 0, 0)
+        return SearchResult(best[0], best[1], best[2], sum(worker_nodes), time.perf_counter() - start, self._workers)
+
+    def _search_root(self, game, root_moves, depth):
+        """Searches each root move to depth and returns the (best move, score) tuple"""
+        alpha = -MATE_SCORE - 1
+        beta = MATE_SCORE + 1
+        best_move = root_moves[0]
+        for move in root_moves:
+            game.push(move)
+            try:
+                score = -self._negamax(game, depth - 1, -beta, -alpha, 1)
+            finally:
+                game.pop()
+            if score > alpha:
+                alpha = score
+                best_move = move
+        self._table.store(game.get_position_hash(), best_move, alpha, depth, BOUND_EXACT)
+        return best_move, alpha
+
+    def _negamax(self, game, depth, alpha, beta, ply):
+        """
+        Returns the score of the game position searched to depth with the alpha-beta window, from the point of
+        view of the side to move.  ply is the distance from the root, used to prefer faster mates.
+        """
+        self._nodes += 1
+        if self._nodes >= self._next_time_check:
+            self._check_time()
+        if game.is_repetition():
+            # the position occurred before in the game or the line searched, score it as a draw without searching it
+            return 0
+        if depth <= 0:
+            # resolve the captures left in the position before it is evaluated
+            return self._quiescence(game, alpha, beta, ply)
+        key = game.get_position_hash()
+        entry = self._table.probe(key)
+        table_move = 0
+        if entry is not None:
+            table_move, table_score, table_depth, bound = entry
+            if table_depth >= depth:
+                # the position was already searched deep enough, use its score if the bound allows it
+                table_score = score_from_table(table_score, ply)
+                if (bound == BOUND_EXACT or (bound == BOUND_LOWER and table_score >= beta) or
+                        (bound == BOUND_UPPER and table_score <= alpha)):
+                    return table_score
+        board = game.get_board_array()
+        original_alpha = alpha
+        best_move = 0
+        searched = 0
+        for move in self._ordered_moves(game, table_move, ply):
+            searched += 1
+            is_quiet = board[move & MOVE_MASK] == EMPTY
+            game.push(move)
+            try:
+                score = -self._negamax(game, depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                game.pop()
+            if score > alpha:
+                alpha = score
+                best_move = move
+                if alpha >= beta:
+                    # the opponent will avoid this position, no need to search the other moves
+                    if is_quiet:
+                        self._record_cutoff(move, depth, ply)
+                    break
+        if not searched:
+            # checkmate or stalemate, both lose in Xiangqi
+            return -MATE_SCORE + ply
+        if alpha >= beta:
+            bound = BOUND_LOWER
+        elif alpha > original_alpha:
+            bound = BOUND_EXACT
+        else:
+            bound = BOUND_UPPER
+        self._table.store(key, best_move, score_to_table(alpha, ply), depth, bound)
+        return alpha
+
+    def _ordered_moves(self, game, table_move, ply):
+        """
+        Yields the legal moves of the active player in the order most likely to cause a cutoff, generated in stages:
+        the transposition table move, captures by most valuable victim / least valuable attacker, the killer moves
+        of the ply, then the quiet moves by history score.  Quiet moves are only generated if no capture cut off.
+        """
+        board = game.get_board_array()
+        if table_move and game.is_legal_move(table_move):
+            yield table_move
+        for move in self._ordered_captures(game):
+            if move != table_move:
+                yield move
+        killers = self._killers[ply] if ply < MAX_PLY else (0, 0)
+        for killer in killers:
+            if (killer and killer != table_move and board[killer & MOVE_MASK] == EMPTY and
+                    game.is_legal_move(killer)):
+                yield killer
+        quiets = game.generate_legal_quiets()
+        quiets.sort(key=self._history.__getitem__, reverse=True)
+        for move in quiets:
+            if move != table_move and move not in killers:
+                yield move
+
+    def _ordered_captures(self, game):
+        """Returns the legal captures of the active player, by most valuable victim then least valuable attacker"""
+        board = game.get_board_array()
+        captures = game.generate_legal_captures()
+        captures.sort(key=lambda move: MVV_LVA[board[move & MOVE_MASK] & TYPE_MASK]
+                      [board[move >> MOVE_SHIFT] & TYPE_MASK], reverse=True)
+        return captures
+
+    def _quiescence(self, game, alpha, beta, ply):
+        """
+        Returns the score of the game position with the alpha-beta window once no captures are left to make,
+        from the point of view of the side to move.  Only captures are searched, or every move if the side to move
+        is in check, so the position is only evaluated where the score won't change with the next exchange.
+        """
+        self._nodes += 1
+        if self._nodes >= self._next_time_check:
+            self._check_time()
+        if ply >= MAX_PLY:
+            return self.evaluate(game)
+        if game.is_in_check(game.get_active_player()):
+            # standing pat is not allowed in check, search every evasion
+            stand_pat = None
+            moves = game.generate_legal_moves()
+            if not moves:
+                return -MATE_SCORE + ply
+        else:
+            if not game.has_legal_move():
+                # stalemate loses in Xiangqi, so a side with no move can't stand pat
+                return -MATE_SCORE + ply
+            # the side to move can decline every capture and keep the static score
+            stand_pat = self.evaluate(game)
+            if stand_pat >= beta:
+                return stand_pat
+            if stand_pat + PIECE_VALUES[CHARIOT] + DELTA_MARGIN <= alpha:
+                # not even winning a chariot would raise the score to alpha
+                return alpha
+            alpha = max(alpha, stand_pat)
+            moves = self._ordered_captures(game)
+        board = game.get_board_array()
+        for move in moves:
+            if stand_pat is not None:
+                # delta pruning, skip captures that can't raise the score to alpha
+                victim = board[move & MOVE_MASK] & TYPE_MASK
+                if stand_pat + PIECE_VALUES[victim] + DELTA_MARGIN <= alpha:
+                    continue
+            game.push(move)
+            try:
+                score = -self._quiescence(game, -beta, -alpha, ply + 1)
+            finally:
+                game.pop()
+            if score > alpha:
+                alpha = score
+                if alpha >= beta:
+                    break
+        return alpha
+
+    def _record_cutoff(self, move, depth, ply):
+        """Remembers a quiet move that caused a cutoff as a killer move of the ply and raises its history score"""
+        if ply < MAX_PLY:
+            killers = self._killers[ply]
+            if killers[0] != move:
+                killers[1] = killers[0]
+                killers[0] = move
+        self._history[move] += depth * depth
+
+    def _check_time(self):
+        """Raises SearchTimeout if the hard time limit has passed"""
+        self._next_time_check = self._nodes + NODES_PER_TIME_CHECK
+        if self._hard_deadline is not None and time.perf_counter() >= self._hard_deadline:
+            raise SearchTimeout
+        if self._stop_event is not None and self._stop_event.is_set():
+            raise SearchTimeout
+
+    def evaluate(self, game):
+        """Returns the static score of the game position in centipawns, from the point of view of the side to move"""
+        score = 0
+        for square, piece in enumerate(game.get_board_array()):
+            if piece:
+                score += PIECE_SQUARE_VALUES[piece][square]
+        if game.get_active_player() == "RED":
+            return score
+        return -score
+
+
+def _search_worker(index, memory_name, hash_mb, age, game, time_ms, depth, stop_event, messages):
+    """
+    Runs one worker process of the parallel search on its own copy of the game, with the transposition table in
+    the named shared memory.  Puts (index, move, score, depth, nodes) on the messages queue after each completed
+    iteration, and (index, None, 0, 0, nodes) when it stops.
+    """
+    memory = shared_memory.SharedMemory(name=memory_name)
+    table = TranspositionTable(hash_mb, memory.buf, age)
+    engine = XiangqiAI(hash_mb, table=table)
+    engine._stop_event = stop_event
+    try:
+        def report(move, score, completed_depth, nodes):
+            messages.put((index, move, score, completed_depth, nodes))
+        result = engine._iterative_deepening(game, time_ms, depth, first_depth=1 + index % 2, root_shift=index,
+                                             report=report)
+        messages.put((index, None, 0, 0, result.get_nodes()))
+    finally:
+        table.release()
+        memory.close()
+
+
+def measure_scaling(game, depth, worker_counts=None, hash_mb=DEFAULT_HASH_MB):
+    """
+    Takes in a XiangqiGame and a depth and searches the position to that depth with each number of workers,
+    a fresh engine each time.  worker_counts defaults to 1, 2, 4, ... up to the number of CPU cores.
+    Prints and returns a list of (workers, SearchResult, speedup) tuples, speedup being the time to reach
+    depth with one worker divided by the time with that many workers.
+    """
+    if worker_counts is None:
+        worker_counts = [1]
+        while worker_counts[-1] * 2 <= (os.cpu_count() or 1):
+            worker_counts.append(worker_counts[-1] * 2)
+    results = []
+    base_time = None
+    for workers in worker_counts:
+        engine = XiangqiAI(hash_mb, workers)
+        try:
+            result = engine.best_move(game, depth=depth)
+        finally:
+            engine.close()
+        if base_time is None:
+            base_time = result.get_time_ms()
+        speedup = base_time / result.get_time_ms() if result.get_time_ms() else 0
+        print("workers %d: depth %d in %.1fms, %d nodes, %d nps, speedup %.2fx" %
+              (workers, result.get_depth(), result.get_time_ms(), result.get_nodes(), result.get_nps(), speedup))
+        results.append((workers, result, speedup))
+    return results
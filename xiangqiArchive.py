@@ -0,0 +1,245 @@
+# Project: CS 162 Portfolio Project
+# Author: Christopher Eckerson
+# Description: Compact binary archive of Xiangqi games with random access through mmap.
+#              An archive file is a fixed header, the games one after another, then an index of game offsets:
+#                  header:  magic 'XQAR', version, game count, index offset                    (24 bytes)
+#                  game:    result code, move count, tags length                              (8 bytes)
+#                           moves as 16 bit move integers (see XiangqiGame.encode_move), then the tags as
+#                           UTF-8 'name<TAB>value' lines (including FEN for other starting positions),
+#                           padded to an even length so every game's moves are 2 byte aligned
+#                  index:   offset of each game as an unsigned 64 bit integer
+#              All numbers are little-endian.  The reader maps the file and finds any game through the index,
+#              so reading one game or a range of its moves doesn't read any other part of the file.
+#              Run as a script: python xiangqiArchive.py pack RECORDS ARCHIVE | info ARCHIVE [GAME]
+import os
+import sys
+import mmap
+import struct
+from array import array
+from XiangqiGame import *
+from xiangqiRecords import GameRecord, RESULTS, read_games_file, format_iccs
+
+# Archive file identification and format version
+ARCHIVE_MAGIC = b"XQAR"
+ARCHIVE_VERSION = 1
+# file header: magic, version, reserved, game count, index offset
+ARCHIVE_HEADER = struct.Struct("<4sHHQQ")
+# game header: result code (index into RESULTS), reserved, move count, tags length in bytes
+GAME_HEADER = struct.Struct("<BBHI")
+# the move and index arrays are stored little-endian, swap them on big-endian machines
+_SWAP_BYTES = sys.byteorder != "little"
+
+
+class ArchiveError(Exception):
+    """Raised when an archive file can't be read or a game can't be written to it"""
+    pass
+
+
+def _encode_tags(headers):
+    """Returns the header dictionary of a game as the bytes of its 'name<TAB>value' lines"""
+    return "".join(name + "\t" + value + "\n" for name, value in headers.items()).encode("utf-8")
+
+
+def _decode_tags(data):
+    """Returns the header dictionary of the bytes of 'name<TAB>value' lines"""
+    headers = {}
+    for line in data.decode("utf-8").splitlines():
+        name, _, value = line.partition("\t")
+        headers[name] = value
+    return headers
+
+
+class ArchiveWriter:
+    """
+    Represents an archive file being written.  Games are written as they are added, only the 8 byte offset of
+    each game is kept in memory until close writes the index.  Can be used in a with statement.
+    """
+
+    def __init__(self, path):
+        """Initialize the writer by creating the archive file at path, with a placeholder header"""
+        self._file = open(path, "wb")
+        self._offsets = array('Q')
+        self._file.write(ARCHIVE_HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, 0, 0, 0))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def add_game(self, moves, result="*", headers=None):
+        """
+        Takes in a sequence of move integers, the result token and an optional headers dictionary,
+        writes the game and returns its game id (its index in the archive)
+        """
+        if result not in RESULTS:
+            raise ArchiveError("invalid result: " + str(result))
+        if len(moves) > 0xffff:
+            raise ArchiveError("games are limited to 65535 moves")
+        tags = _encode_tags(headers or {})
+        moves = array('H', moves)
+        if _SWAP_BYTES:
+            moves.byteswap()
+        self._offsets.append(self._file.tell())
+        self._file.write(GAME_HEADER.pack(RESULTS.index(result), 0, len(moves), len(tags)))
+        self._file.write(moves.tobytes())
+        self._file.write(tags)
+        if len(tags) % 2:
+            # keep the next game's moves 2 byte aligned
+            self._file.write(b"\0")
+        return len(self._offsets) - 1
+
+    def add_record(self, record):
+        """Takes in a GameRecord, writes it and returns its game id"""
+        # the result is stored in the game header and the moves are not text, so those tags aren't kept
+        headers = dict((name, value) for name, value in record.get_headers().items()
+                       if name != "Result" and name != "Format")
+        return self.add_game(record.get_moves(), record.get_result(), headers)
+
+    def close(self):
+        """Writes the index and the final header and closes the file"""
+        if self._file.closed:
+            return
+        index_offset = self._file.tell()
+        offsets = array('Q', self._offsets)
+        if _SWAP_BYTES:
+            offsets.byteswap()
+        self._file.write(offsets.tobytes())
+        self._file.seek(0)
+        self._file.write(ARCHIVE_HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, 0, len(self._offsets), index_offset))
+        self._file.close()
+
+
+class Archive:
+    """
+    Represents an archive file opened for reading, mapped into memory.  Games are read by game id without
+    reading the rest of the file.  Can be used in a with statement, close unmaps the file.
+    """
+
+    def __init__(self, path):
+        """Initialize the archive by mapping the file at path and checking its header and index fit in the file"""
+        with open(path, "rb") as archive_file:
+            # an empty file can't be mapped, check the size first
+            if os.fstat(archive_file.fileno()).st_size < ARCHIVE_HEADER.size:
+                raise ArchiveError("not an archive file: " + path)
+            self._map = mmap.mmap(archive_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, reserved, game_count, index_offset = ARCHIVE_HEADER.unpack_from(self._map, 0)
+        if magic != ARCHIVE_MAGIC or version != ARCHIVE_VERSION:
+            self._map.close()
+            raise ArchiveError("not a version " + str(ARCHIVE_VERSION) + " archive file: " + path)
+        if index_offset < ARCHIVE_HEADER.size or index_offset + 8 * game_count > len(self._map):
+            self._map.close()
+            raise ArchiveError("truncated archive file: " + path)
+        self._game_count = game_count
+        self._index_offset = index_offset
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Unmaps the archive file"""
+        self._map.close()
+
+    def __len__(self):
+        """Returns the number of games in the archive"""
+        return self._game_count
+
+    def _game_offset(self, game_id):
+        """Returns the file offset of a game, raises IndexError if there is no such game"""
+        if not 0 <= game_id < self._game_count:
+            raise IndexError("game id out of range: " + str(game_id))
+        return struct.unpack_from("<Q", self._map, self._index_offset + 8 * game_id)[0]
+
+    def _game_header(self, game_id):
+        """Returns the (offset, result code, move count, tags length) of a game"""
+        offset = self._game_offset(game_id)
+        result_code, reserved, move_count, tags_length = GAME_HEADER.unpack_from(self._map, offset)
+        return offset, result_code, move_count, tags_length
+
+    def get_result(self, game_id):
+        """Returns the result token of a game"""
+        return RESULTS[self._game_header(game_id)[1]]
+
+    def get_move_count(self, game_id):
+        """Returns the number of moves of a game"""
+        return self._game_header(game_id)[2]
+
+    def get_moves(self, game_id, start=0, stop=None):
+        """
+        Returns the moves of a game from ply index start up to stop (all of them by default)
+        as an array of move integers.  Only those moves are read from the file.
+        """
+        offset, result_code, move_count, tags_length = self._game_header(game_id)
+        stop = move_count if stop is None else max(0, min(stop, move_count))
+        start = max(0, min(start, stop))
+        first = offset + GAME_HEADER.size
+        moves = array('H')
+        moves.frombytes(self._map[first + 2 * start:first + 2 * stop])
+        if _SWAP_BYTES:
+            moves.byteswap()
+        return moves
+
+    def get_headers(self, game_id):
+        """Returns the headers dictionary of a game"""
+        offset, result_code, move_count, tags_length = self._game_header(game_id)
+        tags = offset + GAME_HEADER.size + 2 * move_count
+        return _decode_tags(self._map[tags:tags + tags_length])
+
+    def get_record(self, game_id):
+        """Returns a game as a GameRecord"""
+        return GameRecord(self.get_headers(game_id), self.get_moves(game_id), self.get_result(game_id))
+
+    def replay(self, game_id, ply=None, headless=True):
+        """
+        Returns a XiangqiGame of a game's position after ply moves (all of the moves by default), replayed from the
+        game's starting position with its game log, counter and FEN move numbers following the moves
+        """
+        headers = self.get_headers(game_id)
+        game = XiangqiGame.from_fen(headers.get("FEN", START_FEN), headless)
+        game.replay_moves(self.get_moves(game_id, 0, ply))
+        return game
+
+    def __iter__(self):
+        """Yields every game as a GameRecord, in game id order"""
+        for game_id in range(self._game_count):
+            yield self.get_record(game_id)
+
+
+def pack_records(records_path, archive_path):
+    """
+    Takes in the path of a game record file (see xiangqiRecords) and writes its valid games to a new archive,
+    returns the (games written, games skipped) tuple
+    """
+    written = skipped = 0
+    with ArchiveWriter(archive_path) as writer:
+        for record in read_games_file(records_path):
+            if record.is_valid():
+                writer.add_record(record)
+                written += 1
+            else:
+                skipped += 1
+    return written, skipped
+
+
+def main():
+    """Packs a game record file into an archive, or prints an archive's size or one of its games"""
+    if len(sys.argv) == 4 and sys.argv[1] == "pack":
+        written, skipped = pack_records(sys.argv[2], sys.argv[3])
+        print(written, "games archived,", skipped, "invalid games skipped")
+    elif len(sys.argv) in (3, 4) and sys.argv[1] == "info":
+        with Archive(sys.argv[2]) as archive:
+            print(len(archive), "games")
+            if len(sys.argv) == 4:
+                game_id = int(sys.argv[3])
+                print(archive.get_headers(game_id), archive.get_result(game_id))
+                print(" ".join(format_iccs(move) for move in archive.get_moves(game_id)))
+    else:
+        print("usage: python xiangqiArchive.py pack RECORDS ARCHIVE | info ARCHIVE [GAME]")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
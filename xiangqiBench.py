@@ -0,0 +1,268 @@
+# Project: CS 162 Portfolio Project
+# Author: Christopher Eckerson
+# Description: Benchmark suite for the Xiangqi Game hot paths.  Times make_move, is_in_check, is_in_check_mate,
+#              update_log, sync_to_last_log and each piece type's allowed_move over a fixed corpus of opening,
+#              middlegame and endgame positions, recording operations per second and the memory allocated
+#              (largest peak of traced bytes in one call, from tracemalloc).  The speed of a benchmark is the median
+#              of several timed rounds.  Results are compared with the committed baseline in bench_baseline.json and
+#              any benchmark slower or allocating more than the threshold is flagged as a regression, with a wider
+#              speed threshold for operations too fast to time precisely.
+#              Run as a script: python xiangqiBench.py [--save] [--threshold PERCENT] [--baseline FILE]
+import os
+import sys
+import statistics
+import json
+import time
+import argparse
+import tracemalloc
+from contextlib import redirect_stdout
+from XiangqiGame import *
+
+# Benchmark positions by game phase, each a string of moves (from and to squares) played from the starting position
+CORPUS = {
+    "opening": [
+        "",
+        "b3b7 a10a8 b1a3 h8e8",
+        "b3b7 a10a8 b1a3 h8e8 i4i5 e8c8 h3h7 i10i8",
+    ],
+    "middlegame": [
+        "h3h10 b8b9 b3a3 h8f8 f1e2 f8f5 a3a7 i7i6 e2f3 f5f7 h10f10 a10a7 d1e2 b9b3 i1i3 e10f10 i4i5 b3i3 c1e3 a7a10 "
+        "g1i3 f7f4 i5i6 a10a6 b1d2 f4f7 c4c5 i10i6 i3g5 g10e8",
+        "h1i3 d10e9 h3h4 b8b1 b3b7 h8f8 h4h5 b1d1 b7e7 e10d10 h5h3 f8h8 a4a5 d1d4 h3h4 d4g4 h4h6 a10a8 i3g4 d10d9 "
+        "h6f6 a7a6 c4c5 h8h6 c5c6 a6a5 g4h6 a8a9 a1a5 e9d10",
+        "h3h10 b8b1 c4c5 a7a6 b3c3 h8h6 c3i3 b1d1 i3i2 b10c8 a4a5 d1d9 a5a6 a10a6 h10f10 e10f10 c1e3 d9d7 e4e5 g10e8 "
+        "a1a6 h6d6 i4i5 f10e10 a6d6 c8a7 d6d5 i10i9 i2i4 i9a9",
+    ],
+    "endgame": [
+        "h3h10 i10h10 b3b10 a10b10 i1i3 h8h2 i3a3 d10e9 a3a2 h2h4 a2i2 h4h7 i2d2 b8e8 d2f2 e8f8 f2f8 b10b1 f8f3 b1c1 "
+        "e4e5 c1c4 f3f10 e10f10 g1e3 c4a4 a1a4 e9f8 a4a7 h7h3 a7c7 h3h5 c7e7 g10e8 e7e8 c10e8 h1f2 h5h9 f2h3 h9h5 "
+        "e1e2 h5h8 e5e6 h8h4 h3f2 h10g10 g4g5 g10g9 e2e1 h4c4 f2h3 g9g8 e3g1 g8g9 e1e2 c4c3 g1i3 c3i3 h3f4 e8c6 "
+        "e2e3 i3g3 f4h3 g9b9 e6d6 b9h9 d6c6 h9h3 e3f3 g3g2",
+        "h3h10 b8b1 h10f10 b1d1 f10i10 h8h10 e1d1 c7c6 i10g10 h10h6 g10d10 a7a6 d10b10 a10b10 b3b1 b10b1 a1b1 a6a5 "
+        "d1d2 a5a4 h1i3 h6h1 i1h1 c10e8 b1b10 e10e9 b10d10 i7i6 h1i1 i6i5 i4i5 c6c5 c4c5 a4b4 g4g5 e7e6 i3h5 g7g6 "
+        "g5g6 e8g6 g1i3 b4a4 d10d9 e9e10 d9d5 g6e8 h5f4 a4a3 i1i2 e8c6 d2d3 e10f10 c1a3 f10f9 c5c6 f9f8 d5b5 f8f9 "
+        "f4e6 f9f10 e6d4 f10f9 b5b9 f9f10 a3c5 f10e10 i3g1 e10f10 b9b7 f10f9",
+        "b3b10 h8h1 b10d10 e10d10 i1h1 b8b2 h3g3 b2b3 g3g7 g10i8 g7c7 b3b8 h1h10 i10h10 c7i7 b8b2 i7a7 a10a7 f1e2 "
+        "a7a4 a1a4 h10h8 a4a8 c10a8 g1e3 h8g8 e2f1 g8g4 i4i5 g4e4 f1e2 e4d4 e2f1 d4c4 d1e2 c4c1 e3c1 d10e10 e2d1 "
+        "b2e2 e1e2 f10e9 b1c3 i8g6 e2e3 e9f10 c1a3 e10d10 a3c1 a8c6 e3f3 d10d9 c3e4 d9e9 i5i6 e9e10 c1e3 c6a8 e3g5 "
+        "g6e8 e4g3 a8c10 g3h5 c10a8 f3e3 f10e9 h5i7 e9f10 i7g6 e8g6",
+    ],
+}
+# baseline file committed next to this module
+BASELINE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_baseline.json")
+# percent slower (or more memory) than the baseline that counts as a regression
+DEFAULT_THRESHOLD = 25
+# times each benchmark goes over the corpus when timed, the median round is kept
+TIMED_ROUNDS = 10
+# operations faster than this many per second (under a microsecond) vary more from round to round than the
+# threshold, their speed is compared with the threshold multiplied by FAST_THRESHOLD_FACTOR
+FAST_OPS_PER_SEC = 1000000
+FAST_THRESHOLD_FACTOR = 2
+# times the cheap check queries are repeated per position in one round
+QUERY_REPEATS = 20
+
+
+def split_moves(moves):
+    """Takes in a string of moves like 'b3b7 a10a8' and returns a list of (from, to) algebraic notation tuples"""
+    pairs = []
+    for move in moves.split():
+        # the to square starts at the second letter
+        split = next(index for index in range(1, len(move)) if move[index].isalpha())
+        pairs.append((move[:split], move[split:]))
+    return pairs
+
+
+def load_corpus():
+    """Returns a list of (phase, XiangqiGame) tuples of the corpus positions, played with make_move"""
+    positions = []
+    for phase, games in CORPUS.items():
+        for moves in games:
+            game = XiangqiGame()
+            with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+                for currentPosition, nextPosition in split_moves(moves):
+                    if not game.make_move(currentPosition, nextPosition):
+                        raise ValueError("illegal move in benchmark corpus: " + currentPosition + nextPosition)
+            positions.append((phase, game))
+    return positions
+
+
+def _legal_move_pairs(game):
+    """Returns the legal moves of the active player as (from, to) algebraic notation tuples"""
+    return [(square_algebraic(move >> MOVE_SHIFT), square_algebraic(move & MOVE_MASK))
+            for move in game.generate_legal_moves()]
+
+
+class _TimeRecorder:
+    """Calls the benchmarked methods, adding up the calls and seconds taken by benchmark name"""
+
+    def __init__(self):
+        """Initialize empty call counts and times"""
+        self.calls = {}
+        self.seconds = {}
+
+    def __call__(self, name, method, *args):
+        """Calls method with args, timing it under the benchmark name, and returns its result"""
+        start = time.perf_counter()
+        result = method(*args)
+        elapsed = time.perf_counter() - start
+        self.calls[name] = self.calls.get(name, 0) + 1
+        self.seconds[name] = self.seconds.get(name, 0) + elapsed
+        return result
+
+
+class _MemoryRecorder:
+    """Calls the benchmarked methods under tracemalloc, keeping the largest peak allocation of one call by name"""
+
+    def __init__(self):
+        """Initialize empty peak allocations"""
+        self.peaks = {}
+
+    def __call__(self, name, method, *args):
+        """Calls method with args, measuring the memory it allocates at its peak, and returns its result"""
+        tracemalloc.reset_peak()
+        current = tracemalloc.get_traced_memory()[0]
+        result = method(*args)
+        peak = tracemalloc.get_traced_memory()[1] - current
+        self.peaks[name] = max(self.peaks.get(name, 0), peak)
+        return result
+
+
+def bench_make_move(positions, record):
+    """Records make_move of every legal move of every position, each move taken back after with sync_to_last_log"""
+    for phase, game in positions:
+        for currentPosition, nextPosition in _legal_move_pairs(game):
+            record("make_move", game.make_move, currentPosition, nextPosition)
+            record("sync_to_last_log", game.sync_to_last_log)
+
+
+def bench_update_log(positions, record):
+    """Records update_log after every legal move of every position, made with push and taken back by sync_to_last_log"""
+    for phase, game in positions:
+        for move in game.generate_legal_moves():
+            game.push(move)
+            record("update_log", game.update_log)
+            game.sync_to_last_log()
+
+
+def bench_is_in_check(positions, record):
+    """Records is_in_check of both players in every position"""
+    for phase, game in positions:
+        for repeat in range(QUERY_REPEATS):
+            record("is_in_check", game.is_in_check, "red")
+            record("is_in_check", game.is_in_check, "black")
+
+
+def bench_is_in_check_mate(positions, record):
+    """
+    Records is_in_check_mate of both players in every position, after every legal move of the active player.
+    The status cache is cleared first, so each round works the statuses out instead of looking them up.
+    """
+    for phase, game in positions:
+        game.clear_status_cache()
+        for move in game.generate_legal_moves():
+            game.push(move)
+            record("is_in_check_mate", game.is_in_check_mate, "red")
+            record("is_in_check_mate", game.is_in_check_mate, "black")
+            game.pop()
+
+
+def bench_allowed_move(positions, record):
+    """Records allowed_move of every piece in every position, by piece type"""
+    for phase, game in positions:
+        for piece in list(game.get_board_dictionary().values()):
+            name = "allowed_move[" + piece.get_pieceName() + "]"
+            for repeat in range(QUERY_REPEATS):
+                record(name, piece.allowed_move, game)
+
+
+# every benchmark function, each is given the corpus positions and a recorder to call the benchmarked methods with
+BENCHMARKS = [bench_make_move, bench_update_log, bench_is_in_check, bench_is_in_check_mate, bench_allowed_move]
+
+
+def run_benchmarks():
+    """
+    Runs every benchmark over the corpus and returns a dictionary by benchmark name of
+    {'ops_per_sec': operations per second of the median round, 'peak_bytes': largest peak allocation of one call}
+    """
+    positions = load_corpus()
+    # operations per second of each round by benchmark name
+    rounds = {}
+    # the console messages of make_move are thrown away, so printing them costs no memory
+    with open(os.devnull, "w") as devnull, redirect_stdout(devnull):
+        for round_number in range(TIMED_ROUNDS):
+            recorder = _TimeRecorder()
+            for benchmark in BENCHMARKS:
+                benchmark(positions, recorder)
+            for name, seconds in recorder.seconds.items():
+                ops_per_sec = recorder.calls[name] / seconds if seconds > 0 else 0
+                rounds.setdefault(name, []).append(ops_per_sec)
+        # measure memory in a separate round, tracing slows the code down too much to time it
+        recorder = _MemoryRecorder()
+        tracemalloc.start()
+        try:
+            for benchmark in BENCHMARKS:
+                benchmark(positions, recorder)
+        finally:
+            tracemalloc.stop()
+    results = {}
+    for name in sorted(rounds):
+        results[name] = {"ops_per_sec": round(statistics.median(rounds[name])), "peak_bytes": recorder.peaks[name]}
+    return results
+
+
+def compare(results, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    Takes in benchmark results, baseline results and a threshold percent, and returns a list of regression messages
+    for every benchmark over threshold percent slower, or allocating over threshold percent more, than the baseline.
+    Operations faster than FAST_OPS_PER_SEC are only slower past threshold * FAST_THRESHOLD_FACTOR percent.
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        base = baseline[name]
+        speed_threshold = threshold
+        if base["ops_per_sec"] > FAST_OPS_PER_SEC:
+            speed_threshold = threshold * FAST_THRESHOLD_FACTOR
+        if result["ops_per_sec"] < base["ops_per_sec"] * (1 - speed_threshold / 100):
+            regressions.append("%s: %d ops/sec, baseline %d" % (name, result["ops_per_sec"], base["ops_per_sec"]))
+        if result["peak_bytes"] > base["peak_bytes"] * (1 + threshold / 100):
+            regressions.append("%s: %d peak bytes, baseline %d" % (name, result["peak_bytes"], base["peak_bytes"]))
+    return regressions
+
+
+def main():
+    """Runs the benchmarks, prints them beside the baseline and exits with status 1 on a regression"""
+    parser = argparse.ArgumentParser(description="Benchmark the Xiangqi Game hot paths against a stored baseline")
+    parser.add_argument("--save", action="store_true", help="store the results as the new baseline")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="regression threshold in percent")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help="baseline JSON file")
+    args = parser.parse_args()
+
+    results = run_benchmarks()
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)["results"]
+    print("%-24s %12s %12s %12s %12s" % ("benchmark", "ops/sec", "baseline", "peak bytes", "baseline"))
+    for name, result in results.items():
+        base = baseline.get(name, {})
+        print("%-24s %12d %12d %12d %12d" % (name, result["ops_per_sec"], base.get("ops_per_sec", 0),
+                                              result["peak_bytes"], base.get("peak_bytes", 0)))
+    if args.save:
+        with open(args.baseline, "w") as baseline_file:
+            json.dump({"python": sys.version.split()[0], "results": results}, baseline_file, indent=2)
+            baseline_file.write("\n")
+        print("baseline saved to", args.baseline)
+        return
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print("REGRESSIONS over %g%%:" % args.threshold)
+        for regression in regressions:
+            print("  " + regression)
+        sys.exit(1)
+    print("no regressions over %g%%" % args.threshold)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+# Project: CS 162 Portfolio Project
+# Author: Christopher Eckerson
+# Description: Opening book for the Xiangqi Game computer player.  The book is built from game records
+#              (see xiangqiRecords) or a game archive (see xiangqiArchive): every move played in the first plies
+#              of a game is counted with the result it led to, by the Zobrist hash of the position it was played
+#              from (see XiangqiGame.get_position_hash).  The counts are written sorted by hash and move:
+#                  header:  magic 'XQBK', version, entry count                                  (16 bytes)
+#                  entries: position hash, move, reserved, games, wins, draws, losses          (28 bytes)
+#              Wins, draws and losses are for the player making the move, unfinished games are only in games.
+#              All numbers are little-endian.  The reader maps the file and binary searches it for a position,
+#              so a book move is found without searching.
+#              Run as a script: python xiangqiBook.py build RECORDS_OR_ARCHIVE BOOK | probe BOOK [FEN]
+import os
+import sys
+import mmap
+import random
+import struct
+from XiangqiGame import *
+from xiangqiArchive import Archive, ARCHIVE_MAGIC
+from xiangqiRecords import read_games_file
+
+# Book file identification and format version
+BOOK_MAGIC = b"XQBK"
+BOOK_VERSION = 1
+# file header: magic, version, reserved, entry count
+BOOK_HEADER = struct.Struct("<4sHHQ")
+# entry: position hash, move, reserved, games, wins, draws, losses
+BOOK_ENTRY = struct.Struct("<QHHIIII")
+# number of plies from the start of each game entered in the book
+BOOK_PLIES = 20
+# moves played in fewer games than this are left out of the book
+MIN_BOOK_GAMES = 2
+# result token by the player who won it
+WINNING_RESULTS = {"RED": "1-0", "BLACK": "0-1"}
+
+
+class BookError(Exception):
+    """Raised when a book file can't be read"""
+    pass
+
+
+class BookMove:
+    """Represents a move of the opening book with the games it was played in and their results"""
+
+    def __init__(self, move, games, wins, draws, losses):
+        """Initialize the book move with the move integer and its game counts, for the player making the move"""
+        self._move = move
+        self._games = games
+        self._wins = wins
+        self._draws = draws
+        self._losses = losses
+
+    def get_move(self):
+        """Returns the move integer"""
+        return self._move
+
+    def get_algebraic_move(self):
+        """Returns the move as a (from, to) tuple of algebraic notation strings for make_move"""
+        from_square, to_square = decode_move(self._move)
+        return square_algebraic(from_square), square_algebraic(to_square)
+
+    def get_games(self):
+        """Returns the number of games the move was played in"""
+        return self._games
+
+    def get_wins(self):
+        """Returns the number of those games won by the player making the move"""
+        return self._wins
+
+    def get_draws(self):
+        """Returns the number of those games drawn"""
+        return self._draws
+
+    def get_losses(self):
+        """Returns the number of those games lost by the player making the move"""
+        return self._losses
+
+    def get_weight(self):
+        """Returns the weight of the move when picking a book move: two for each win and one for each draw"""
+        return 2 * self._wins + self._draws
+
+    def __repr__(self):
+        """Returns a one line summary of the book move"""
+        return ("BookMove(move=%s, games=%d, wins=%d, draws=%d, losses=%d)" %
+                (self.get_algebraic_move(), self._games, self._wins, self._draws, self._losses))
+
+
+def _iter_games(source_path, plies):
+    """
+    Takes in the path of a game record file or an archive and yields the (starting FEN, first plies moves, result)
+    of each valid game
+    """
+    with open(source_path, "rb") as source_file:
+        is_archive = source_file.read(len(ARCHIVE_MAGIC)) == ARCHIVE_MAGIC
+    if is_archive:
+        with Archive(source_path) as archive:
+            for game_id in range(len(archive)):
+                yield (archive.get_headers(game_id).get("FEN", START_FEN), archive.get_moves(game_id, 0, plies),
+                       archive.get_result(game_id))
+    else:
+        for record in read_games_file(source_path):
+            if record.is_valid():
+                yield record.get_start_fen(), record.get_moves()[:plies], record.get_result()
+
+
+def build_book(source_path, book_path, plies=BOOK_PLIES, min_games=MIN_BOOK_GAMES):
+    """
+    Takes in the path of a game record file or an archive and writes the opening book of the first plies
+    of its games to book_path, leaving out moves played in fewer than min_games games.
+    Returns the number of entries written.
+    """
+    # counts of [games, wins, draws, losses] by (position hash, move)
+    counts = {}
+    game = XiangqiGame(headless=True)
+    loaded_fen = START_FEN
+    for fen, moves, result in _iter_games(source_path, plies):
+        if fen != loaded_fen:
+            game.set_fen(fen)
+            loaded_fen = fen
+        for move in moves:
+            entry = counts.setdefault((game.get_position_hash(), move), [0, 0, 0, 0])
+            entry[0] += 1
+            if result == "1/2-1/2":
+                entry[2] += 1
+            elif result == WINNING_RESULTS[game.get_active_player()]:
+                entry[1] += 1
+            elif result != "*":
+                entry[3] += 1
+            game.push(move)
+        for move in moves:
+            game.pop()
+    entries = sorted((key, entry) for key, entry in counts.items() if entry[0] >= min_games)
+    with open(book_path, "wb") as book_file:
+        book_file.write(BOOK_HEADER.pack(BOOK_MAGIC, BOOK_VERSION, 0, len(entries)))
+        for (position_hash, move), (games, wins, draws, losses) in entries:
+            book_file.write(BOOK_ENTRY.pack(position_hash, move, 0, games, wins, draws, losses))
+    return len(entries)
+
+
+class OpeningBook:
+    """
+    Represents an opening book file opened for reading, mapped into memory.
+    Can be used in a with statement, close unmaps the file.
+    """
+
+    def __init__(self, path):
+        """Initialize the book by mapping the file at path and checking its header"""
+        with open(path, "rb") as book_file:
+            # an empty file can't be mapped, check the size first
+            if os.fstat(book_file.fileno()).st_size < BOOK_HEADER.size:
+                raise BookError("not an opening book file: " + path)
+            self._map = mmap.mmap(book_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, reserved, count = BOOK_HEADER.unpack_from(self._map, 0)
+        if magic != BOOK_MAGIC or version != BOOK_VERSION:
+            self._map.close()
+            raise BookError("not a version " + str(BOOK_VERSION) + " opening book file: " + path)
+        if BOOK_HEADER.size + BOOK_ENTRY.size * count > len(self._map):
+            self._map.close()
+            raise BookError("truncated opening book file: " + path)
+        self._count = count
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Unmaps the book file"""
+        self._map.close()
+
+    def __len__(self):
+        """Returns the number of (position, move) entries in the book"""
+        return self._count
+
+    def _entry_hash(self, index):
+        """Returns the position hash of the entry at index"""
+        return struct.unpack_from("<Q", self._map, BOOK_HEADER.size + BOOK_ENTRY.size * index)[0]
+
+    def get_moves(self, game):
+        """
+        Takes in a XiangqiGame and returns the list of BookMoves of its position, most played first.
+        Moves that aren't legal in the position (a hash collision) are left out.
+        """
+        position_hash = game.get_position_hash()
+        # binary search for the first entry of the position
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._entry_hash(middle) < position_hash:
+                low = middle + 1
+            else:
+                high = middle
+        book_moves = []
+        while low < self._count:
+            entry_hash, move, reserved, games, wins, draws, losses = BOOK_ENTRY.unpack_from(
+                self._map, BOOK_HEADER.size + BOOK_ENTRY.size * low)
+            if entry_hash != position_hash:
+                break
+            if game.is_legal_move(move):
+                book_moves.append(BookMove(move, games, wins, draws, losses))
+            low += 1
+        book_moves.sort(key=BookMove.get_games, reverse=True)
+        return book_moves
+
+    def choose_move(self, game, rng=random):
+        """
+        Takes in a XiangqiGame and returns a BookMove of its position picked at random by weight, or None if the
+        book has no move with a win or a draw for the position.  rng: random number generator to pick with
+        """
+        book_moves = [book_move for book_move in self.get_moves(game) if book_move.get_weight() > 0]
+        if not book_moves:
+            return None
+        return rng.choices(book_moves, weights=[book_move.get_weight() for book_move in book_moves])[0]
+
+
+def main():
+    """Builds an opening book, or prints the book moves of a FEN position (the starting position by default)"""
+    if len(sys.argv) == 4 and sys.argv[1] == "build":
+        print(build_book(sys.argv[2], sys.argv[3]), "book entries written")
+    elif len(sys.argv) >= 3 and sys.argv[1] == "probe":
+        with OpeningBook(sys.argv[2]) as book:
+            game = XiangqiGame.from_fen(" ".join(sys.argv[3:]) or START_FEN, headless=True)
+            for book_move in book.get_moves(game):
+                print(book_move)
+    else:
+        print("usage: python xiangqiBook.py build RECORDS_OR_ARCHIVE BOOK | probe BOOK [FEN]")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,298 @@
+# Project: CS 162 Portfolio Project
+# Author: Christopher Eckerson
+# Description: Position index of a Xiangqi game archive (see xiangqiArchive), answering which archived games
+#              reached a position and how they ended.  Every position of every game (each ply, including the
+#              starting position) is entered as its Zobrist hash (see XiangqiGame.get_position_hash) with the game
+#              id, ply and result.  The entries are sorted by hash in runs that fit in memory and the runs are
+#              merged into one index file:
+#                  header:  magic 'XQIX', version, entry count                                  (16 bytes)
+#                  entries: position hash, then game id << 24 | ply << 8 | result code         (2 x 64 bits)
+#              All numbers are little-endian.  The reader maps the file and binary searches the hashes, so a
+#              lookup reads about log2(entries) entries, a few dozen even for 10^8 positions.
+#              The hashes depend on the game's Zobrist keys, an index must be rebuilt if they change.
+#              Run as a script: python xiangqiIndex.py build ARCHIVE INDEX | query INDEX FEN
+import os
+import sys
+import mmap
+import heapq
+import struct
+import tempfile
+from array import array
+from bisect import bisect_left
+from XiangqiGame import *
+from xiangqiArchive import Archive
+from xiangqiRecords import RESULTS
+
+# Index file identification and format version
+INDEX_MAGIC = b"XQIX"
+INDEX_VERSION = 1
+# file header: magic, version, reserved, entry count
+INDEX_HEADER = struct.Struct("<4sHHQ")
+# number of entries sorted in memory at a time while building an index, about 60 MB of Python integers
+RUN_ENTRIES = 1 << 20
+# number of 64 bit words read or written at a time when merging runs
+BLOCK_WORDS = 1 << 14
+# the entry arrays are stored little-endian, swap them on big-endian machines
+_SWAP_BYTES = sys.byteorder != "little"
+
+
+class IndexFileError(Exception):
+    """Raised when a position index file can't be read"""
+    pass
+
+
+def _swap_word(word):
+    """Returns a 64 bit word with its bytes reversed, converts between the file's and a big-endian machine's order"""
+    return int.from_bytes(word.to_bytes(8, "little"), "big")
+
+
+def pack_entry(game_id, ply, result_code):
+    """Returns the 64 bit payload of an index entry: game id, ply and result code (index into RESULTS)"""
+    return game_id << 24 | ply << 8 | result_code
+
+
+def unpack_entry(payload):
+    """Returns the (game id, ply, result code) tuple of an index entry payload"""
+    return payload >> 24, payload >> 8 & 0xffff, payload & 0xff
+
+
+class PositionStats:
+    """
+    Represents the result of a position query: every (game id, ply, result) hit, and the results of the
+    distinct games that reached the position
+    """
+
+    def __init__(self, hits):
+        """Initialize the stats with the list of (game id, ply, result) hits"""
+        self._hits = hits
+        # count each game once, a game can reach the same position more than once
+        self._results = {result: 0 for result in RESULTS}
+        seen = set()
+        for game_id, ply, result in hits:
+            if game_id not in seen:
+                seen.add(game_id)
+                self._results[result] += 1
+        self._game_count = len(seen)
+
+    def get_hits(self):
+        """Returns the list of (game id, ply, result) tuples of each time an archived game reached the position"""
+        return self._hits
+
+    def get_game_count(self):
+        """Returns the number of distinct games that reached the position"""
+        return self._game_count
+
+    def get_red_wins(self):
+        """Returns the number of those games red won"""
+        return self._results["1-0"]
+
+    def get_black_wins(self):
+        """Returns the number of those games black won"""
+        return self._results["0-1"]
+
+    def get_draws(self):
+        """Returns the number of those games drawn"""
+        return self._results["1/2-1/2"]
+
+    def get_unfinished(self):
+        """Returns the number of those games without a result"""
+        return self._results["*"]
+
+    def __repr__(self):
+        """Returns a one line summary of the stats"""
+        return ("PositionStats(games=%d, red wins=%d, draws=%d, black wins=%d, unfinished=%d)" %
+                (self._game_count, self.get_red_wins(), self.get_draws(), self.get_black_wins(),
+                 self.get_unfinished()))
+
+
+def _iter_positions(archive):
+    """
+    Takes in an Archive and yields an index entry key (hash << 64 | payload) for every position of every game,
+    replaying each game with push and taking it back with pop on one headless game
+    """
+    game = XiangqiGame(headless=True)
+    loaded_fen = START_FEN
+    for game_id in range(len(archive)):
+        result_code = RESULTS.index(archive.get_result(game_id))
+        moves = archive.get_moves(game_id)
+        fen = archive.get_headers(game_id).get("FEN", START_FEN)
+        if fen != loaded_fen:
+            game.set_fen(fen)
+            loaded_fen = fen
+        yield game.get_position_hash() << 64 | pack_entry(game_id, 0, result_code)
+        for ply, move in enumerate(moves, 1):
+            game.push(move)
+            yield game.get_position_hash() << 64 | pack_entry(game_id, ply, result_code)
+        for move in moves:
+            game.pop()
+
+
+def _write_run(keys, directory):
+    """Sorts a list of entry keys and writes them to a temporary run file in directory, returns its path"""
+    keys.sort()
+    words = array('Q')
+    for key in keys:
+        words.append(key >> 64)
+        words.append(key & 0xffffffffffffffff)
+    if _SWAP_BYTES:
+        words.byteswap()
+    handle, path = tempfile.mkstemp(suffix=".run", dir=directory)
+    with os.fdopen(handle, "wb") as run_file:
+        words.tofile(run_file)
+    return path
+
+
+def _read_run(path):
+    """Yields the entry keys of a run file in order, reading a block at a time"""
+    with open(path, "rb") as run_file:
+        while True:
+            block = run_file.read(BLOCK_WORDS * 8)
+            if not block:
+                return
+            words = array('Q')
+            words.frombytes(block)
+            if _SWAP_BYTES:
+                words.byteswap()
+            for index in range(0, len(words), 2):
+                yield words[index] << 64 | words[index + 1]
+
+
+def build_index(archive_path, index_path, run_entries=RUN_ENTRIES):
+    """
+    Takes in the path of a game archive and writes the position index of its games to index_path.
+    Memory use is bounded by run_entries, the entries are sorted in runs written next to the index and merged.
+    Returns the number of entries written.
+    """
+    directory = os.path.dirname(os.path.abspath(index_path))
+    runs = []
+    try:
+        with Archive(archive_path) as archive:
+            keys = []
+            for key in _iter_positions(archive):
+                keys.append(key)
+                if len(keys) >= run_entries:
+                    runs.append(_write_run(keys, directory))
+                    keys = []
+            if keys or not runs:
+                runs.append(_write_run(keys, directory))
+        count = 0
+        with open(index_path, "wb") as index_file:
+            index_file.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, 0, 0))
+            words = array('Q')
+            for key in heapq.merge(*[_read_run(path) for path in runs]):
+                words.append(key >> 64)
+                words.append(key & 0xffffffffffffffff)
+                count += 1
+                if len(words) >= BLOCK_WORDS:
+                    if _SWAP_BYTES:
+                        words.byteswap()
+                    words.tofile(index_file)
+                    words = array('Q')
+            if _SWAP_BYTES:
+                words.byteswap()
+            words.tofile(index_file)
+            index_file.seek(0)
+            index_file.write(INDEX_HEADER.pack(INDEX_MAGIC, INDEX_VERSION, 0, count))
+    finally:
+        for path in runs:
+            os.remove(path)
+    return count
+
+
+class PositionIndex:
+    """
+    Represents a position index file opened for reading, mapped into memory.
+    Can be used in a with statement, close unmaps the file.
+    """
+
+    def __init__(self, path):
+        """Initialize the index by mapping the file at path and checking its header"""
+        with open(path, "rb") as index_file:
+            # an empty file can't be mapped, check the size first
+            if os.fstat(index_file.fileno()).st_size < INDEX_HEADER.size:
+                raise IndexFileError("not a position index file: " + path)
+            self._map = mmap.mmap(index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, reserved, count = INDEX_HEADER.unpack_from(self._map, 0)
+        if magic != INDEX_MAGIC or version != INDEX_VERSION:
+            self._map.close()
+            raise IndexFileError("not a version " + str(INDEX_VERSION) + " position index file: " + path)
+        if INDEX_HEADER.size + 16 * count > len(self._map):
+            self._map.close()
+            raise IndexFileError("truncated position index file: " + path)
+        self._count = count
+        self._words = memoryview(self._map)[INDEX_HEADER.size:INDEX_HEADER.size + 16 * count].cast('Q')
+        # every other word is a hash, in sorted order
+        self._hashes = self._words[0::2]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Unmaps the index file"""
+        self._hashes.release()
+        self._words.release()
+        self._map.close()
+
+    def __len__(self):
+        """Returns the number of positions entered in the index"""
+        return self._count
+
+    def _entry_hash(self, index):
+        """Returns the position hash of the entry at index"""
+        if _SWAP_BYTES:
+            return _swap_word(self._hashes[index])
+        return self._hashes[index]
+
+    def _search_hash(self, position_hash):
+        """Returns the index of the first entry with a hash not less than position_hash"""
+        if not _SWAP_BYTES:
+            return bisect_left(self._hashes, position_hash)
+        # the mapped words are read in machine order, byte swapped words on a big-endian machine aren't in sorted
+        # order, so binary search the hashes as they were written
+        low, high = 0, self._count
+        while low < high:
+            middle = (low + high) // 2
+            if self._entry_hash(middle) < position_hash:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def lookup_hash(self, position_hash):
+        """Takes in a position hash and returns the list of (game id, ply, result) tuples of the games reaching it"""
+        hits = []
+        index = self._search_hash(position_hash)
+        while index < self._count and self._entry_hash(index) == position_hash:
+            payload = self._words[2 * index + 1]
+            game_id, ply, result_code = unpack_entry(_swap_word(payload) if _SWAP_BYTES else payload)
+            hits.append((game_id, ply, RESULTS[result_code]))
+            index += 1
+        return hits
+
+    def query(self, position):
+        """Takes in a XiangqiGame or a FEN string and returns the PositionStats of the archived games reaching it"""
+        if isinstance(position, str):
+            position = XiangqiGame.from_fen(position, headless=True)
+        return PositionStats(self.lookup_hash(position.get_position_hash()))
+
+
+def main():
+    """Builds a position index from an archive, or prints the games of an index reaching a FEN position"""
+    if len(sys.argv) == 4 and sys.argv[1] == "build":
+        print(build_index(sys.argv[2], sys.argv[3]), "positions indexed")
+    elif len(sys.argv) >= 4 and sys.argv[1] == "query":
+        with PositionIndex(sys.argv[2]) as index:
+            stats = index.query(" ".join(sys.argv[3:]))
+            print(stats)
+            for game_id, ply, result in stats.get_hits()[:20]:
+                print("  game", game_id, "ply", ply, result)
+    else:
+        print("usage: python xiangqiIndex.py build ARCHIVE INDEX | query INDEX FEN")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
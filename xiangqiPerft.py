@@ -0,0 +1,124 @@
+# Project: CS 162 Portfolio Project
+# Author: Christopher Eckerson
+# Description: Perft (performance test) suite for the Xiangqi Game move generator.  Counts every legal move
+#              sequence to a fixed depth from a set of reference positions and compares the counts with known
+#              values, timing each run in nodes per second.  Published positions (by FEN) are checked first, then
+#              regression positions whose counts come from this move generator.  A change to move generation,
+#              check detection or the board representation is correct if the counts still match, and faster if
+#              the nodes per second rise.
+#              Run as a script: python xiangqiPerft.py [max depth]
+import sys
+import time
+from XiangqiGame import *
+
+# Published reference positions as (name, FEN, perft counts by depth from 1).  The counts are the published
+# xiangqi perft values of the starting position and of the test positions collected on the Chess Programming Wiki,
+# independent of this move generator.
+PUBLISHED_PERFT_SUITE = [
+    ("starting position", START_FEN,
+     [44, 1920, 79666, 3290240]),
+    ("middlegame 1", "r1ba1a3/4kn3/2n1b4/pNp1p1p1p/4c4/6P2/P1P2R2P/1CcC5/9/2BAKAB2 w - - 0 1",
+     [38, 1128, 43929, 1339047]),
+    ("middlegame 2", "1cbak4/9/n2a5/2p1p3p/5cp2/2n2N3/6PCP/3AB4/2C6/3A1K1N1 w - - 0 1",
+     [7, 281, 8620, 326201]),
+    ("middlegame 3", "1C2ka3/9/C1Nab1n2/p3p3p/6p2/9/P3P3P/3AB4/3p2c2/c1BAK4 w - - 0 1",
+     [30, 830, 22787, 649866]),
+    ("endgame 1", "5a3/3k5/3aR4/9/5r3/5n3/9/3A1A3/5K3/2BC2B2 w - - 0 1",
+     [25, 424, 9850, 202884]),
+    ("endgame 2", "CRN1k1b2/3ca4/4ba3/9/2nr5/9/9/4B4/4A4/4KA3 w - - 0 1",
+     [28, 516, 14808, 395483]),
+    ("endgame 3", "R1N1k1b2/9/3aba3/9/2nr5/2B6/9/4B4/4A4/4KA3 w - - 0 1",
+     [21, 364, 7626, 162837]),
+    ("endgame 4", "C1nNk4/9/9/9/9/9/n1pp5/B3C4/9/3A1K3 w - - 0 1",
+     [28, 222, 6241, 64971]),
+    ("endgame 5", "2b1ka3/9/b3N4/4n4/9/9/9/4C4/2p6/2BK5 w - - 0 1",
+     [21, 195, 3883, 48060]),
+    ("endgame 6", "CnN1k1b2/c3a4/4ba3/9/2nr5/9/9/4C4/4A4/4KA3 w - - 0 1",
+     [19, 583, 11714, 376467]),
+]
+# Regression positions as (name, moves played from the starting position, perft counts by depth from 1).
+# These counts were produced by this move generator and checked against a brute force count (every pseudo-legal
+# move made and tested for check), they catch changes in behaviour but are not independent published values.
+REGRESSION_PERFT_SUITE = [
+    ("central cannon opening", [("h3", "e3"), ("h10", "g8")],
+     [35, 1419, 51045, 2061348]),
+    ("cannon exchanges", [("b3", "b10"), ("a10", "b10"), ("h3", "h10"), ("i10", "h10")],
+     [20, 844, 18202, 805620]),
+    ("cannon check", [("h3", "e3"), ("d10", "e9"), ("e3", "e7")],
+     [8, 322, 10793, 422206]),
+]
+# depth the suite runs to when no depth is given, depth 4 of every position takes a few seconds each
+DEFAULT_PERFT_DEPTH = 3
+
+
+def play_moves(moves):
+    """
+    Takes in a list of (from, to) algebraic notation moves and returns a new XiangqiGame with them played
+    from the starting position.  Raises ValueError if a move is not legal.
+    """
+    game = XiangqiGame()
+    for currentPosition, nextPosition in moves:
+        move = encode_move(square_index(*ConvertAlgebraicNotation(currentPosition)),
+                           square_index(*ConvertAlgebraicNotation(nextPosition)))
+        if not game.is_legal_move(move):
+            raise ValueError("illegal move in perft suite: " + currentPosition + " to " + nextPosition)
+        game.push(move)
+    return game
+
+
+def run_perft(game, depth):
+    """Takes in a XiangqiGame and a depth and returns the (node count, seconds taken) of perft to that depth"""
+    start = time.perf_counter()
+    nodes = game.perft(depth)
+    return nodes, time.perf_counter() - start
+
+
+def _run_position(name, game, counts, max_depth, totals):
+    """
+    Runs perft on game up to max_depth (at most the depths with known counts), printing the count, time and nodes
+    per second of each depth and adding the nodes and seconds to totals.  Returns True if every count matched.
+    """
+    print("  " + name)
+    all_passed = True
+    for depth in range(1, min(max_depth, len(counts)) + 1):
+        nodes, elapsed = run_perft(game, depth)
+        totals[0] += nodes
+        totals[1] += elapsed
+        passed = nodes == counts[depth - 1]
+        all_passed = all_passed and passed
+        nps = int(nodes / elapsed) if elapsed > 0 else 0
+        print("    depth %d: %10d nodes %8.3fs %9d nps  %s" %
+              (depth, nodes, elapsed, nps, "ok" if passed else "FAILED, expected " + str(counts[depth - 1])))
+    return all_passed
+
+
+def run_suite(max_depth=DEFAULT_PERFT_DEPTH):
+    """
+    Runs perft on every position of PUBLISHED_PERFT_SUITE, then of REGRESSION_PERFT_SUITE, up to max_depth,
+    printing the count, time and nodes per second of each depth.  Returns True if every count matched.
+    """
+    all_passed = True
+    # total nodes and seconds
+    totals = [0, 0]
+    print("published positions")
+    for name, fen, counts in PUBLISHED_PERFT_SUITE:
+        game = XiangqiGame.from_fen(fen, headless=True)
+        all_passed = _run_position(name, game, counts, max_depth, totals) and all_passed
+    print("regression positions")
+    for name, moves, counts in REGRESSION_PERFT_SUITE:
+        all_passed = _run_position(name, play_moves(moves), counts, max_depth, totals) and all_passed
+    if totals[1] > 0:
+        print("total: %d nodes in %.3fs, %d nps" % (totals[0], totals[1], int(totals[0] / totals[1])))
+    print("all counts match" if all_passed else "PERFT MISMATCH")
+    return all_passed
+
+
+def main():
+    """Runs the perft suite to the depth given on the command line, exits with status 1 on a mismatch"""
+    max_depth = int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PERFT_DEPTH
+    if not run_suite(max_depth):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
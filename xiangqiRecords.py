@@ -0,0 +1,432 @@
+# Project: CS 162 Portfolio Project
+# Author: Christopher Eckerson
+# Description: Reading and writing of Xiangqi game records.  Records are PGN-like text: tag pair headers such as
+#              [Red "name"], [Result "1-0"] and [FEN "..."] followed by the numbered move list, with the moves in
+#              ICCS coordinates (H2-E2, files a to i and ranks 0 to 9 from red's side) or in WXF notation (C2.5,
+#              piece letter, file counted from the moving player's right, then . = traverse, + advance, - retreat).
+#              Games are read one at a time from a stream, so archives of any size are read in constant memory,
+#              and each game's moves are stored as compact move integers (see XiangqiGame.encode_move).
+#              Validation replays the moves with push/pop on one headless XiangqiGame, with no printing and
+#              no game log, so millions of games are checked without building a game per move.
+#              Run as a script: python xiangqiRecords.py FILE [--to iccs|wxf --output FILE]
+import io
+import re
+import sys
+import time
+import argparse
+from array import array
+from XiangqiGame import *
+
+# Result tokens that end a game's move list
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+# record move notations
+ICCS = "ICCS"
+WXF = "WXF"
+# WXF piece letters of each piece type, both the WXF and the western letters are read
+WXF_PIECES = {"K": GENERAL, "G": GENERAL, "A": ADVISOR, "E": ELEPHANT, "B": ELEPHANT, "H": HORSE, "N": HORSE,
+              "R": CHARIOT, "C": CANNON, "P": SOLDIER}
+WXF_LETTERS = {GENERAL: "K", ADVISOR: "A", ELEPHANT: "E", HORSE: "H", CHARIOT: "R", CANNON: "C", SOLDIER: "P"}
+# pieces moving in straight lines, whose WXF advance and retreat number is a number of steps, not a file
+STRAIGHT_PIECES = (GENERAL, CHARIOT, CANNON, SOLDIER)
+# number of rows a horse moves for each number of columns it moves
+HORSE_ROWS = {1: 2, 2: 1}
+# maximum length of a written move text line
+LINE_LENGTH = 80
+
+_TAG_PATTERN = re.compile(r'^\[(\w+)\s+"((?:[^"\\]|\\.)*)"\]\s*$')
+# backslash escape of a quote or backslash in a tag value
+_TAG_ESCAPE_PATTERN = re.compile(r'\\(.)')
+_ICCS_PATTERN = re.compile(r'^([a-iA-I])([0-9])-?([a-iA-I])([0-9])$')
+_WXF_PATTERN = re.compile(r'^([KGAEBHNRCPkgaebhnrcp])([1-9+\-])([.=+\-])([1-9])$')
+_MOVE_NUMBER_PATTERN = re.compile(r'^\d+\.+')
+
+
+class RecordError(Exception):
+    """Raised when a move or a game record can't be read or written"""
+    pass
+
+
+class GameRecord:
+    """
+    Represents one game record: its headers, moves as move integers and result, and when validated,
+    the ply of the first illegal move and the status of the final position
+    """
+
+    def __init__(self, headers, moves, result="*", error=None, error_ply=None, end_status=None):
+        """
+        Initialize the record with the headers dictionary, an array or list of move integers and the result token.
+        error: message of the first move that couldn't be read or played, error_ply: its ply number from 1,
+        end_status: NORMAL, CHECK, CHECKMATE or STALEMATE of the final position, or None if not validated
+        """
+        self._headers = headers
+        self._moves = array('H', moves)
+        self._result = result
+        self._error = error
+        self._error_ply = error_ply
+        self._end_status = end_status
+
+    def __len__(self):
+        """Returns the number of moves read"""
+        return len(self._moves)
+
+    def get_headers(self):
+        """Returns the dictionary of header tags"""
+        return self._headers
+
+    def get_moves(self):
+        """Returns the moves read, as an array of move integers"""
+        return self._moves
+
+    def get_result(self):
+        """Returns the result token, '1-0', '0-1', '1/2-1/2' or '*'"""
+        return self._result
+
+    def get_start_fen(self):
+        """Returns the FEN of the starting position, from the FEN header or the standard starting position"""
+        return self._headers.get("FEN", START_FEN)
+
+    def is_valid(self):
+        """Returns True if every move was read and legal, otherwise False"""
+        return self._error is None
+
+    def get_error(self):
+        """Returns the message of the first move that couldn't be read or played, or None"""
+        return self._error
+
+    def get_error_ply(self):
+        """Returns the ply number (from 1) of the first bad move, or None"""
+        return self._error_ply
+
+    def get_end_status(self):
+        """Returns the status of the final position (NORMAL, CHECK, CHECKMATE or STALEMATE), None if not validated"""
+        return self._end_status
+
+    def __repr__(self):
+        """Returns a one line summary of the record"""
+        names = self._headers.get("Red", "?") + " - " + self._headers.get("Black", "?")
+        status = "valid" if self.is_valid() else "invalid at ply " + str(self._error_ply) + ": " + self._error
+        return "GameRecord(" + names + ", " + str(len(self)) + " moves, " + self._result + ", " + status + ")"
+
+
+def parse_iccs(token):
+    """Takes in an ICCS move like 'h2e2' or 'H2-E2' and returns its move integer, raises RecordError if invalid"""
+    match = _ICCS_PATTERN.match(token)
+    if match is None:
+        raise RecordError("invalid ICCS move: " + token)
+    from_file, from_rank, to_file, to_rank = match.groups()
+    from_square = square_index(ord(from_file.lower()) - 97, int(from_rank))
+    to_square = square_index(ord(to_file.lower()) - 97, int(to_rank))
+    return encode_move(from_square, to_square)
+
+
+def format_iccs(move):
+    """Takes in a move integer and returns it in ICCS, like 'H2-E2'"""
+    from_col, from_row = SQUARE_LOCATIONS[move >> MOVE_SHIFT]
+    to_col, to_row = SQUARE_LOCATIONS[move & MOVE_MASK]
+    return "ABCDEFGHI"[from_col] + str(from_row) + "-" + "ABCDEFGHI"[to_col] + str(to_row)
+
+
+def _file_col(number, side):
+    """Returns the board column of WXF file number (1 to 9), counted from the right of side (RED or BLACK)"""
+    return 9 - number if side == RED else number - 1
+
+
+def _wxf_target(kind, side, col, row, action, number):
+    """
+    Returns the target square of a piece of kind on (col, row) for a WXF action ('.', '+' or '-') and number,
+    or None if the action can't be made by the piece
+    """
+    # rows advance towards the other player
+    forward = 1 if side == RED else -1
+    if action == "." or action == "=":
+        if kind not in STRAIGHT_PIECES:
+            return None
+        target_col, target_row = _file_col(number, side), row
+    else:
+        sign = forward if action == "+" else -forward
+        if kind in STRAIGHT_PIECES:
+            target_col, target_row = col, row + sign * number
+        else:
+            target_col = _file_col(number, side)
+            columns = abs(target_col - col)
+            if kind == HORSE:
+                rows = HORSE_ROWS.get(columns)
+            elif kind == ELEPHANT:
+                rows = 2 if columns == 2 else None
+            else:
+                rows = 1 if columns == 1 else None
+            if rows is None:
+                return None
+            target_row = row + sign * rows
+    if not on_board(target_col, target_row):
+        return None
+    return square_index(target_col, target_row)
+
+
+def parse_wxf(game, token):
+    """
+    Takes in a XiangqiGame and a WXF move of its active player like 'C2.5', 'H8+7' or 'R+.4' (the front of two
+    chariots on a file) and returns the move integer, raises RecordError if it doesn't match one legal move
+    """
+    if len(token) == 4 and token[0] in "+-" and token[1].isalpha():
+        # accept the '+C.5' order of front and rear moves too
+        token = token[1] + token[0] + token[2:]
+    match = _WXF_PATTERN.match(token)
+    if match is None:
+        raise RecordError("invalid WXF move: " + token)
+    letter, position, action, number = match.groups()
+    kind = WXF_PIECES[letter.upper()]
+    side = SIDES[game.get_active_player()]
+    code = kind | (BLACK_BIT if side == BLACK else 0)
+    board = game.get_board_array()
+    pieces = [square for square in range(BOARD_SQUARES) if board[square] == code]
+    if position in "+-":
+        # front or rear of the two pieces sharing a file, front being nearer the other player
+        files = {}
+        for square in pieces:
+            files.setdefault(SQUARE_LOCATIONS[square][0], []).append(square)
+        shared = [squares for squares in files.values() if len(squares) >= 2]
+        if len(shared) != 1:
+            raise RecordError("no single file with two pieces for WXF move: " + token)
+        ordered = sorted(shared[0], key=lambda square: SQUARE_LOCATIONS[square][1], reverse=side == RED)
+        candidates = [ordered[0] if position == "+" else ordered[-1]]
+    else:
+        col = _file_col(int(position), side)
+        candidates = [square for square in pieces if SQUARE_LOCATIONS[square][0] == col]
+    moves = []
+    for square in candidates:
+        col, row = SQUARE_LOCATIONS[square]
+        target = _wxf_target(kind, side, col, row, action, int(number))
+        if target is not None:
+            move = encode_move(square, target)
+            if game.is_legal_move(move):
+                moves.append(move)
+    if len(moves) != 1:
+        raise RecordError(("illegal" if not moves else "ambiguous") + " WXF move: " + token)
+    return moves[0]
+
+
+def format_wxf(game, move):
+    """Takes in a XiangqiGame and a move integer of its active player and returns the move in WXF, like 'C2.5'"""
+    board = game.get_board_array()
+    from_square = move >> MOVE_SHIFT
+    code = board[from_square]
+    kind = code & TYPE_MASK
+    side = code >> 3
+    from_col, from_row = SQUARE_LOCATIONS[from_square]
+    to_col, to_row = SQUARE_LOCATIONS[move & MOVE_MASK]
+    # file numbers are counted from the moving player's right
+    to_file = 9 - to_col if side == RED else to_col + 1
+    same_file = [square for square in range(from_col, BOARD_SQUARES, BOARD_COLS) if board[square] == code]
+    if len(same_file) == 1:
+        position = str(9 - from_col if side == RED else from_col + 1)
+    elif len(same_file) == 2:
+        front = max(same_file) if side == RED else min(same_file)
+        position = "+" if from_square == front else "-"
+    else:
+        raise RecordError("more than two pieces on a file can't be written in WXF: " + format_iccs(move))
+    if to_row == from_row:
+        return WXF_LETTERS[kind] + position + "." + str(to_file)
+    advance = (to_row > from_row) == (side == RED)
+    number = abs(to_row - from_row) if kind in STRAIGHT_PIECES else to_file
+    return WXF_LETTERS[kind] + position + ("+" if advance else "-") + str(number)
+
+
+def _iter_raw_games(stream):
+    """
+    Takes in a text stream of game records and yields (headers dictionary, move tokens list, result) for each game,
+    reading one line at a time.  Comments in braces and move numbers are skipped.
+    """
+    headers = {}
+    tokens = []
+    comment_depth = 0
+    for line in stream:
+        line = line.strip()
+        if not comment_depth and line.startswith("["):
+            match = _TAG_PATTERN.match(line)
+            if match is not None:
+                if tokens:
+                    # a header after moves starts the next game, the last game had no result token
+                    yield headers, tokens, headers.get("Result", "*")
+                    headers, tokens = {}, []
+                headers[match.group(1)] = _TAG_ESCAPE_PATTERN.sub(r"\1", match.group(2))
+                continue
+        for word in line.split():
+            # skip comments, which can run over several lines
+            if comment_depth or word.startswith("{"):
+                comment_depth += word.count("{") - word.count("}")
+                continue
+            if word.startswith(";"):
+                break
+            # skip move numbers, and the '...' standing in for a red move when black moves first
+            word = _MOVE_NUMBER_PATTERN.sub("", word)
+            if not word.strip("."):
+                continue
+            if word in RESULTS:
+                yield headers, tokens, word
+                headers, tokens = {}, []
+                continue
+            tokens.append(word)
+    if tokens or headers:
+        yield headers, tokens, headers.get("Result", "*")
+
+
+def read_games(stream, validate=True):
+    """
+    Takes in a text stream of game records and yields a GameRecord for each game, one game at a time.
+    validate: replay every game to check each move is legal and find the final position's status.
+    WXF games are always replayed, their moves can only be read on the board.
+    """
+    game = XiangqiGame(headless=True)
+    loaded_fen = START_FEN
+    for headers, tokens, result in _iter_raw_games(stream):
+        notation = headers.get("Format", "").upper()
+        if notation != WXF and notation != ICCS:
+            # guess the notation from the first move
+            notation = ICCS if not tokens or _ICCS_PATTERN.match(tokens[0]) else WXF
+        if not validate and notation == ICCS:
+            moves = []
+            error = None
+            for token in tokens:
+                try:
+                    moves.append(parse_iccs(token))
+                except RecordError as record_error:
+                    error = str(record_error)
+                    break
+            yield GameRecord(headers, moves, result, error, len(moves) + 1 if error else None)
+            continue
+
+        fen = headers.get("FEN", START_FEN)
+        if fen != loaded_fen:
+            try:
+                game.set_fen(fen)
+            except InvalidFenError as error:
+                loaded_fen = None
+                yield GameRecord(headers, [], result, "invalid FEN: " + str(error), 0)
+                continue
+            loaded_fen = fen
+        moves = []
+        error = None
+        for token in tokens:
+            try:
+                if notation == ICCS:
+                    move = parse_iccs(token)
+                    if not game.is_legal_move(move):
+                        raise RecordError("illegal move: " + token)
+                else:
+                    move = parse_wxf(game, token)
+            except RecordError as record_error:
+                error = str(record_error)
+                break
+            game.push(move)
+            moves.append(move)
+        end_status = game.get_position_status() if error is None else None
+        # take the moves back so the next game with the same start needs no setup
+        for move in moves:
+            game.pop()
+        yield GameRecord(headers, moves, result, error, len(moves) + 1 if error else None, end_status)
+
+
+def read_games_file(path, validate=True):
+    """Takes in the path of a game record file and yields a GameRecord for each game, see read_games"""
+    with open(path, encoding="utf-8") as stream:
+        for record in read_games(stream, validate):
+            yield record
+
+
+def write_game(stream, record, notation=ICCS):
+    """
+    Takes in a text stream, a GameRecord and the notation (ICCS or WXF) and writes the record to the stream.
+    The Format and Result headers are set from the notation and the record, quotes and backslashes in header values
+    are escaped with a backslash.  Raises RecordError for a header value with a line break, or a move that can't be
+    written in WXF.
+    """
+    headers = dict(record.get_headers())
+    headers["Format"] = notation
+    headers["Result"] = record.get_result()
+    for tag, value in headers.items():
+        if "\n" in value or "\r" in value:
+            raise RecordError("header values can't span lines: " + tag)
+        # quotes and backslashes in the value are escaped with a backslash
+        stream.write("[" + tag + ' "' + value.replace("\\", "\\\\").replace('"', '\\"') + '"]\n')
+    stream.write("\n")
+    game = None
+    if notation == WXF:
+        game = XiangqiGame.from_fen(record.get_start_fen(), headless=True)
+    # black starting a game from a FEN is written as '1. ... move'
+    black_first = record.get_start_fen().split()[1:2] == ["b"]
+    words = []
+    for ply, move in enumerate(record.get_moves()):
+        if game is not None:
+            word = format_wxf(game, move)
+            game.push(move)
+        else:
+            word = format_iccs(move)
+        # red's moves carry the move number, kept on the same line as the move
+        ply_number = ply + black_first
+        if ply_number % 2 == 0:
+            word = str(ply_number // 2 + 1) + ". " + word
+        elif ply == 0:
+            word = "1. ... " + word
+        words.append(word)
+    words.append(record.get_result())
+    line = ""
+    for word in words:
+        if line and len(line) + 1 + len(word) > LINE_LENGTH:
+            stream.write(line + "\n")
+            line = word
+        else:
+            line = line + " " + word if line else word
+    stream.write(line + "\n\n")
+
+
+def write_games(stream, records, notation=ICCS):
+    """Takes in a text stream, an iterable of GameRecords and the notation and writes every record, one at a time"""
+    for record in records:
+        write_game(stream, record, notation)
+
+
+def main():
+    """Validates a game record file, printing a summary and the bad games, and optionally converts it"""
+    parser = argparse.ArgumentParser(description="Validate and convert Xiangqi game records")
+    parser.add_argument("file", help="game record file")
+    parser.add_argument("--to", choices=["iccs", "wxf"], help="notation to convert the valid games to")
+    parser.add_argument("--output", help="file the converted games are written to")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    games = valid = plies = skipped = 0
+    output = open(args.output, "w", encoding="utf-8") if args.to and args.output else None
+    try:
+        for record in read_games_file(args.file):
+            games += 1
+            plies += len(record)
+            if record.is_valid():
+                valid += 1
+                if output is not None:
+                    # a game that can't be written in the notation (WXF with three pieces on a file) is left out,
+                    # each game is formatted in memory first so none of it reaches the output
+                    buffer = io.StringIO()
+                    try:
+                        write_game(buffer, record, args.to.upper())
+                    except RecordError as error:
+                        skipped += 1
+                        print("game", games, "not converted:", error)
+                    else:
+                        output.write(buffer.getvalue())
+            else:
+                print("game", games, record)
+    finally:
+        if output is not None:
+            output.close()
+    elapsed = time.perf_counter() - start
+    print("%d games, %d valid, %d invalid, %d moves in %.2fs (%d games/sec)" %
+          (games, valid, games - valid, plies, elapsed, games / elapsed if elapsed > 0 else 0))
+    if skipped:
+        print("%d valid games not converted to %s" % (skipped, args.to.upper()))
+    if valid != games or skipped:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
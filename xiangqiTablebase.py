@@ -0,0 +1,567 @@
+# Project: CS 162 Portfolio Project
+# Author: Christopher Eckerson
+# Description: Endgame tablebases for the Xiangqi Game.  A tablebase holds the result with perfect play (win,
+#              loss or draw for the player to move, and the plies to mate) of every position of a material
+#              signature, such as 'KR-KAA' (red general and chariot against black general and two advisors,
+#              pieces by their FEN letters).  Positions are numbered by the squares of each piece and the side to
+#              move, so probing a position is one index computation and one read from the mapped file.
+#              Symmetry reduction: the red general is kept on the left half of its palace (the board is mirrored
+#              left to right otherwise), identical pieces are only stored in one order of their squares, and a
+#              position with the colours swapped is probed in the tablebase of the swapped signature.
+#              Generation (generate_tablebase) first generates the tablebases of every signature a capture can
+#              lead to, then a process pool generates the legal moves of every position and a retrograde analysis
+#              works back from the mated and stalemated positions (a player with no legal move loses), finding
+#              each win in the fewest plies and each loss in the most.  Positions never resolved are draws.
+#              Tablebase file: header: magic 'XQTB', version, signature, position count               (32 bytes)
+#                              values: one 16 bit value per position, little-endian, see _encode_value
+#              Run as a script: python xiangqiTablebase.py generate SIGNATURE DIRECTORY | probe DIRECTORY FEN
+import os
+import sys
+import mmap
+import struct
+import multiprocessing
+from array import array
+from XiangqiGame import *
+
+# Tablebase file identification and format version
+TABLEBASE_MAGIC = b"XQTB"
+TABLEBASE_VERSION = 1
+# file header: magic, version, reserved, signature (ASCII, padded with zeros), position count
+TABLEBASE_HEADER = struct.Struct("<4sHH16sQ")
+# file name extension of tablebase files, the file name is the signature
+TABLEBASE_EXTENSION = ".xqtb"
+# stored value of positions that can't occur (overlapping pieces, the player not to move in check)
+INVALID_VALUE = -32768
+# number of positions generated by each task of the process pool
+CHUNK_POSITIONS = 4096
+# order of the pieces in a signature, by piece code
+SIGNATURE_ORDER = (GENERAL, ADVISOR, ELEPHANT, HORSE, CHARIOT, CANNON, SOLDIER)
+
+# Probe outcomes for the player to move
+WIN = "WIN"
+LOSS = "LOSS"
+DRAW = "DRAW"
+
+# kinds of the events of the retrograde analysis, see _retrograde
+_LOSS_EVENT = 0
+_WIN_EVENT = 1
+_CHILD_WIN_EVENT = 2
+# the tablebase values are stored little-endian, swap them on big-endian machines
+_SWAP_BYTES = sys.byteorder != "little"
+
+
+class TablebaseError(Exception):
+    """Raised when a material signature or a tablebase file can't be read"""
+    pass
+
+
+def _encode_value(outcome, plies):
+    """
+    Returns the stored value of a position: 0 for a draw, plies + 1 for a win of the player to move in plies,
+    -(plies + 1) for a loss in plies (a mated or stalemated player loses in 0 plies)
+    """
+    if outcome == DRAW:
+        return 0
+    return plies + 1 if outcome == WIN else -(plies + 1)
+
+
+def _decode_value(value):
+    """Returns the (outcome, plies) tuple of a stored value, plies is None for a draw"""
+    if value == 0:
+        return DRAW, None
+    if value > 0:
+        return WIN, value - 1
+    return LOSS, -value - 1
+
+
+def parse_signature(signature):
+    """
+    Takes in a material signature, the FEN letters of red's pieces and black's pieces separated by '-'
+    (for example 'KR-KAA'), and returns the (red piece types, black piece types) tuple, each in SIGNATURE_ORDER.
+    Raises TablebaseError if a side doesn't have exactly one general or a letter isn't a piece.
+    """
+    sides = signature.upper().split("-")
+    if len(sides) != 2:
+        raise TablebaseError("signature must be red's and black's pieces separated by '-': " + signature)
+    pieces = []
+    for letters in sides:
+        if any(letter not in FEN_PIECES for letter in letters) or letters.count("K") != 1:
+            raise TablebaseError("each side must have one general (K) and only piece letters: " + signature)
+        pieces.append(tuple(sorted((FEN_PIECES[letter] for letter in letters), key=SIGNATURE_ORDER.index)))
+    return pieces[0], pieces[1]
+
+
+def format_signature(red_pieces, black_pieces):
+    """Takes in the red and black piece types and returns their material signature, for example 'KR-KAA'"""
+    return "-".join("".join(FEN_LETTERS[kind] for kind in sorted(pieces, key=SIGNATURE_ORDER.index))
+                    for pieces in (red_pieces, black_pieces))
+
+
+def board_signature(board):
+    """Takes in a board array and returns the material signature of its pieces"""
+    red_pieces = [piece for piece in board if piece and not piece & BLACK_BIT]
+    black_pieces = [piece & TYPE_MASK for piece in board if piece & BLACK_BIT]
+    return format_signature(red_pieces, black_pieces)
+
+
+def swap_signature(signature):
+    """Returns the signature with the colours swapped, 'KR-KAA' becomes 'KAA-KR'"""
+    red_pieces, black_pieces = parse_signature(signature)
+    return format_signature(black_pieces, red_pieces)
+
+
+def sub_signatures(signature):
+    """Returns the sorted list of the signatures a capture can lead to, every signature with one piece less"""
+    red_pieces, black_pieces = parse_signature(signature)
+    signatures = set()
+    for index in range(1, len(red_pieces)):
+        signatures.add(format_signature(red_pieces[:index] + red_pieces[index + 1:], black_pieces))
+    for index in range(1, len(black_pieces)):
+        signatures.add(format_signature(red_pieces, black_pieces[:index] + black_pieces[index + 1:]))
+    return sorted(signatures)
+
+
+def swap_colours(board):
+    """Returns a copy of a board array with the colours swapped and the board turned, red's pieces become black's"""
+    swapped = bytearray(BOARD_SQUARES)
+    for square, piece in enumerate(board):
+        if piece:
+            col, row = SQUARE_LOCATIONS[square]
+            swapped[square_index(col, BOARD_ROWS - 1 - row)] = piece ^ BLACK_BIT
+    return swapped
+
+
+def _reachable_squares(piece):
+    """
+    Returns the sorted tuple of the squares a piece code can ever stand on: the palace, the advisor and elephant
+    points of its side, the squares ahead of its soldiers' starting squares, or any square
+    """
+    kind = piece & TYPE_MASK
+    side = BLACK if piece & BLACK_BIT else RED
+    if kind == GENERAL:
+        return tuple(square for square, (col, row) in enumerate(SQUARE_LOCATIONS) if in_palace(col, row, side))
+    if kind == ADVISOR:
+        steps = [ADVISOR_MOVES[side][square] for square in range(BOARD_SQUARES)]
+    elif kind == ELEPHANT:
+        steps = [[target for target, eye in ELEPHANT_MOVES[side][square]] for square in range(BOARD_SQUARES)]
+    elif kind == SOLDIER:
+        steps = SOLDIER_MOVES[side]
+    else:
+        return tuple(range(BOARD_SQUARES))
+    # every square reached by the piece's steps from the squares it starts the game on
+    start_board = XiangqiGame(headless=True).get_board_array()
+    reached = set(square for square in range(BOARD_SQUARES) if start_board[square] == piece)
+    frontier = list(reached)
+    while frontier:
+        for target in steps[frontier.pop()]:
+            if target not in reached:
+                reached.add(target)
+                frontier.append(target)
+    return tuple(sorted(reached))
+
+
+def _mirror_square(square):
+    """Returns the square mirrored left to right"""
+    col, row = SQUARE_LOCATIONS[square]
+    return square_index(BOARD_COLS - 1 - col, row)
+
+
+class _Layout:
+    """
+    Represents the numbering of the positions of a material signature.  Each piece has a slot with the squares
+    it can stand on, a position's number is the side to move followed by each slot's square, in mixed radix.
+    """
+
+    def __init__(self, signature):
+        """Initialize the layout of signature, red's slots first"""
+        red_pieces, black_pieces = parse_signature(signature)
+        self._signature = format_signature(red_pieces, black_pieces)
+        self._codes = list(red_pieces) + [kind | BLACK_BIT for kind in black_pieces]
+        self._slot_squares = []
+        for code in self._codes:
+            squares = _reachable_squares(code)
+            if code == GENERAL:
+                # mirror symmetry, the red general is kept in the left two files of the palace
+                squares = tuple(square for square in squares if SQUARE_LOCATIONS[square][0] <= 4)
+            self._slot_squares.append(squares)
+        # number in its slot of each square, by slot
+        self._slot_numbers = [dict((square, number) for number, square in enumerate(squares))
+                              for squares in self._slot_squares]
+        # first slot of each piece code, identical pieces have consecutive slots
+        self._first_slot = {}
+        for slot, code in enumerate(self._codes):
+            self._first_slot.setdefault(code, slot)
+        self._size = 2
+        for squares in self._slot_squares:
+            self._size *= len(squares)
+
+    def get_signature(self):
+        """Returns the material signature of the layout"""
+        return self._signature
+
+    def __len__(self):
+        """Returns the number of position numbers, valid or not"""
+        return self._size
+
+    def decode(self, number):
+        """
+        Takes in a position number and returns its (board, side) tuple, or None if it isn't the stored order
+        of a position (two pieces on one square, or identical pieces out of order)
+        """
+        squares = [0] * len(self._codes)
+        for slot in range(len(self._codes) - 1, -1, -1):
+            number, index = divmod(number, len(self._slot_squares[slot]))
+            squares[slot] = self._slot_squares[slot][index]
+        board = bytearray(BOARD_SQUARES)
+        for slot, square in enumerate(squares):
+            if board[square]:
+                return None
+            # identical pieces are stored with their squares in increasing order only
+            if slot > 0 and self._codes[slot - 1] == self._codes[slot] and squares[slot - 1] > square:
+                return None
+            board[square] = self._codes[slot]
+        return board, number
+
+    def encode(self, board, side):
+        """
+        Takes in a board array with the layout's material and the side (RED or BLACK) to move and returns the
+        position number, mirroring the board if the red general is in the right file of the palace.
+        Returns None if a piece is on a square it can never reach.
+        """
+        squares = [0] * len(self._codes)
+        filled = dict(self._first_slot)
+        mirror = SQUARE_LOCATIONS[board.index(GENERAL)][0] > 4
+        for square, piece in enumerate(board):
+            if piece:
+                slot = filled[piece]
+                filled[piece] = slot + 1
+                squares[slot] = _mirror_square(square) if mirror else square
+        if mirror:
+            # mirrored squares of identical pieces are no longer in increasing order
+            for code, slot in self._first_slot.items():
+                count = filled[code] - slot
+                if count > 1:
+                    squares[slot:slot + count] = sorted(squares[slot:slot + count])
+        number = side
+        for slot, square in enumerate(squares):
+            if square not in self._slot_numbers[slot]:
+                # a piece on a square it can't reach, such as a soldier behind its starting rank
+                return None
+            number = number * len(self._slot_squares[slot]) + self._slot_numbers[slot][square]
+        return number
+
+
+class Tablebase:
+    """
+    Represents a tablebase file opened for reading, mapped into memory.
+    Can be used in a with statement, close unmaps the file.
+    """
+
+    def __init__(self, path):
+        """Initialize the tablebase by mapping the file at path and checking its header"""
+        with open(path, "rb") as tablebase_file:
+            # an empty file can't be mapped, check the size first
+            if os.fstat(tablebase_file.fileno()).st_size < TABLEBASE_HEADER.size:
+                raise TablebaseError("not a tablebase file: " + path)
+            self._map = mmap.mmap(tablebase_file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, reserved, signature, count = TABLEBASE_HEADER.unpack_from(self._map, 0)
+        if magic != TABLEBASE_MAGIC or version != TABLEBASE_VERSION:
+            self._map.close()
+            raise TablebaseError("not a version " + str(TABLEBASE_VERSION) + " tablebase file: " + path)
+        self._layout = _Layout(signature.rstrip(b"\0").decode("ascii"))
+        if count != len(self._layout) or TABLEBASE_HEADER.size + 2 * count > len(self._map):
+            self._map.close()
+            raise TablebaseError("tablebase file has the wrong number of positions: " + path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Unmaps the tablebase file"""
+        self._map.close()
+
+    def get_signature(self):
+        """Returns the material signature of the tablebase"""
+        return self._layout.get_signature()
+
+    def __len__(self):
+        """Returns the number of position numbers of the tablebase, including the numbers of invalid positions"""
+        return len(self._layout)
+
+    def probe_value(self, board, side):
+        """
+        Takes in a board array of the tablebase's material (or its colour swapped material) and the side
+        (RED or BLACK) to move and returns the stored value of the position, see _encode_value
+        """
+        if board_signature(board) != self._layout.get_signature():
+            board = swap_colours(board)
+            side = 1 - side
+        number = self._layout.encode(board, side)
+        if number is None:
+            return INVALID_VALUE
+        return struct.unpack_from("<h", self._map, TABLEBASE_HEADER.size + 2 * number)[0]
+
+    def probe(self, game):
+        """
+        Takes in a XiangqiGame with the tablebase's material (or its colour swapped material) and returns the
+        (outcome, plies) tuple of its position: WIN, LOSS or DRAW for the player to move and the plies to mate
+        with perfect play, None for a draw.  Returns None if the position can't occur.
+        """
+        value = self.probe_value(game.get_board_array(), SIDES[game.get_active_player()])
+        if value == INVALID_VALUE:
+            return None
+        return _decode_value(value)
+
+
+class Tablebases:
+    """
+    Represents the tablebase files of a directory, each opened the first time a position of its material is probed
+    """
+
+    def __init__(self, directory):
+        """Initialize the collection with the directory of the tablebase files"""
+        self._directory = directory
+        # opened tablebases by signature, None for a signature without a file
+        self._tablebases = {}
+
+    def close(self):
+        """Unmaps every opened tablebase file"""
+        for tablebase in self._tablebases.values():
+            if tablebase is not None:
+                tablebase.close()
+        self._tablebases = {}
+
+    def _find(self, signature):
+        """Returns the opened Tablebase of signature or of its colour swapped signature, or None"""
+        if signature not in self._tablebases:
+            tablebase = None
+            for name in (signature, swap_signature(signature)):
+                path = os.path.join(self._directory, name + TABLEBASE_EXTENSION)
+                if os.path.exists(path):
+                    tablebase = Tablebase(path)
+                    break
+            self._tablebases[signature] = tablebase
+        return self._tablebases[signature]
+
+    def has_signature(self, signature):
+        """Returns True if the directory has the tablebase of signature or of its colour swapped signature"""
+        return self._find(format_signature(*parse_signature(signature))) is not None
+
+    def probe_value(self, board, side):
+        """Returns the stored value of a position, see Tablebase.probe_value, or None without a tablebase for it"""
+        tablebase = self._find(board_signature(board))
+        if tablebase is None:
+            return None
+        return tablebase.probe_value(board, side)
+
+    def probe(self, game):
+        """
+        Takes in a XiangqiGame and returns the (outcome, plies) tuple of its position, see Tablebase.probe,
+        or None if the directory has no tablebase for its material
+        """
+        tablebase = self._find(board_signature(game.get_board_array()))
+        if tablebase is None:
+            return None
+        return tablebase.probe(game)
+
+
+# layout, game and tablebases of a generation worker process, set by _init_worker
+_worker = {}
+
+
+def _init_worker(signature, directory):
+    """Sets up a process pool worker to generate positions of signature, probing captures in directory"""
+    _worker["layout"] = _Layout(signature)
+    _worker["game"] = XiangqiGame(headless=True)
+    _worker["tablebases"] = Tablebases(directory)
+
+
+def _generate_chunk(start, stop):
+    """
+    Generates the moves of the positions numbered start up to stop.  Returns the (start, move counts,
+    successors, captures) tuple: the number of legal moves of each position (-1 for an invalid position),
+    the position numbers reached by the moves that don't capture, in position order, and the
+    (position number, stored value) pairs of the moves that capture, probed in the smaller tablebases.
+    """
+    layout = _worker["layout"]
+    game = _worker["game"]
+    tablebases = _worker["tablebases"]
+    move_counts = array('i')
+    successors = array('I')
+    captures = array('i')
+    for number in range(start, stop):
+        position = layout.decode(number)
+        if position is None:
+            move_counts.append(-1)
+            continue
+        board, side = position
+        # only the moves are needed, so the position is loaded without a game state or a new game log
+        game.load_board_array(board, PLAYERS[side])
+        # a position where the player not to move is in check (or the generals face) can't occur
+        if game.is_in_check(PLAYERS[1 - side]):
+            move_counts.append(-1)
+            continue
+        moves = game.generate_legal_moves()
+        move_counts.append(len(moves))
+        for move in moves:
+            captured = board[move & MOVE_MASK]
+            game.push(move)
+            if captured:
+                captures.append(number)
+                captures.append(tablebases.probe_value(game.get_board_array(), 1 - side))
+            else:
+                successors.append(layout.encode(game.get_board_array(), 1 - side))
+            game.pop()
+    return start, move_counts, successors, captures
+
+
+def _retrograde(size, move_counts, successors, captures):
+    """
+    Takes in the generated moves of every position and returns the array of stored values.
+    Events are handled in order of plies to mate: a lost position makes every position moving into it a win
+    one ply longer, a won position takes one unresolved move from every position moving into it, and a position
+    whose moves all lead to wins for the other player is a loss one ply longer than the longest of them.
+    """
+    # predecessors of each position, as a compressed list: the positions moving into position p are
+    # predecessors[first[p]:first[p + 1]]
+    first = array('I', bytes(4 * (size + 1)))
+    for successor in successors:
+        first[successor + 1] += 1
+    for number in range(size):
+        first[number + 1] += first[number]
+    fill = array('I', first)
+    predecessors = array('I', bytes(4 * len(successors)))
+    # successors holds only the moves that don't capture, the rest of each position's moves are in captures
+    quiet_counts = array('i', move_counts)
+    for index in range(0, len(captures), 2):
+        quiet_counts[captures[index]] -= 1
+    index = 0
+    for number in range(size):
+        if quiet_counts[number] > 0:
+            for successor in successors[index:index + quiet_counts[number]]:
+                predecessors[fill[successor]] = number
+                fill[successor] += 1
+            index += quiet_counts[number]
+
+    values = array('h', [INVALID_VALUE]) * size
+    remaining = array('i', move_counts)
+    resolved = bytearray(size)
+    # events by plies, each event is position number * 4 + event kind
+    events = [[]]
+    for number in range(size):
+        if move_counts[number] == 0:
+            events[0].append(number * 4 + _LOSS_EVENT)
+        elif move_counts[number] > 0:
+            values[number] = 0
+    for index in range(0, len(captures), 2):
+        number, value = captures[index], captures[index + 1]
+        if value < 0:
+            # the capture leaves the other player lost in -value - 1 plies
+            event = (-value, number * 4 + _WIN_EVENT)
+        elif value > 0:
+            # the capture leaves the other player winning in value - 1 plies
+            event = (value - 1, number * 4 + _CHILD_WIN_EVENT)
+        else:
+            continue
+        while len(events) <= event[0]:
+            events.append([])
+        events[event[0]].append(event[1])
+
+    plies = 0
+    while plies < len(events):
+        for event in events[plies]:
+            number, kind = event >> 2, event & 3
+            if kind == _CHILD_WIN_EVENT:
+                remaining[number] -= 1
+                if remaining[number] == 0 and not resolved[number]:
+                    if len(events) <= plies + 1:
+                        events.append([])
+                    events[plies + 1].append(number * 4 + _LOSS_EVENT)
+                continue
+            if resolved[number]:
+                continue
+            resolved[number] = 1
+            if len(events) <= plies + 1:
+                events.append([])
+            if kind == _LOSS_EVENT:
+                values[number] = _encode_value(LOSS, plies)
+                for predecessor in predecessors[first[number]:first[number + 1]]:
+                    events[plies + 1].append(predecessor * 4 + _WIN_EVENT)
+            else:
+                values[number] = _encode_value(WIN, plies)
+                for predecessor in predecessors[first[number]:first[number + 1]]:
+                    remaining[predecessor] -= 1
+                    if remaining[predecessor] == 0 and not resolved[predecessor]:
+                        events[plies + 1].append(predecessor * 4 + _LOSS_EVENT)
+        events[plies] = None
+        plies += 1
+    return values
+
+
+def generate_tablebase(signature, directory, workers=None):
+    """
+    Takes in a material signature and generates its tablebase file in directory, after generating the
+    tablebases of the signatures captures lead to that the directory doesn't have yet.
+    workers: number of processes generating positions, None for one per CPU core.
+    Returns the path of the tablebase file.
+    """
+    signature = format_signature(*parse_signature(signature))
+    tablebases = Tablebases(directory)
+    try:
+        for sub_signature in sub_signatures(signature):
+            if not tablebases.has_signature(sub_signature):
+                generate_tablebase(sub_signature, directory, workers)
+    finally:
+        tablebases.close()
+
+    layout = _Layout(signature)
+    size = len(layout)
+    move_counts = array('i', bytes(4 * size))
+    chunk_successors = {}
+    captures = array('i')
+    chunks = [(start, min(start + CHUNK_POSITIONS, size)) for start in range(0, size, CHUNK_POSITIONS)]
+    with multiprocessing.Pool(workers or os.cpu_count() or 1, _init_worker, (signature, directory)) as pool:
+        for start, counts, successors, chunk_captures in pool.starmap(_generate_chunk, chunks):
+            move_counts[start:start + len(counts)] = counts
+            chunk_successors[start] = successors
+            captures.extend(chunk_captures)
+    successors = array('I')
+    for start, stop in chunks:
+        successors.extend(chunk_successors.pop(start))
+    values = _retrograde(size, move_counts, successors, captures)
+
+    if _SWAP_BYTES:
+        values.byteswap()
+    path = os.path.join(directory, signature + TABLEBASE_EXTENSION)
+    with open(path, "wb") as tablebase_file:
+        tablebase_file.write(TABLEBASE_HEADER.pack(TABLEBASE_MAGIC, TABLEBASE_VERSION, 0,
+                                                   signature.encode("ascii"), size))
+        values.tofile(tablebase_file)
+    return path
+
+
+def main():
+    """Generates the tablebase of a signature, or prints the tablebase result of a FEN position"""
+    if len(sys.argv) == 4 and sys.argv[1] == "generate":
+        os.makedirs(sys.argv[3], exist_ok=True)
+        print("wrote", generate_tablebase(sys.argv[2], sys.argv[3]))
+    elif len(sys.argv) >= 4 and sys.argv[1] == "probe":
+        tablebases = Tablebases(sys.argv[2])
+        result = tablebases.probe(XiangqiGame.from_fen(" ".join(sys.argv[3:]), headless=True))
+        tablebases.close()
+        if result is None:
+            print("no tablebase result for the position")
+        elif result[0] == DRAW:
+            print(DRAW)
+        else:
+            print(result[0], "in", result[1], "plies")
+    else:
+        print("usage: python xiangqiTablebase.py generate SIGNATURE DIRECTORY | probe DIRECTORY FEN")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()